@@ -0,0 +1,74 @@
+# accounts/authentication.py
+"""
+JWT authentication that resolves users from a cache.
+
+The access token carries the user's `token_version` (claim "ver"). The User
+row is kept in the "auth" cache alias for AUTH_USER_CACHE_TIMEOUT seconds and
+dropped whenever it is saved, so a request is normally authenticated without
+a query. The password hash is never cached, and neither are the streak
+fields, which the nightly jobs update in bulk without saving; reading any of
+them loads it from the database.
+
+Every request is checked against the cached copy: a token for an inactive
+user, or older than the user's current version, is rejected, so bumping
+`token_version` revokes every token issued before it. A token newer than
+the cached copy means the copy is stale and the row is reloaded.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+VERSION_CLAIM = "ver"
+UNCACHED_FIELDS = ("password", "streak", "streak_date")
+
+cache = caches["auth"]
+
+
+def user_cache_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def invalidate_cached_users(user_ids):
+    cache.delete_many([user_cache_key(user_id) for user_id in user_ids])
+
+
+def cached_user(user_id, version=None):
+    """
+    The User for `user_id` (with UNCACHED_FIELDS deferred), or None if
+    there is no such user. A cached copy older than `version` is replaced
+    from the database.
+    """
+    key = user_cache_key(user_id)
+    user = cache.get(key)
+    if user is None or (version is not None and user.token_version < version):
+        user = User.objects.defer(*UNCACHED_FIELDS).filter(pk=user_id).first()
+        if user is not None:
+            cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+    return user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+
+    def user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+    def check_user(self, user, validated_token):
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if validated_token.get(VERSION_CLAIM, 0) != user.token_version:
+            raise AuthenticationFailed(_("Token has been revoked."), code="token_revoked")
+
+    def get_user(self, validated_token):
+        user = cached_user(self.user_id(validated_token), validated_token.get(VERSION_CLAIM, 0))
+        self.check_user(user, validated_token)
+        return user
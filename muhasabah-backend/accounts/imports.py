@@ -0,0 +1,242 @@
+# accounts/imports.py
+"""
+Bulk onboarding of users from CSV or JSON Lines.
+
+Every row is validated before anything is written; a file with any invalid
+row imports nothing. Valid files are inserted with `bulk_create` in one
+transaction, optionally joined to a sitting as approved members (with
+today's check-ins), and each new user gets one welcome email queued in the
+outbox carrying their verification and set-password links.
+
+Rows without a password get an unusable one, so an import does no password
+hashing; rows that do carry a password pay for one hash each.
+"""
+import csv
+import io
+import json
+import time
+from collections import defaultdict
+from datetime import date
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.tokens import default_token_generator
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models.functions import Upper
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from phonenumber_field.phonenumber import to_python
+
+from checkins.generation import insert_checkins
+from checkins.rollups import refresh_sitting_progress
+from notification.outbox import email_message, enqueue
+from sittings.capacity import reserve_seats
+from sittings.models import Sitting, SittingMembership
+from .models import User
+
+CHUNK_SIZE = 1000
+FIELDS = ("email", "username", "password", "role", "location", "whatsapp", "first_name", "last_name")
+# Fields checked with the model's own validators (email format, max_length, username characters).
+MODEL_VALIDATED = ("email", "username", "location", "first_name", "last_name")
+
+
+class UserImportError(Exception):
+    """Raised with the list of row errors when a file fails validation."""
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} invalid rows")
+        self.errors = errors
+
+
+def read_rows(stream, fmt):
+    """Parses a text stream of CSV (with a header row) or JSON Lines into dicts."""
+    if fmt == "csv":
+        return [dict(row) for row in csv.DictReader(stream)]
+    if fmt == "jsonl":
+        rows, errors = [], []
+        for number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                errors.append({"row": number, "errors": [f"Invalid JSON: {e.msg}."]})
+                continue
+            if not isinstance(row, dict):
+                errors.append({"row": number, "errors": ["Each line must be a JSON object."]})
+                continue
+            rows.append(row)
+        if errors:
+            raise UserImportError(errors)
+        return rows
+    raise ValueError(f"Unsupported format: {fmt}")
+
+
+def detect_format(filename):
+    return "jsonl" if filename.lower().endswith((".jsonl", ".ndjson")) else "csv"
+
+
+def validate_rows(rows):
+    """
+    Normalizes `rows` and checks them against each other and the database
+    (two queries in total). Raises UserImportError listing every invalid row.
+    """
+    cleaned, errors = [], defaultdict(list)
+    roles = set(User.Roles.values)
+    seen_emails, seen_usernames = set(), set()
+
+    for number, raw in enumerate(rows, start=1):
+        if not isinstance(raw, dict):
+            errors[number].append("Row must be an object.")
+            continue
+        row = {field: str(raw.get(field) or "").strip() for field in FIELDS}
+        row["role"] = row["role"] or User.Roles.STUDENT
+        problems = []
+
+        if not row["email"]:
+            problems.append("Email is required.")
+        if not row["username"]:
+            problems.append("Username is required.")
+        for field in MODEL_VALIDATED:
+            if row[field]:
+                try:
+                    User._meta.get_field(field).run_validators(row[field])
+                except ValidationError as e:
+                    problems += [f"{field}: {message}" for message in e.messages]
+        if row["role"] not in roles:
+            problems.append(f"Unknown role '{row['role']}'.")
+        if row["whatsapp"]:
+            phone = to_python(row["whatsapp"], region="NG")
+            if not phone or not phone.is_valid():
+                problems.append("Invalid WhatsApp number.")
+            else:
+                row["whatsapp"] = phone.as_e164
+
+        email_key = row["email"].upper()
+        if email_key in seen_emails:
+            problems.append("Duplicate email in file.")
+        if row["username"] in seen_usernames:
+            problems.append("Duplicate username in file.")
+        seen_emails.add(email_key)
+        seen_usernames.add(row["username"])
+
+        errors[number].extend(problems)
+        cleaned.append((number, row))
+
+    taken_emails = set(
+        User.objects.annotate(email_upper=Upper("email"))
+        .filter(email_upper__in=seen_emails)
+        .values_list("email_upper", flat=True)
+    )
+    taken_usernames = set(
+        User.objects.filter(username__in=seen_usernames).values_list("username", flat=True)
+    )
+    if taken_emails or taken_usernames:
+        for number, row in cleaned:
+            if row["email"].upper() in taken_emails:
+                errors[number].append("Email already registered.")
+            if row["username"] in taken_usernames:
+                errors[number].append("Username already taken.")
+
+    invalid = [{"row": number, "errors": problems} for number, problems in sorted(errors.items()) if problems]
+    if invalid:
+        raise UserImportError(invalid)
+    return [row for _, row in cleaned]
+
+
+def sitting_full(sitting):
+    free = max(sitting.max_members - sitting.approved_count, 0)
+    return {"row": None, "errors": [f"Sitting '{sitting.name}' has room for {free} more members."]}
+
+
+def welcome_message(user):
+    uid = urlsafe_base64_encode(force_bytes(user.pk))
+    token = default_token_generator.make_token(user)
+    return email_message(
+        user.email,
+        subject="Welcome to Muhasabah - verify your email",
+        body=(
+            f"Assalaam alaykum {user.username},\n\n"
+            f"An account has been created for you. Verify your email: "
+            f"{settings.FRONTEND_URL}/verify-email/{uid}/{token}/\n"
+            f"Then choose your password: "
+            f"{settings.FRONTEND_URL}/reset-password-confirm/{uid}/{token}/"
+        ),
+        dedup_key=f"verify-email:{user.pk}",
+    )
+
+
+def import_users(rows, sitting=None, chunk_size=CHUNK_SIZE, dry_run=False):
+    """
+    Validates and imports `rows`, returning a throughput report. With a
+    `sitting`, the users join it as approved members. Raises UserImportError
+    (nothing written) if any row is invalid or the sitting lacks room.
+    """
+    started = time.monotonic()
+    rows = validate_rows(rows)
+
+    if sitting is not None and sitting.approved_count + len(rows) > sitting.max_members:
+        raise UserImportError([sitting_full(sitting)])
+
+    report = {"rows": len(rows), "created": 0, "memberships": 0, "checkins": 0, "emails_queued": 0}
+    if dry_run or not rows:
+        report["seconds"] = round(time.monotonic() - started, 3)
+        return report
+
+    today = date.today()
+    messages = []
+    with transaction.atomic():
+        if sitting is not None and not reserve_seats(sitting.id, len(rows)):
+            raise UserImportError([sitting_full(sitting)])
+
+        for start in range(0, len(rows), chunk_size):
+            users = User.objects.bulk_create([
+                User(
+                    email=row["email"],
+                    username=row["username"],
+                    password=make_password(row["password"] or None),
+                    role=row["role"],
+                    location=row["location"],
+                    whatsapp=row["whatsapp"],
+                    first_name=row["first_name"],
+                    last_name=row["last_name"],
+                )
+                for row in rows[start:start + chunk_size]
+            ])
+            user_ids = [user.id for user in users]
+            report["created"] += len(users)
+
+            if sitting is not None:
+                SittingMembership.objects.bulk_create([
+                    SittingMembership(student_id=user_id, sitting=sitting, status="approved")
+                    for user_id in user_ids
+                ])
+                report["memberships"] += len(user_ids)
+                report["checkins"] += insert_checkins(user_ids, today)
+
+            messages.extend(welcome_message(user) for user in users)
+
+        if sitting is not None:
+            refresh_sitting_progress([sitting.id], today)
+
+        # One enqueue, so the dispatcher is kicked once after commit.
+        enqueue(messages)
+        report["emails_queued"] = len(messages)
+
+    seconds = time.monotonic() - started
+    report["seconds"] = round(seconds, 3)
+    report["per_second"] = round(report["created"] / seconds, 1) if seconds else 0
+    return report
+
+
+def import_file(stream, fmt, sitting_id=None, **kwargs):
+    """Reads `stream` in `fmt` and imports it; resolves `sitting_id` first."""
+    sitting = None
+    if sitting_id is not None:
+        sitting = Sitting.objects.filter(id=sitting_id).first()
+        if sitting is None:
+            raise UserImportError([{"row": None, "errors": [f"Sitting {sitting_id} does not exist."]}])
+    if isinstance(stream, (bytes, bytearray)):
+        stream = io.StringIO(stream.decode("utf-8-sig"))
+    return import_users(read_rows(stream, fmt), sitting=sitting, **kwargs)
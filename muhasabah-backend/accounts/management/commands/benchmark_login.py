@@ -0,0 +1,50 @@
+# accounts/management/commands/benchmark_login.py
+import time
+
+from django.contrib.auth import authenticate
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.models import User
+from accounts.serializers import resolve_login
+
+PASSWORD = "benchmark-Pa55word"
+
+
+def previous_login(login, password):
+    """The old flow: authenticate, fall back to an email lookup, then re-authenticate."""
+    user = authenticate(username=login, password=password)
+    if not user:
+        match = User.objects.filter(email__iexact=login).first()
+        if match:
+            user = authenticate(username=match.email, password=password)
+    if user:
+        authenticate(username=user.email, password=password)
+    return user
+
+
+class Command(BaseCommand):
+    help = "Measures logins per second for the previous and the single-lookup login paths."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=10, help="Logins per scenario (default: 10).")
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+
+        # The throwaway user is rolled back with the transaction.
+        with transaction.atomic():
+            user = User.objects.create_user(
+                username="benchmark-login", email="Benchmark-Login@example.com",
+                password=PASSWORD, role=User.Roles.STUDENT, is_verified=True,
+            )
+            for label, login in [("username", user.username), ("email", user.email.lower())]:
+                for name, path in [("previous", previous_login), ("single-lookup", resolve_login)]:
+                    started = time.monotonic()
+                    failed = sum(1 for _ in range(iterations) if not path(login, PASSWORD))
+                    seconds = time.monotonic() - started
+                    self.stdout.write(
+                        f"{label:>8} / {name:<13} {iterations / seconds:8.2f} logins/s "
+                        f"({seconds / iterations * 1000:.1f} ms each, {failed} rejected)"
+                    )
+            transaction.set_rollback(True)
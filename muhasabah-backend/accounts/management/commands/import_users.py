@@ -0,0 +1,42 @@
+# accounts/management/commands/import_users.py
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.imports import CHUNK_SIZE, UserImportError, detect_format, import_file
+
+
+class Command(BaseCommand):
+    help = "Imports users from a CSV (with header) or JSON Lines file, validating every row first."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import (.csv or .jsonl).")
+        parser.add_argument("--format", choices=["csv", "jsonl"], help="Defaults to the file extension.")
+        parser.add_argument("--sitting", type=int, help="Add the users to this sitting as approved members.")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help=f"Rows per insert (default: {CHUNK_SIZE}).")
+        parser.add_argument("--dry-run", action="store_true", help="Validate only; write nothing.")
+
+    def handle(self, *args, **options):
+        fmt = options["format"] or detect_format(options["path"])
+        try:
+            with open(options["path"], encoding="utf-8-sig", newline="") as stream:
+                report = import_file(
+                    stream, fmt,
+                    sitting_id=options["sitting"],
+                    chunk_size=options["chunk_size"],
+                    dry_run=options["dry_run"],
+                )
+        except OSError as e:
+            raise CommandError(str(e))
+        except UserImportError as e:
+            for error in e.errors:
+                where = f"row {error['row']}" if error["row"] else "file"
+                self.stderr.write(f"{where}: {' '.join(error['errors'])}")
+            raise CommandError(f"Nothing imported: {e}.")
+
+        if options["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(f"{report['rows']} rows are valid."))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['created']} users ({report['memberships']} memberships, "
+            f"{report['checkins']} check-ins, {report['emails_queued']} emails queued) "
+            f"in {report['seconds']}s ({report.get('per_second', 0)} users/s)."
+        ))
@@ -0,0 +1,51 @@
+# accounts/middleware.py
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+
+from .authentication import CachedJWTAuthentication
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """
+    Channels middleware that authenticates WebSocket connections with the
+    same JWT access token the REST API uses. The token is read from the
+    `access_token` cookie set at login, or from a `?token=` query parameter.
+    """
+
+    def __init__(self, inner):
+        super().__init__(inner)
+        self.authenticator = CachedJWTAuthentication()
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope)
+        scope["user"] = await self.get_user(self.get_raw_token(scope))
+        return await super().__call__(scope, receive, send)
+
+    def get_raw_token(self, scope):
+        query = parse_qs(scope.get("query_string", b"").decode())
+        if query.get("token"):
+            return query["token"][0]
+
+        cookie_name = settings.SIMPLE_JWT.get("AUTH_COOKIE", "access_token")
+        for name, value in scope.get("headers", []):
+            if name == b"cookie":
+                cookies = SimpleCookie(value.decode())
+                if cookie_name in cookies:
+                    return cookies[cookie_name].value
+        return None
+
+    @database_sync_to_async
+    def get_user(self, raw_token):
+        if not raw_token:
+            return AnonymousUser()
+        try:
+            validated = self.authenticator.get_validated_token(raw_token)
+            return self.authenticator.get_user(validated)
+        except (AuthenticationFailed, InvalidToken, TokenError):
+            return AnonymousUser()
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 08:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_alter_user_created_at_alter_user_email_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='streak_date',
+            field=models.DateField(blank=True, null=True, verbose_name='streak last day'),
+        ),
+    ]
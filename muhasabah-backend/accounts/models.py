@@ -1,5 +1,8 @@
 # accounts/models.py
+from datetime import date, timedelta
+
 from django.db import models
+from django.db.models.functions import Upper
 from django.contrib.auth.models import AbstractUser
 from django.utils.translation import gettext_lazy as _
 from phonenumber_field.modelfields import PhoneNumberField  # pip install django-phonenumber-field[phonenumberslite]
@@ -22,6 +25,11 @@ class User(AbstractUser):
     is_verified = models.BooleanField(_("email verified"), default=False)
     whatsapp = PhoneNumberField(_("WhatsApp number"), blank=True, region="NG")
     streak = models.PositiveIntegerField(_("streak"), default=0)
+    streak_date = models.DateField(_("streak last day"), null=True, blank=True)
+    token_version = models.PositiveIntegerField(
+        _("token version"), default=0,
+        help_text=_("Bumped to revoke every JWT issued to this user."),
+    )
 
     created_at = models.DateTimeField(_("created at"), auto_now_add=True)
     updated_at = models.DateTimeField(_("updated at"), auto_now=True)
@@ -29,6 +37,12 @@ class User(AbstractUser):
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username"]  # Needed for AbstractUser
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Case-insensitive email lookups at login (email__iexact).
+            models.Index(Upper("email"), name="accounts_user_email_upper_idx"),
+        ]
+
     def __str__(self) -> str:
         return self.email
 
@@ -36,3 +50,13 @@ class User(AbstractUser):
     def full_name(self) -> str:
         """Return the user's full name or username if missing."""
         return f"{self.first_name} {self.last_name}".strip() or self.username
+
+    @property
+    def current_streak(self) -> int:
+        """
+        Consecutive fully completed days ending today or yesterday.
+        A run that ended before yesterday has been broken.
+        """
+        if self.streak_date and self.streak_date >= date.today() - timedelta(days=1):
+            return self.streak
+        return 0
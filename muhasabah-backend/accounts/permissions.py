@@ -1,6 +1,14 @@
 from rest_framework import permissions
 
 
+# Permission strings granted to each role, returned to the frontend.
+ROLE_PERMISSIONS = {
+    "student": ["dashboard.view", "checkins.submit", "todos.view"],
+    "sitting_head": ["dashboard.view", "sittings.manage_members", "checkins.review"],
+    "overall_head": ["dashboard.view", "sittings.manage_all", "system.admin"],
+}
+
+
 class IsRole(permissions.BasePermission):
     """
     Custom permission to allow access only to users with specific roles.
@@ -1,10 +1,21 @@
 # accounts/serializers.py
-from django.contrib.auth import authenticate
+import logging
+
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import update_last_login
+from django.contrib.auth.signals import user_login_failed
+from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 
+from .authentication import VERSION_CLAIM, CachedJWTAuthentication, cached_user
 from .models import User
+from .tokens import CachedBlacklistRefreshToken
+
+logger = logging.getLogger(__name__)
 
 
 # ------------------------------------------------------------------------------
@@ -46,26 +57,67 @@ class UserProfileSerializer(serializers.ModelSerializer):
 # CUSTOM LOGIN SERIALIZER (EMAIL OR USERNAME)
 # ------------------------------------------------------------------------------
 
+def resolve_login(login, password, request=None):
+    """
+    Returns the user matching `login` (username, or email in any case) when
+    `password` is correct and the account may log in, else None.
+
+    One indexed query loads the account and its password is hashed once.
+    `authenticate()` would walk every backend, costing a second hash and
+    more queries, so the ModelBackend checks are applied here and
+    user_login_failed is sent on failure, as `authenticate()` would.
+    Unknown logins still pay for one hash so response times do not reveal
+    which accounts exist.
+    """
+    if not login or not password:
+        return None
+
+    candidates = list(User.objects.filter(Q(username=login) | Q(email__iexact=login))[:2])
+    # A username match wins over another account's email.
+    by_username = [user for user in candidates if user.username == login]
+    if by_username:
+        user = by_username[0]
+    elif len(candidates) == 1:
+        user = candidates[0]
+    else:
+        if candidates:
+            logger.warning("Login %r matches the emails of several accounts; refusing it.", login)
+        user = None
+
+    if user is None:
+        User().set_password(password)
+    elif user.check_password(password) and ModelBackend().user_can_authenticate(user):
+        return user
+
+    user_login_failed.send(sender=__name__, credentials={User.USERNAME_FIELD: login}, request=request)
+    return None
+
+
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     """
     Custom serializer that allows login with either email OR username.
     """
+    token_class = CachedBlacklistRefreshToken
+
+    @classmethod
+    def get_token(cls, user):
+        # Claims read by accounts.authentication.CachedJWTAuthentication.
+        token = super().get_token(user)
+        token["ver"] = user.token_version
+        token["username"] = user.username
+        token["email"] = user.email
+        token["role"] = user.role
+        return token
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # The login may arrive as "email" (USERNAME_FIELD) or "username".
+        self.fields[self.username_field].required = False
+        self.fields["username"] = serializers.CharField(write_only=True, required=False)
 
     def validate(self, attrs):
-        login = attrs.get("username")  # could be username OR email
-        password = attrs.get("password")
-
-        # Try username first, then email
-        user = None
-        if login and password:
-            user = authenticate(self.context["request"], username=login, password=password)
-
-            if not user:
-                try:
-                    user_obj = User.objects.get(email__iexact=login)
-                    user = authenticate(self.context["request"], username=user_obj.username, password=password)
-                except User.DoesNotExist:
-                    pass
+        login = attrs.get(self.username_field) or attrs.get("username")  # could be username OR email
+        user = resolve_login(login, attrs.get("password"), self.context.get("request"))
 
         if not user:
             raise serializers.ValidationError({"detail": _("Invalid credentials. Please try again.")})
@@ -77,8 +129,11 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
             raise serializers.ValidationError({"detail": _("Please verify your email before logging in.")})
 
         # At this point, user is authenticated
-        attrs["username"] = user.username  # normalize so JWT uses username
-        data = super().validate(attrs)
+        self.user = user
+        refresh = self.get_token(user)
+        data = {"refresh": str(refresh), "access": str(refresh.access_token)}
+        if api_settings.UPDATE_LAST_LOGIN:
+            update_last_login(None, user)
 
         # Add extra user info to the response
         data["user"] = {
@@ -97,4 +152,25 @@ class LoginSerializer(serializers.Serializer):
     password = serializers.CharField(
         write_only=True,
         style={'input_type': 'password'}
-    )
\ No newline at end of file
+    )
+
+
+class CachedTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh without touching the database in the common case: the blacklist
+    check reads the cached revocation state and the user comes from the
+    authentication cache.
+    """
+    token_class = CachedBlacklistRefreshToken
+
+    def validate(self, attrs):
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            return super().validate(attrs)
+
+        refresh = self.token_class(attrs["refresh"])
+        authentication = CachedJWTAuthentication()
+        user = cached_user(authentication.user_id(refresh), refresh.get(VERSION_CLAIM, 0))
+        if user is None or not user.is_active:
+            raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+        authentication.check_user(user, refresh)
+        return {"access": str(refresh.access_token)}
@@ -0,0 +1,32 @@
+# accounts/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from .authentication import invalidate_cached_users
+from .models import User
+from .tokens import mark_revoked
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """
+    Drops the cached copy now and again after commit, so a request racing
+    the transaction cannot re-cache the old row.
+    """
+    user_id = instance.pk
+    invalidate_cached_users([user_id])
+    transaction.on_commit(lambda: invalidate_cached_users([user_id]))
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def cache_revocation(sender, instance, created, **kwargs):
+    """
+    Every blacklisting (CachedBlacklistRefreshToken, the stock
+    RefreshToken.blacklist(), the admin) reaches the revocation cache.
+    """
+    if created:
+        jti, exp = instance.token.jti, instance.token.expires_at.timestamp()
+        transaction.on_commit(lambda: mark_revoked(jti, exp))
@@ -0,0 +1,40 @@
+# accounts/tasks.py
+import logging
+import time
+
+from celery import shared_task
+from django.conf import settings
+from django.db.models import Max, Min
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def purge_expired_tokens():
+    """
+    Deletes expired OutstandingToken rows and their BlacklistedToken entries
+    in bounded id-range batches (run daily). Expired tokens are rejected on
+    their `exp` claim alone, so neither table needs to keep them.
+    """
+    started = time.monotonic()
+    batch_size = settings.TOKEN_PURGE_BATCH_SIZE
+    expired = OutstandingToken.objects.filter(expires_at__lt=timezone.now())
+    bounds = expired.aggregate(first=Min("id"), last=Max("id"))
+
+    report = {"outstanding": 0, "blacklisted": 0}
+    if bounds["first"] is not None:
+        start = bounds["first"]
+        while start <= bounds["last"]:
+            batch = expired.filter(id__gte=start, id__lt=start + batch_size)
+            report["blacklisted"] += BlacklistedToken.objects.filter(token__in=batch).delete()[0]
+            report["outstanding"] += batch.delete()[0]
+            start += batch_size
+
+    report["seconds"] = round(time.monotonic() - started, 3)
+    logger.info(
+        "Purged %(outstanding)s expired tokens (%(blacklisted)s blacklisted) in %(seconds)ss",
+        report,
+    )
+    return report
@@ -1,3 +1,316 @@
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth.signals import user_login_failed
+from django.core.cache import caches
+from django.db import connection
+from django.db.models import F
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from notification.models import OutboxMessage
+from sittings.models import Sitting, SittingMembership
+
+from . import tokens
+from .authentication import user_cache_key
+from .imports import UserImportError, import_file
+from .models import User
+from .serializers import CustomTokenObtainPairSerializer
+from .tasks import purge_expired_tokens
+from .throttling import HashThrottle, throttle_metrics
+
+
+def make_user(name, role="student", **extra):
+    return User.objects.create_user(
+        email=f"{name}@example.com", username=name, password="pass-1234", role=role, **extra
+    )
+
+
+class AccountEmailTests(TestCase):
+
+    def setUp(self):
+        caches["throttle"].clear()
+        patcher = mock.patch("notification.outbox._kick_dispatcher")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.user = make_user("amina")
+
+    def test_repeated_requests_queue_one_email_per_window(self):
+        for path in ["/api/accounts/resend-verification/", "/api/accounts/password-reset/"]:
+            caches["throttle"].clear()  # both endpoints share the per-account email budget
+            for _ in range(2):
+                self.assertEqual(self.client.post(path, {"email": self.user.email}).status_code, 200)
+
+        keys = list(OutboxMessage.objects.order_by("id").values_list("dedup_key", flat=True))
+        self.assertEqual(len(keys), 2)
+        self.assertTrue(keys[0].startswith(f"resend-verification:{self.user.pk}:"))
+        self.assertTrue(keys[1].startswith(f"password-reset:{self.user.pk}:"))
+
+    def test_a_new_window_sends_again(self):
+        path = "/api/accounts/password-reset/"
+        with mock.patch("accounts.views.time.time", return_value=1_000_000):
+            self.client.post(path, {"email": self.user.email})
+        with mock.patch("accounts.views.time.time", return_value=1_000_000 + 300):
+            self.client.post(path, {"email": self.user.email})
+        self.assertEqual(OutboxMessage.objects.count(), 2)
+
+
+class CachedAuthenticationTests(TestCase):
+
+    def setUp(self):
+        caches["auth"].clear()
+        self.user = make_user("amina")
+        self.client = APIClient()
+        self.login()
+
+    def login(self):
+        token = CustomTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def profile(self):
+        return self.client.get("/api/accounts/profile/")
+
+    def test_repeat_requests_skip_the_user_query(self):
+        self.assertEqual(self.profile().status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.profile().json()["username"], "amina")
+
+    def test_password_and_streak_are_not_cached(self):
+        self.profile()
+        cached = caches["auth"].get(user_cache_key(self.user.pk))
+        self.assertEqual(cached.get_deferred_fields(), {"password", "streak", "streak_date"})
+
+    def test_saving_the_user_drops_the_cached_copy(self):
+        self.profile()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.profile().status_code, 401)
+
+    def test_version_bump_revokes_older_tokens(self):
+        self.profile()
+        self.user.token_version += 1
+        self.user.save()
+        self.assertEqual(self.profile().status_code, 401)
+        self.login()
+        self.assertEqual(self.profile().status_code, 200)
+
+    def test_newer_token_reloads_a_stale_copy(self):
+        self.profile()
+        # A bulk update skips the save signal, so the cache still holds version 0.
+        User.objects.filter(pk=self.user.pk).update(token_version=F("token_version") + 1)
+        self.user.refresh_from_db()
+        self.login()
+        self.assertEqual(self.profile().status_code, 200)
+        self.assertEqual(caches["auth"].get(user_cache_key(self.user.pk)).token_version, 1)
+
+
+class LoginTests(TestCase):
+
+    def setUp(self):
+        caches["throttle"].clear()
+        self.user = make_user("amina", is_verified=True)
+        self.failures = []
+        handler = lambda **kwargs: self.failures.append(kwargs["credentials"])
+        user_login_failed.connect(handler)
+        self.addCleanup(user_login_failed.disconnect, handler)
+
+    def login(self, login, password="pass-1234"):
+        return APIClient().post("/api/accounts/token/", {"username": login, "password": password})
+
+    def test_username_or_email_in_any_case(self):
+        for login in ["amina", "Amina@Example.com"]:
+            response = self.login(login)
+            self.assertEqual(response.status_code, 200, login)
+            self.assertEqual(response.json()["detail"], "Login successful")
+        self.assertEqual(self.failures, [])
+
+    def test_the_account_is_loaded_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.login("amina").status_code, 200)
+        selects = [q["sql"] for q in queries if q["sql"].startswith("SELECT") and '"accounts_user"' in q["sql"]]
+        self.assertEqual(len(selects), 1)
+
+    def test_failures_send_user_login_failed(self):
+        User.objects.filter(username="amina").update(is_active=False)
+        for login, password in [("amina", "wrong"), ("nobody", "pass-1234"), ("amina", "pass-1234")]:
+            self.assertEqual(self.login(login, password).status_code, 400)
+        self.assertEqual(self.failures, [{"email": "amina"}, {"email": "nobody"}, {"email": "amina"}])
+
+
+class RefreshRevocationTests(TestCase):
+
+    def setUp(self):
+        caches["shared"].clear()
+        tokens._local.clear()
+        self.user = make_user("amina")
+        self.refresh = CustomTokenObtainPairSerializer.get_token(self.user)
+        self.client = APIClient()
+
+    def refresh_status(self):
+        return self.client.post("/api/accounts/token/refresh/", {"refresh": str(self.refresh)}).status_code
+
+    def forget(self):
+        """Simulates another process: nothing cached anywhere."""
+        caches["shared"].clear()
+        tokens._local.clear()
+
+    def test_logout_revokes_the_refresh_token(self):
+        self.assertEqual(self.refresh_status(), 200)
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/accounts/logout/", {"refresh": str(self.refresh)})
+        self.assertEqual(response.status_code, 205)
+        self.assertEqual(self.refresh_status(), 401)
+
+    def test_stock_blacklist_reaches_the_cache(self):
+        self.assertEqual(self.refresh_status(), 200)  # caches "not revoked"
+        with self.captureOnCommitCallbacks(execute=True):
+            RefreshToken(str(self.refresh)).blacklist()
+        tokens._local.clear()
+        self.assertEqual(self.refresh_status(), 401)
+
+    def test_cache_miss_falls_back_to_the_blacklist_table(self):
+        RefreshToken(str(self.refresh)).blacklist()  # on-commit hook never runs
+        self.forget()
+        self.assertEqual(self.refresh_status(), 401)
+        with self.assertNumQueries(0):
+            self.assertTrue(tokens.is_revoked(self.refresh["jti"], self.refresh["exp"]))
+
+    def test_purge_removes_expired_tokens_only(self):
+        RefreshToken(str(self.refresh)).blacklist()
+        expired = CustomTokenObtainPairSerializer.get_token(self.user)
+        OutstandingToken.objects.filter(jti=expired["jti"]).update(expires_at=timezone.now() - timedelta(days=1))
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=expired["jti"]))
+
+        report = purge_expired_tokens()
+        self.assertEqual((report["outstanding"], report["blacklisted"]), (1, 1))
+        self.assertEqual(list(OutstandingToken.objects.values_list("jti", flat=True)), [self.refresh["jti"]])
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+
+
+class ThrottleTests(TestCase):
+
+    def setUp(self):
+        for alias in ("throttle", "shared"):
+            caches[alias].clear()
+        patcher = mock.patch("notification.outbox._kick_dispatcher")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def reset(self, email, ip="10.0.0.1"):
+        return APIClient(REMOTE_ADDR=ip).post("/api/accounts/password-reset/", {"email": email})
+
+    def test_account_budget_spans_ips(self):
+        for i in range(3):
+            self.assertEqual(self.reset("amina@example.com", ip=f"10.0.0.{i}").status_code, 200)
+        response = self.reset("Amina@Example.com ", ip="10.0.0.9")
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+        self.assertEqual(self.reset("bilal@example.com", ip="10.0.0.9").status_code, 200)
+
+    def test_refused_requests_are_not_charged_to_other_budgets(self):
+        for _ in range(3):
+            self.reset("amina@example.com")
+        for _ in range(5):
+            self.assertEqual(self.reset("amina@example.com").status_code, 429)
+        # 3 of the IP's 10 used; the refused requests took none.
+        for i in range(7):
+            self.assertEqual(self.reset(f"student{i}@example.com").status_code, 200)
+        self.assertEqual(self.reset("bilal@example.com").status_code, 429)
+
+    def test_metrics_outlive_the_throttle_cache(self):
+        for _ in range(4):
+            self.reset("amina@example.com")
+        caches["throttle"].clear()
+        metrics = throttle_metrics()
+        self.assertEqual(metrics["email_account"], {"rate": "3/hour", "allowed": 3, "throttled": 1})
+        self.assertEqual(metrics["email_ip"]["allowed"], 3)
+
+    def test_non_mapping_bodies_are_keyed_by_ip_only(self):
+        request = SimpleNamespace(data=["amina"], META={"REMOTE_ADDR": "10.0.0.1"})
+        throttle = HashThrottle()
+        self.assertIsNone(throttle.get_account(request))
+        for _ in range(30):
+            self.assertTrue(throttle.allow_request(request, None))
+        self.assertFalse(throttle.allow_request(request, None))
+        self.assertEqual(throttle_metrics()["hash_account"]["allowed"], 0)
+
+
+class UserImportTests(TestCase):
+    csv = (
+        "email,username,role,whatsapp\n"
+        "amina@example.com,amina,,08031234567\n"
+        "bilal@example.com,bilal,sitting_head,\n"
+    )
+
+    def setUp(self):
+        self.head = make_user("head", role="sitting_head")
+        self.sitting = Sitting.objects.create(
+            name="Fajr", location="Hall", sitting_head=self.head,
+            day_of_week="Monday", max_members=3, status="active",
+        )
+
+    def errors(self, data, fmt="csv", **kwargs):
+        with self.assertRaises(UserImportError) as raised:
+            import_file(data.encode(), fmt, **kwargs)
+        return raised.exception.errors
+
+    def test_csv_import_joins_the_sitting_and_queues_welcome_emails(self):
+        report = import_file(self.csv.encode(), "csv", sitting_id=self.sitting.pk)
+        self.assertEqual((report["created"], report["memberships"], report["emails_queued"]), (2, 2, 2))
+
+        amina = User.objects.get(username="amina")
+        self.assertEqual((amina.role, str(amina.whatsapp)), ("student", "+2348031234567"))
+        self.assertFalse(amina.has_usable_password())
+        self.assertEqual(SittingMembership.objects.filter(sitting=self.sitting, status="approved").count(), 2)
+        self.assertEqual(Sitting.objects.get(pk=self.sitting.pk).approved_count, 2)
+        self.assertEqual(OutboxMessage.objects.get(recipient="amina@example.com").dedup_key, f"verify-email:{amina.pk}")
+
+    def test_any_invalid_row_imports_nothing(self):
+        errors = self.errors(
+            "email,username,role\n"
+            "not-an-email,amina,\n"
+            "HEAD@example.com,new,\n"
+            "ok@example.com,bad name!,wizard\n"
+            "ok@example.com,head,\n"
+        )
+        self.assertEqual([e["row"] for e in errors], [1, 2, 3, 4])
+        self.assertEqual(errors[0]["errors"], ["email: Enter a valid email address."])
+        self.assertEqual(errors[1]["errors"], ["Email already registered."])
+        self.assertIn("Unknown role 'wizard'.", errors[2]["errors"])
+        self.assertEqual(errors[3]["errors"], ["Duplicate email in file.", "Username already taken."])
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_jsonl_rejects_lines_that_are_not_objects(self):
+        errors = self.errors('{"email": "amina@example.com", "username": "amina"}\n[1, 2]\n{oops\n', fmt="jsonl")
+        self.assertEqual(errors, [
+            {"row": 2, "errors": ["Each line must be a JSON object."]},
+            {"row": 3, "errors": ["Invalid JSON: Expecting property name enclosed in double quotes."]},
+        ])
+
+    def test_sitting_capacity_and_dry_run(self):
+        Sitting.objects.filter(pk=self.sitting.pk).update(approved_count=2)
+        errors = self.errors(self.csv, sitting_id=self.sitting.pk)
+        self.assertEqual(errors[0]["errors"], ["Sitting 'Fajr' has room for 1 more members."])
+
+        report = import_file(self.csv.encode(), "csv", dry_run=True)
+        self.assertEqual((report["rows"], report["created"]), (2, 0))
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_endpoint_is_admin_only(self):
+        client = APIClient()
+        client.force_authenticate(self.head)
+        upload = SimpleUploadedFile("users.csv", self.csv.encode())
+        self.assertEqual(client.post("/api/accounts/import/", {"file": upload}).status_code, 403)
 
-# Create your tests here.
+        client.force_authenticate(make_user("admin", is_staff=True))
+        upload = SimpleUploadedFile("users.csv", self.csv.encode())
+        response = client.post("/api/accounts/import/", {"file": upload, "dry_run": "true"})
+        self.assertEqual((response.status_code, response.json()["rows"]), (200, 2))
@@ -0,0 +1,154 @@
+# accounts/throttling.py
+"""
+Fixed-window throttles for the authentication endpoints.
+
+Each budget in AUTH_THROTTLE_RATES allows `count` requests per fixed
+window of the period, counted per client IP or per account (the submitted
+email/username) with atomic `cache.incr` calls in the "throttle" cache.
+Password-hashing endpoints draw on the "hash" budgets, mail-sending
+endpoints on the "email" budgets and sign-up on both (per account only for
+mail). Allowed and throttled requests are counted per budget in the
+"shared" cache, so `throttle_metrics` reports every worker's traffic.
+
+The limits only hold across workers when THROTTLE_REDIS_URL points the
+"throttle" cache at Redis; the local-memory fallback counts per process,
+so N workers allow N times the configured rate.
+"""
+import hashlib
+import time
+from collections.abc import Mapping
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+METRIC_KEY = "throttle:metrics:{scope}:{outcome}"
+
+
+def throttle_cache():
+    return caches["throttle"]
+
+
+def parse_rate(rate):
+    """'10/min' -> (10, 60)."""
+    count, period = rate.split("/")
+    seconds = {"s": 1, "m": 60, "h": 3600, "d": 86400}[period[0]]
+    return int(count), seconds
+
+
+def metrics_cache():
+    return caches["shared"]
+
+
+def record(scope, outcome):
+    key = METRIC_KEY.format(scope=scope, outcome=outcome)
+    cache = metrics_cache()
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, None)
+
+
+def throttle_metrics():
+    """Allowed/throttled counts per budget, with the configured rate."""
+    scopes = settings.AUTH_THROTTLE_RATES
+    keys = {
+        (scope, outcome): METRIC_KEY.format(scope=scope, outcome=outcome)
+        for scope in scopes for outcome in ("allowed", "throttled")
+    }
+    values = metrics_cache().get_many(keys.values())
+    return {
+        scope: {
+            "rate": rate,
+            "allowed": values.get(keys[scope, "allowed"], 0),
+            "throttled": values.get(keys[scope, "throttled"], 0),
+        }
+        for scope, rate in scopes.items()
+    }
+
+
+class BudgetThrottle(BaseThrottle):
+    """
+    Draws one request from each budget in `scopes`, all or nothing: a
+    request refused by one budget is not charged to the others. Scopes
+    ending in "_account" are keyed by the submitted login, the rest by IP;
+    requests without a login only draw on the IP budgets.
+    """
+    scopes = ()
+
+    def allow_request(self, request, view):
+        now = time.time()
+        cache = throttle_cache()
+        budgets = []
+        for scope in self.scopes:
+            ident = self.get_account(request) if scope.endswith("_account") else self.get_ident(request)
+            if ident is None:
+                continue
+            limit, period = parse_rate(settings.AUTH_THROTTLE_RATES[scope])
+            window = int(now // period)
+            budgets.append((scope, f"throttle:{scope}:{ident}:{window}", limit, (window + 1) * period - now, period))
+
+        counts = cache.get_many([key for _, key, _, _, _ in budgets])
+        spent = [budget for budget in budgets if counts.get(budget[1], 0) >= budget[2]]
+        if not spent:
+            charged = []
+            for budget in budgets:
+                scope, key, limit, _, period = budget
+                cache.add(key, 0, period)
+                try:
+                    count = cache.incr(key)
+                except ValueError:  # expired between add() and incr()
+                    cache.add(key, 1, period)
+                    count = 1
+                charged.append(key)
+                if count > limit:
+                    spent.append(budget)
+                    break
+            if spent:
+                # Lost a race for the last slot: give back what this request took.
+                for key in charged:
+                    try:
+                        cache.decr(key)
+                    except ValueError:
+                        pass
+
+        if spent:
+            self.wait_seconds = max(remaining for _, _, _, remaining, _ in spent)
+            for scope, *_ in spent:
+                record(scope, "throttled")
+            return False
+
+        for scope, *_ in budgets:
+            record(scope, "allowed")
+        return True
+
+    def get_account(self, request):
+        data = request.data
+        if not isinstance(data, Mapping):
+            return None
+        login = data.get("email") or data.get("username")
+        if not login or not isinstance(login, str):
+            return None
+        return hashlib.sha256(login.strip().lower().encode()).hexdigest()
+
+    def wait(self):
+        return getattr(self, "wait_seconds", None)
+
+
+class HashThrottle(BudgetThrottle):
+    scopes = ("hash_ip", "hash_account")
+
+
+class EmailThrottle(BudgetThrottle):
+    scopes = ("email_ip", "email_account")
+
+
+class RegisterThrottle(BudgetThrottle):
+    # Per-IP mail budgets would lock out whole campus NATs at sign-up.
+    scopes = ("hash_ip", "hash_account", "email_account")
+
+
+HASHING_THROTTLES = [HashThrottle]
+EMAIL_THROTTLES = [EmailThrottle]
+REGISTER_THROTTLES = [RegisterThrottle]
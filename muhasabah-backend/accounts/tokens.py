@@ -0,0 +1,68 @@
+# accounts/tokens.py
+"""
+Refresh tokens whose blacklist check is served from the cache.
+
+Each refresh token's revocation state lives in the "shared" cache alias,
+so every web worker and Celery process sees the same answer. A miss falls
+back to one BlacklistedToken lookup whose result is cached until the token
+expires, so an evicted entry is re-read rather than trusted as "not
+revoked". Every new BlacklistedToken row (this class, the stock
+`RefreshToken.blacklist()`, the admin) overwrites the entry through
+accounts.signals. Revocations this process has seen are also remembered
+in-process, since they never change before the token expires.
+"""
+import threading
+import time
+
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+cache = caches["shared"]
+
+_local = {}  # jti -> exp (epoch seconds), for tokens known to be revoked
+_local_lock = threading.Lock()
+
+
+def revoked_key(jti):
+    return f"auth:revoked:{jti}"
+
+
+def _ttl(exp):
+    return max(int(exp - time.time()), 1)
+
+
+def mark_revoked(jti, exp):
+    cache.set(revoked_key(jti), True, _ttl(exp))
+    with _local_lock:
+        _local[jti] = exp
+
+
+def is_revoked(jti, exp):
+    with _local_lock:
+        known = _local.get(jti)
+    if known is not None:
+        if known > time.time():
+            return True
+        with _local_lock:
+            _local.pop(jti, None)
+
+    revoked = cache.get(revoked_key(jti))
+    if revoked is None:
+        revoked = BlacklistedToken.objects.filter(token__jti=jti).exists()
+        # add(), not set(): a revocation written meanwhile must win.
+        cache.add(revoked_key(jti), revoked, _ttl(exp))
+    if revoked:
+        with _local_lock:
+            _local[jti] = exp
+    return revoked
+
+
+class CachedBlacklistRefreshToken(RefreshToken):
+
+    def check_blacklist(self):
+        if is_revoked(self.payload[api_settings.JTI_CLAIM], self.payload["exp"]):
+            raise TokenError(_("Token is blacklisted"))
@@ -1,6 +1,5 @@
 # accounts/urls.py
 from django.urls import path
-from rest_framework_simplejwt.views import TokenRefreshView
 from .views import CookieTokenObtainPairView
 from .views import (
     RegisterView,
@@ -11,6 +10,9 @@ from .views import (
     LogoutView,
     UserProfileView,
     UserPermissionsView,
+    CachedTokenRefreshView,
+    ThrottleMetricsView,
+    UserImportView,
     CookieTokenObtainPairView,   # Optional: if you have a separate cookie login endpoint
 )
 
@@ -22,7 +24,7 @@ urlpatterns = [
 
     # 🔑 Authentication (Cookie & JWT)
     path("token/", CookieTokenObtainPairView.as_view(), name="token_obtain_pair"),
-    path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    path("token/refresh/", CachedTokenRefreshView.as_view(), name="token_refresh"),
     path("cookie-token/", CookieTokenObtainPairView.as_view(), name="cookie_token"),  # Optional
 
     # 🔁 Password Reset
@@ -39,4 +41,10 @@ urlpatterns = [
     # 👤 User Profile & Permissions
     path("profile/", UserProfileView.as_view(), name="user_profile"),
     path("permissions/", UserPermissionsView.as_view(), name="user_permissions"),
+
+    # 📥 Bulk onboarding (staff only)
+    path("import/", UserImportView.as_view(), name="user_import"),
+
+    # 📈 Throttle metrics (staff only)
+    path("throttle-metrics/", ThrottleMetricsView.as_view(), name="throttle_metrics"),
 ]
@@ -1,29 +1,45 @@
 # accounts/views.py
 from django.conf import settings
-from django.core.mail import send_mail
 from django.contrib.auth.tokens import default_token_generator
 from django.contrib.auth.hashers import make_password
+from django.db import transaction
 from django.utils.encoding import force_bytes, force_str
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 
 from rest_framework import generics, viewsets
 from rest_framework.views import APIView
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.status import HTTP_200_OK, HTTP_400_BAD_REQUEST, HTTP_205_RESET_CONTENT
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from rest_framework_simplejwt.tokens import RefreshToken
 
+from navigation.cache import etag_response, role_bundle
+from notification.outbox import enqueue_email
 from .models import User
 from .serializers import (
     UserSerializer,
     RegisterSerializer,
     UserProfileSerializer,
     CustomTokenObtainPairSerializer,
+    CachedTokenRefreshSerializer,
 )
+from .imports import UserImportError, detect_format, import_file
+from .throttling import EMAIL_THROTTLES, HASHING_THROTTLES, REGISTER_THROTTLES, throttle_metrics
+from .tokens import CachedBlacklistRefreshToken
 
 import datetime
+import time
+
+# Repeat requests for the same user within this many seconds share a dedup
+# key, so double submits and client retries queue one email.
+EMAIL_DEDUP_WINDOW = 300
+
+
+def windowed_key(prefix, user):
+    return f"{prefix}:{user.pk}:{int(time.time() // EMAIL_DEDUP_WINDOW)}"
+
 
 # -------------------------------------------------------------------------------
 # USER MANAGEMENT (Admin / Profile)
@@ -45,27 +61,27 @@ class UserProfileView(APIView):
 class UserPermissionsView(APIView):
     permission_classes = [IsAuthenticated]
 
-    PERMISSIONS_MAP = {
-        "student": ["dashboard.view", "checkins.submit", "todos.view"],
-        "sitting_head": ["dashboard.view", "sittings.manage_members", "checkins.review"],
-        "overall_head": ["dashboard.view", "sittings.manage_all", "system.admin"],
-    }
-
     def get(self, request):
         role = getattr(request.user, "role", "student")
-        permissions = self.PERMISSIONS_MAP.get(role, [])
-        return Response({"role": role, "permissions": permissions})
+        version, bundle = role_bundle(role)
+        return etag_response(
+            request, version, role, {"role": role, "permissions": bundle["permissions"]}
+        )
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def me(request):
-    return Response({
-        "id": request.user.id,
-        "email": request.user.email,
-        "username": request.user.username,
-        "role": request.user.role,
-    })
+    return Response(me_data(request.user))
+
+
+def me_data(user):
+    return {
+        "id": user.id,
+        "email": user.email,
+        "username": user.username,
+        "role": user.role,
+    }
 
 
 # -------------------------------------------------------------------------------
@@ -75,18 +91,20 @@ def me(request):
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = RegisterSerializer
+    throttle_classes = REGISTER_THROTTLES
 
+    @transaction.atomic
     def perform_create(self, serializer):
         user = serializer.save()
         uid = urlsafe_base64_encode(force_bytes(user.pk))
         token = default_token_generator.make_token(user)
         activation_link = f"{settings.FRONTEND_URL}/verify-email/{uid}/{token}/"
 
-        send_mail(
+        enqueue_email(
+            user.email,
             subject="Verify your email - Muhasabah App",
-            message=f"Click this link to verify your email: {activation_link}",
-            from_email=settings.EMAIL_HOST_USER,
-            recipient_list=[user.email],
+            body=f"Click this link to verify your email: {activation_link}",
+            dedup_key=f"verify-email:{user.pk}",
         )
 
 
@@ -108,6 +126,8 @@ class VerifyEmailView(APIView):
 
 
 class ResendVerificationEmailView(generics.GenericAPIView):
+    throttle_classes = EMAIL_THROTTLES
+
     def post(self, request):
         email = request.data.get("email")
         user = User.objects.filter(email=email).first()
@@ -117,12 +137,11 @@ class ResendVerificationEmailView(generics.GenericAPIView):
             token = default_token_generator.make_token(user)
             verification_link = f"{settings.FRONTEND_URL}/verify-email/{uid}/{token}/"
 
-            send_mail(
+            enqueue_email(
+                user.email,
                 subject="Resend Email Verification",
-                message=f"Assalaam alaykum {user.username},\n\nVerify your email: {verification_link}",
-                from_email=settings.EMAIL_HOST_USER,
-                recipient_list=[user.email],
-                fail_silently=True,
+                body=f"Assalaam alaykum {user.username},\n\nVerify your email: {verification_link}",
+                dedup_key=windowed_key("resend-verification", user),
             )
 
         return Response({
@@ -135,6 +154,8 @@ class ResendVerificationEmailView(generics.GenericAPIView):
 # -------------------------------------------------------------------------------
 
 class PasswordResetRequestView(generics.GenericAPIView):
+    throttle_classes = EMAIL_THROTTLES
+
     def post(self, request):
         email = request.data.get("email")
         user = User.objects.filter(email=email).first()
@@ -144,12 +165,11 @@ class PasswordResetRequestView(generics.GenericAPIView):
             token = default_token_generator.make_token(user)
             reset_link = f"{settings.FRONTEND_URL}/reset-password-confirm/{uid}/{token}/"
 
-            send_mail(
+            enqueue_email(
+                user.email,
                 subject="Reset Your Password",
-                message=f"Click the link below to reset your password:\n{reset_link}",
-                from_email=settings.EMAIL_HOST_USER,
-                recipient_list=[user.email],
-                fail_silently=True,
+                body=f"Click the link below to reset your password:\n{reset_link}",
+                dedup_key=windowed_key("password-reset", user),
             )
 
         return Response({
@@ -168,6 +188,7 @@ class PasswordResetConfirmView(generics.GenericAPIView):
 
             password = request.data.get("password")
             user.password = make_password(password)
+            user.token_version += 1  # revoke tokens issued before the reset
             user.save()
 
             return Response({"detail": "Password reset successful."})
@@ -182,6 +203,7 @@ class PasswordResetConfirmView(generics.GenericAPIView):
 
 class CookieTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_classes = HASHING_THROTTLES
 
     def post(self, request, *args, **kwargs):
         data = request.data.copy()
@@ -220,6 +242,48 @@ class CookieTokenObtainPairView(TokenObtainPairView):
         return response
 
 
+class UserImportView(APIView):
+    """
+    POST a CSV or JSONL file as `file` (multipart). Optional fields:
+    `format` (csv/jsonl), `sitting` (id to join as approved members),
+    `dry_run` (validate only). Returns the import report, or 400 with
+    every invalid row and nothing imported.
+    """
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"detail": "Upload a file in the 'file' field."}, status=HTTP_400_BAD_REQUEST)
+
+        sitting = request.data.get("sitting")
+        try:
+            report = import_file(
+                upload.read(),
+                request.data.get("format") or detect_format(upload.name),
+                sitting_id=int(sitting) if sitting else None,
+                dry_run=str(request.data.get("dry_run", "")).lower() in ("1", "true"),
+            )
+        except UserImportError as e:
+            return Response({"detail": str(e), "errors": e.errors}, status=HTTP_400_BAD_REQUEST)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=HTTP_400_BAD_REQUEST)
+        return Response(report)
+
+
+class ThrottleMetricsView(APIView):
+    """Allowed/throttled request counts per auth throttle budget."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(throttle_metrics())
+
+
+class CachedTokenRefreshView(TokenRefreshView):
+    serializer_class = CachedTokenRefreshSerializer
+
+
 # -------------------------------------------------------------------------------
 # LOGOUT
 # -------------------------------------------------------------------------------
@@ -230,7 +294,7 @@ class LogoutView(APIView):
     def post(self, request):
         try:
             refresh_token = request.data.get("refresh")
-            token = RefreshToken(refresh_token)
+            token = CachedBlacklistRefreshToken(refresh_token)
             token.blacklist()
             return Response(status=HTTP_205_RESET_CONTENT)
         except Exception:
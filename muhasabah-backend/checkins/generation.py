@@ -0,0 +1,182 @@
+# checkins/generation.py
+"""
+Set-based generation of DailyCheckIn rows from DefaultToDo and PersonalToDo.
+
+Users are processed in id-ordered chunks. For each chunk the rows are built
+in memory from two queries (approved memberships and personal todos) and
+inserted with ON CONFLICT DO NOTHING on the (user, date, todo_item) key, so
+re-running a day only fills in what is missing.
+
+With CHECKINS_LAZY_MATERIALIZATION enabled the midnight job skips users
+entirely and `materialize_checkins` creates a user's rows the first time
+they (or a dashboard aggregating them) read that day's check-ins.
+"""
+import logging
+import time
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Q
+
+from accounts.models import User
+from sittings.models import SittingMembership
+from todos.models import DefaultToDo, PersonalToDo
+from .models import CheckInGenerationShard, DailyCheckIn
+from .rollups import approved_sitting_ids, refresh_progress, refresh_sitting_progress
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1000
+MATERIALIZED_TIMEOUT = 60 * 60 * 24
+
+
+def eligible_users():
+    """
+    Users who get check-ins: approved sitting members (default todos, active
+    or not) and active users (personal todos).
+    """
+    approved = SittingMembership.objects.filter(student=OuterRef("pk"), status="approved")
+    return User.objects.filter(Q(is_active=True) | Exists(approved))
+
+
+def default_titles():
+    return list(DefaultToDo.objects.order_by("order").values_list("title", flat=True))
+
+
+def checkin_items(user_ids, defaults):
+    """
+    Returns the (user_id, todo title) pairs `user_ids` get check-ins for:
+    every default todo for approved sitting members, plus each active
+    user's personal todos.
+    """
+    approved = SittingMembership.objects.filter(
+        student_id__in=user_ids, status="approved"
+    ).values_list("student_id", flat=True)
+    personal = PersonalToDo.objects.filter(
+        user_id__in=user_ids, user__is_active=True
+    ).values_list("user_id", "title")
+
+    items = {(user_id, title) for user_id in approved for title in defaults}
+    items.update(personal)
+    return items
+
+
+def build_checkins(user_ids, day, defaults):
+    """Returns the unsaved DailyCheckIn rows `user_ids` should have on `day`."""
+    return [
+        DailyCheckIn(user_id=user_id, date=day, todo_item=title, is_completed=False)
+        for user_id, title in checkin_items(user_ids, defaults)
+    ]
+
+
+def insert_checkins(user_ids, day, defaults=None):
+    """
+    Upserts `day`'s check-ins for `user_ids` and refreshes their rollups.
+    Returns the number of rows created.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return 0
+    if defaults is None:
+        defaults = default_titles()
+
+    existing = DailyCheckIn.objects.filter(user_id__in=user_ids, date=day).count()
+    DailyCheckIn.objects.bulk_create(
+        build_checkins(user_ids, day, defaults),
+        batch_size=CHUNK_SIZE,
+        ignore_conflicts=True,
+    )
+    created = DailyCheckIn.objects.filter(user_id__in=user_ids, date=day).count() - existing
+
+    # bulk_create skips model signals, so keep the rollups in step here.
+    refresh_progress(user_ids, day, refresh_sittings=False)
+    return created
+
+
+def materialize_checkins(user_ids, day=None):
+    """
+    Lazy mode only: creates `day`'s (default: today) check-ins for those
+    `user_ids` not yet materialized, in one upsert. A per-user cache marker
+    keeps repeat reads to a single cache round-trip.
+    Returns the number of rows created.
+    """
+    day = day or date.today()
+    if not settings.CHECKINS_LAZY_MATERIALIZATION or day != date.today():
+        return 0
+
+    keys = {user_id: f"checkins:materialized:{day.isoformat()}:{user_id}" for user_id in user_ids}
+    marked = cache.get_many(list(keys.values()))
+    missing = [user_id for user_id, key in keys.items() if key not in marked]
+    if not missing:
+        return 0
+
+    created = insert_checkins(missing, day)
+    if created:
+        refresh_sitting_progress(approved_sitting_ids(missing), day)
+    cache.set_many({keys[user_id]: True for user_id in missing}, MATERIALIZED_TIMEOUT)
+    return created
+
+
+def generate_checkins(day, users=None, chunk_size=CHUNK_SIZE, refresh_sittings=True):
+    """
+    Generates `day`'s check-ins for `users` (default: `eligible_users()`),
+    streaming them in id-ordered chunks so memory stays bounded.
+    Returns a report of users processed, rows created and time taken.
+    """
+    started = time.monotonic()
+    if users is None:
+        users = eligible_users()
+    users = users.order_by("id").values_list("id", flat=True)
+    defaults = default_titles()
+
+    processed = created = 0
+    sitting_ids = set()
+    last_id = 0
+    while True:
+        chunk = list(users.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            break
+        created += insert_checkins(chunk, day, defaults)
+        sitting_ids |= approved_sitting_ids(chunk)
+        processed += len(chunk)
+        last_id = chunk[-1]
+
+    if refresh_sittings:
+        refresh_sitting_progress(sitting_ids, day)
+
+    report = {
+        "date": day.isoformat(),
+        "users": processed,
+        "rows_created": created,
+        "seconds": round(time.monotonic() - started, 3),
+    }
+    logger.info(
+        "Generated check-ins for %(date)s: %(rows_created)s rows for %(users)s users in %(seconds)ss",
+        report,
+    )
+    return report
+
+
+def plan_shards(run, shard_size):
+    """
+    Splits the eligible users into consecutive id ranges of about `shard_size`
+    users and records them as pending shards of `run`.
+    """
+    ids = eligible_users().order_by("id").values_list("id", flat=True)
+
+    shards = []
+    last_id = 0
+    while True:
+        first = ids.filter(id__gt=last_id).first()
+        if first is None:
+            break
+        last = ids.filter(id__gt=last_id)[shard_size - 1:shard_size].first()
+        if last is None:
+            last = ids.last()
+        shards.append(CheckInGenerationShard(
+            run=run, index=len(shards), first_user_id=first, last_user_id=last
+        ))
+        last_id = last
+
+    return CheckInGenerationShard.objects.bulk_create(shards)
@@ -0,0 +1,26 @@
+# checkins/management/commands/rebuild_progress_rollups.py
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from checkins.rollups import rebuild_progress
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the DailyProgress / SittingDailyProgress rollups from raw check-ins."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=30, help="Rebuild the last N days (default: 30).")
+        parser.add_argument("--from", dest="start", type=date.fromisoformat, help="First day (YYYY-MM-DD).")
+        parser.add_argument("--to", dest="end", type=date.fromisoformat, help="Last day (YYYY-MM-DD).")
+
+    def handle(self, *args, **options):
+        end = options["end"] or date.today()
+        start = options["start"] or end - timedelta(days=options["days"] - 1)
+        if start > end:
+            raise CommandError("--from must not be after --to.")
+
+        user_rows, sitting_rows = rebuild_progress(start, end)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt rollups for {start} → {end}: {user_rows} user rows, {sitting_rows} sitting rows."
+        ))
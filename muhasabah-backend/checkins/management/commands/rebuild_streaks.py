@@ -0,0 +1,15 @@
+# checkins/management/commands/rebuild_streaks.py
+from django.core.management.base import BaseCommand
+
+from checkins.streaks import rebuild_streaks
+
+
+class Command(BaseCommand):
+    help = "Recomputes every user's streak from DailyCheckIn in one set-based pass."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, action="append", dest="user_ids", help="Only rebuild this user id (repeatable).")
+
+    def handle(self, *args, **options):
+        updated = rebuild_streaks(user_ids=options["user_ids"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt streaks: {updated} users with an active streak."))
@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-18 09:06
+
+from django.db import migrations, models
+from django.db.models import Q
+
+
+def mark_planned(apps, schema_editor):
+    CheckInGenerationRun = apps.get_model('checkins', 'CheckInGenerationRun')
+    CheckInGenerationRun.objects.filter(
+        Q(status='completed') | Q(shards__isnull=False)
+    ).update(planned=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checkins', '0003_checkingenerationrun_checkingenerationshard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='checkingenerationrun',
+            name='dispatched_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='checkingenerationrun',
+            name='planned',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_planned, migrations.RunPython.noop),
+    ]
@@ -25,3 +25,112 @@ class DailyCheckIn(models.Model):
 
     def __str__(self):
         return f"{self.user.email} | {self.date} | {'✅' if self.is_completed else '❌'}"
+
+
+class DailyProgress(models.Model):
+    """
+    Per-user, per-day rollup of DailyCheckIn rows (total and completed).
+    Kept in sync by checkins.rollups whenever a check-in changes.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_progress')
+    date = models.DateField()
+    total = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('user', 'date')
+        ordering = ['-date']
+        verbose_name = 'Daily Progress'
+        verbose_name_plural = 'Daily Progress'
+
+    def __str__(self):
+        return f"{self.user_id} | {self.date} | {self.completed}/{self.total}"
+
+    @property
+    def progress_percent(self):
+        return (self.completed / self.total * 100) if self.total else 0
+
+
+class SittingDailyProgress(models.Model):
+    """
+    Per-sitting, per-day rollup built from the DailyProgress rows of the
+    sitting's approved members. `progress_sum` is the sum of each member's
+    completion percentage, so members without check-ins count as 0%.
+    """
+    sitting = models.ForeignKey('sittings.Sitting', on_delete=models.CASCADE, related_name='daily_progress')
+    date = models.DateField()
+    members = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    progress_sum = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('sitting', 'date')
+        ordering = ['-date']
+        verbose_name = 'Sitting Daily Progress'
+        verbose_name_plural = 'Sitting Daily Progress'
+
+    def __str__(self):
+        return f"{self.sitting_id} | {self.date} | {self.average_progress:.1f}%"
+
+    @property
+    def average_progress(self):
+        return self.progress_sum / self.members if self.members else 0
+
+
+class CheckInGenerationRun(models.Model):
+    """
+    One midnight check-in generation run per day. The unique date makes the
+    run idempotent; its shards record which user ranges are finished so a
+    crashed run can resume. `planned` is set in the same transaction that
+    creates the shards; `dispatched_at` stops duplicate firings from fanning
+    the same shards out twice.
+    """
+    STATUS_CHOICES = (
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+    )
+
+    date = models.DateField(unique=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='running')
+    users = models.PositiveIntegerField(default=0)
+    rows_created = models.PositiveIntegerField(default=0)
+    planned = models.BooleanField(default=False)
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"Check-in run {self.date} ({self.status})"
+
+
+class CheckInGenerationShard(models.Model):
+    """
+    Checkpoint for one id range of users (inclusive) within a generation run.
+    """
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+    )
+
+    run = models.ForeignKey(CheckInGenerationRun, on_delete=models.CASCADE, related_name='shards')
+    index = models.PositiveIntegerField()
+    first_user_id = models.PositiveBigIntegerField()
+    last_user_id = models.PositiveBigIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    users = models.PositiveIntegerField(default=0)
+    rows_created = models.PositiveIntegerField(default=0)
+    seconds = models.FloatField(default=0)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('run', 'index')
+        ordering = ['run', 'index']
+
+    def __str__(self):
+        return f"{self.run.date} shard {self.index} ({self.status})"
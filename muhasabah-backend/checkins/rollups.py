@@ -0,0 +1,178 @@
+# checkins/rollups.py
+"""
+Keeps the DailyProgress and SittingDailyProgress rollup tables in step with
+DailyCheckIn, so dashboards read one row per user (or sitting) per day
+instead of re-counting raw check-in rows.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Case, Count, F, FilteredRelation, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce
+
+from sittings.models import Sitting, SittingMembership
+from .models import DailyCheckIn, DailyProgress, SittingDailyProgress
+from .streaks import update_streaks
+
+BATCH_SIZE = 1000
+REBUILD_DAYS = 7  # days rebuilt per transaction by rebuild_progress
+
+
+def _member_percent(relation):
+    """SQL expression for one member's completion percentage (0 if no check-ins)."""
+    return Case(
+        When(**{f"{relation}__total__gt": 0}, then=(
+            Cast(f"{relation}__completed", FloatField()) * 100 / F(f"{relation}__total")
+        )),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+def approved_sitting_ids(user_ids):
+    return set(
+        SittingMembership.objects
+        .filter(student_id__in=user_ids, status="approved")
+        .values_list("sitting_id", flat=True)
+    )
+
+
+def refresh_progress(user_ids, day, refresh_sittings=True):
+    """
+    Recomputes the DailyProgress rows of `user_ids` for `day` with one grouped
+    query and one upsert, then updates the users' streaks and (unless the
+    caller batches that itself) the sittings they belong to.
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+
+    rows = [
+        DailyProgress(user_id=row["user_id"], date=day, total=row["total"], completed=row["completed"])
+        for row in (
+            DailyCheckIn.objects
+            .filter(user_id__in=user_ids, date=day)
+            .values("user_id")
+            .annotate(total=Count("id"), completed=Count("id", filter=Q(is_completed=True)))
+            .order_by()
+        )
+    ]
+    DailyProgress.objects.bulk_create(
+        rows,
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["user", "date"],
+        update_fields=["total", "completed", "updated_at"],
+    )
+
+    # Users whose check-ins for the day are all gone no longer have a rollup.
+    stale = user_ids - {row.user_id for row in rows}
+    if stale:
+        DailyProgress.objects.filter(user_id__in=stale, date=day).delete()
+
+    update_streaks(user_ids, day)
+    if refresh_sittings:
+        refresh_sitting_progress(approved_sitting_ids(user_ids), day)
+
+
+def refresh_sitting_progress(sitting_ids, day):
+    """
+    Recomputes SittingDailyProgress for `sitting_ids` on `day` from the
+    members' DailyProgress rows, so the cost depends on member count only.
+    """
+    sitting_ids = set(Sitting.objects.filter(id__in=sitting_ids).values_list("id", flat=True))
+    if not sitting_ids:
+        return
+
+    totals = {
+        row["sitting_id"]: row
+        for row in (
+            SittingMembership.objects
+            .filter(sitting_id__in=sitting_ids, status="approved")
+            .annotate(day_progress=FilteredRelation(
+                "student__daily_progress",
+                condition=Q(student__daily_progress__date=day),
+            ))
+            .values("sitting_id")
+            .annotate(
+                members=Count("id"),
+                total=Coalesce(Sum("day_progress__total"), 0),
+                completed=Coalesce(Sum("day_progress__completed"), 0),
+                progress_sum=Coalesce(Sum(_member_percent("day_progress")), 0.0),
+            )
+            .order_by()
+        )
+    }
+
+    rows = []
+    for sitting_id in sitting_ids:
+        row = totals.get(sitting_id, {})
+        rows.append(SittingDailyProgress(
+            sitting_id=sitting_id,
+            date=day,
+            members=row.get("members", 0),
+            total=row.get("total", 0),
+            completed=row.get("completed", 0),
+            progress_sum=row.get("progress_sum", 0.0),
+        ))
+
+    SittingDailyProgress.objects.bulk_create(
+        rows,
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["sitting", "date"],
+        update_fields=["members", "total", "completed", "progress_sum", "updated_at"],
+    )
+
+
+def rebuild_progress(start, end=None, days=REBUILD_DAYS):
+    """
+    Rebuilds every rollup row between `start` and `end` (inclusive) from the
+    raw check-ins, `days` days per transaction so locks and undo stay small
+    on long ranges. Used for backfills and after bulk inserts that bypass
+    the model signals. Returns (user_rows, sitting_rows) written.
+    """
+    end = end or start
+    sitting_ids = list(Sitting.objects.values_list("id", flat=True))
+
+    user_rows = sitting_rows = 0
+    while start <= end:
+        last = min(start + timedelta(days=days - 1), end)
+        with transaction.atomic():
+            user_rows += _rebuild_user_progress(start, last)
+            sitting_rows += _rebuild_sitting_progress(sitting_ids, start, last)
+        start = last + timedelta(days=1)
+    return user_rows, sitting_rows
+
+
+def _rebuild_user_progress(start, end):
+    DailyProgress.objects.filter(date__range=(start, end)).delete()
+    grouped = (
+        DailyCheckIn.objects
+        .filter(date__range=(start, end))
+        .values("user_id", "date")
+        .annotate(total=Count("id"), completed=Count("id", filter=Q(is_completed=True)))
+        .order_by()
+    )
+
+    user_rows = 0
+    batch = []
+    for row in grouped.iterator(chunk_size=BATCH_SIZE):
+        batch.append(DailyProgress(**row))
+        if len(batch) >= BATCH_SIZE:
+            DailyProgress.objects.bulk_create(batch)
+            user_rows += len(batch)
+            batch = []
+    if batch:
+        DailyProgress.objects.bulk_create(batch)
+        user_rows += len(batch)
+    return user_rows
+
+
+def _rebuild_sitting_progress(sitting_ids, start, end):
+    SittingDailyProgress.objects.filter(date__range=(start, end)).delete()
+    day = start
+    while day <= end:
+        refresh_sitting_progress(sitting_ids, day)
+        day += timedelta(days=1)
+    return len(sitting_ids) * ((end - start).days + 1)
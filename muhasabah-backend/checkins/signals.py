@@ -0,0 +1,40 @@
+# checkins/signals.py
+from datetime import date
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from sittings.models import SittingMembership
+from .models import DailyCheckIn
+from .rollups import refresh_progress, refresh_sitting_progress
+
+
+@receiver(pre_save, sender=DailyCheckIn)
+def remember_progress_key(sender, instance, update_fields=None, **kwargs):
+    """Keeps the stored (user, date) so moving a check-in refreshes both rollups."""
+    moving = update_fields is None or {"user", "date"} & set(update_fields)
+    instance._previous_progress_key = (
+        DailyCheckIn.objects.filter(pk=instance.pk).values_list("user_id", "date").first()
+        if instance.pk and moving else None
+    )
+
+
+@receiver([post_save, post_delete], sender=DailyCheckIn)
+def update_daily_progress(sender, instance, **kwargs):
+    """
+    Refreshes the owner's rollup (and their sitting's) once the check-in
+    change is committed, and the old owner's or day's if the check-in moved.
+    """
+    keys = {(instance.user_id, instance.date), getattr(instance, "_previous_progress_key", None)} - {None}
+    for user_id, day in keys:
+        transaction.on_commit(lambda user_id=user_id, day=day: refresh_progress([user_id], day))
+
+
+@receiver([post_save, post_delete], sender=SittingMembership)
+def update_sitting_progress(sender, instance, **kwargs):
+    """
+    Joining, leaving or being approved changes who a sitting's rollup counts.
+    """
+    sitting_id = instance.sitting_id
+    transaction.on_commit(lambda: refresh_sitting_progress([sitting_id], date.today()))
@@ -0,0 +1,131 @@
+# checkins/streaks.py
+"""
+Incremental maintenance of `User.streak`.
+
+`User.streak` is the length of the run of fully completed days that ends on
+`User.streak_date`. A day is complete when it has check-ins and all of them
+are done. Changing today's check-ins extends or shortens the run in place;
+changes that land inside an older run fall back to a per-user rebuild.
+"""
+from datetime import date, timedelta
+
+from django.db import connection, transaction
+from django.db.models import F, Q
+
+from accounts.models import User
+from .models import DailyCheckIn, DailyProgress
+
+
+def update_streaks(user_ids, day):
+    """
+    Applies a change to `day`'s completion state to the streaks of `user_ids`,
+    using the DailyProgress rollup that has just been refreshed.
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+
+    complete = set(
+        DailyProgress.objects
+        .filter(user_id__in=user_ids, date=day, total__gt=0, completed=F("total"))
+        .values_list("user_id", flat=True)
+    )
+    incomplete = user_ids - complete
+    previous = day - timedelta(days=1)
+
+    with transaction.atomic():
+        # Changes to a day inside an existing run can join or split it.
+        rebuild = Q(streak_date__gt=day)
+        if day < date.today():
+            # Completing a past day late: close_streaks may already have reset
+            # the run ending the day before, which this completion continues.
+            rebuild |= Q(id__in=complete) & (Q(streak_date__isnull=True) | Q(streak_date__lt=previous))
+        rebuild_ids = set(
+            User.objects
+            .filter(rebuild, id__in=user_ids)
+            .values_list("id", flat=True)
+        )
+        if rebuild_ids:
+            rebuild_streaks(user_ids=rebuild_ids)
+
+        users = User.objects.exclude(id__in=rebuild_ids)
+
+        # Completing the day after the run's end extends it; otherwise it starts a new one.
+        users.filter(id__in=complete, streak_date=previous).update(
+            streak=F("streak") + 1, streak_date=day
+        )
+        users.filter(id__in=complete).filter(
+            Q(streak_date__isnull=True) | Q(streak_date__lt=previous)
+        ).update(streak=1, streak_date=day)
+
+        # Un-completing the run's last day steps it back by one.
+        users.filter(id__in=incomplete, streak_date=day).update(
+            streak=F("streak") - 1, streak_date=previous
+        )
+        users.filter(id__in=incomplete, streak=0).update(streak_date=None)
+
+
+def close_streaks(today=None):
+    """
+    Resets streaks whose last completed day is before yesterday.
+    Runs once a day after the previous day has closed; returns rows reset.
+    """
+    today = today or date.today()
+    return User.objects.filter(streak_date__lt=today - timedelta(days=1)).update(
+        streak=0, streak_date=None
+    )
+
+
+_STREAK_SQL = """
+    WITH complete_days AS (
+        SELECT user_id, date
+        FROM {checkins}
+        WHERE date <= %(today)s {user_filter}
+        GROUP BY user_id, date
+        HAVING bool_and(is_completed)
+    ),
+    islands AS (
+        SELECT user_id, date,
+               date - (ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY date))::int AS island
+        FROM complete_days
+    ),
+    latest_run AS (
+        SELECT DISTINCT ON (user_id) user_id, COUNT(*) AS length, MAX(date) AS last_day
+        FROM islands
+        GROUP BY user_id, island
+        ORDER BY user_id, MAX(date) DESC
+    )
+    UPDATE {users} AS u
+    SET streak = latest_run.length, streak_date = latest_run.last_day
+    FROM latest_run
+    WHERE u.id = latest_run.user_id AND latest_run.last_day >= %(yesterday)s
+"""
+
+
+@transaction.atomic
+def rebuild_streaks(user_ids=None, today=None):
+    """
+    Recomputes streaks from DailyCheckIn with a single gaps-and-islands
+    query: consecutive complete days share the same `date - row_number`.
+    Rebuilds every user when `user_ids` is None. Returns rows updated.
+    """
+    today = today or date.today()
+    users = User.objects.all()
+    params = {"today": today, "yesterday": today - timedelta(days=1)}
+    user_filter = ""
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        users = users.filter(id__in=user_ids)
+        params["user_ids"] = user_ids
+        user_filter = "AND user_id = ANY(%(user_ids)s)"
+
+    users.update(streak=0, streak_date=None)
+
+    sql = _STREAK_SQL.format(
+        checkins=connection.ops.quote_name(DailyCheckIn._meta.db_table),
+        users=connection.ops.quote_name(User._meta.db_table),
+        user_filter=user_filter,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
@@ -1,14 +1,30 @@
+import logging
+import time
+from collections import defaultdict
 from datetime import date, timedelta
+from itertools import chain
 from django.utils import timezone
 from django.conf import settings
-from django.core.mail import send_mail
-from celery import shared_task
-import requests
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db import transaction
+from django.db.models import Max, Sum
+from celery import group, shared_task
 
-from todos.models import DefaultToDo, PersonalToDo
-from checkins.models import DailyCheckIn
-from sittings.models import SittingMembership
-from accounts.models import User
+from sittings.models import Sitting
+from checkins.models import CheckInGenerationRun, CheckInGenerationShard, DailyCheckIn
+from checkins.generation import checkin_items, default_titles, eligible_users, generate_checkins, plan_shards
+from checkins.rollups import refresh_sitting_progress
+from checkins.streaks import close_streaks
+from checkins.whatsapp import get_client
+from dashboard.cache import invalidate_shared
+from notification.outbox import email_message, enqueue, whatsapp_message
+
+logger = logging.getLogger(__name__)
+
+# A dispatched run with no shard finishing for this long is treated as
+# stalled (a worker died mid-shard) and its pending shards are re-dispatched.
+GENERATION_DISPATCH_TIMEOUT = timedelta(minutes=30)
+REMINDER_CHUNK_SIZE = 500
 
 
 # ---------------------------------------------------------------------------- #
@@ -21,30 +37,131 @@ def create_midnight_checkins():
     Runs at midnight to generate check-ins:
     - For each approved sitting member → all default todos
     - For each user → their personal todos
+    Coordinates the run: splits eligible users into id-range shards and fans
+    them out as a group of `generate_checkin_shard` tasks. Re-running it for
+    the same day only dispatches the shards that have not finished.
+    In lazy mode rows are created on first read instead; only the sitting
+    rollups are seeded so unmaterialized members count as 0%.
     """
     today = date.today()
 
-    # 1. Default To-Dos for approved sitting members
-    memberships = SittingMembership.objects.filter(status='approved')
-    for membership in memberships:
-        user = membership.student
-        for default in DefaultToDo.objects.all():
-            DailyCheckIn.objects.get_or_create(
-                user=user,
-                date=today,
-                todo_item=default.title,
-                defaults={'is_completed': False}
-            )
-
-    # 2. Personal To-Dos for all active users
-    for user in User.objects.filter(is_active=True):
-        for todo in PersonalToDo.objects.filter(user=user):
-            DailyCheckIn.objects.get_or_create(
-                user=user,
-                date=today,
-                todo_item=todo.title,
-                defaults={'is_completed': False}
-            )
+    if settings.CHECKINS_LAZY_MATERIALIZATION:
+        refresh_sitting_progress(Sitting.objects.values_list("id", flat=True), today)
+        return {"date": today.isoformat(), "skipped": "lazy"}
+
+    return dispatch_checkin_run(today)
+
+
+@shared_task
+def resume_checkin_runs():
+    """
+    Re-dispatches the pending shards of runs that stopped making progress,
+    e.g. after a worker crashed mid-shard. Schedule it every 10 minutes.
+    """
+    days = CheckInGenerationRun.objects.filter(status="running").values_list("date", flat=True)
+    return [dispatch_checkin_run(day) for day in days]
+
+
+def _stalled(run):
+    """Whether no shard of a dispatched run has finished within the timeout."""
+    last_finished = run.shards.aggregate(last=Max("finished_at"))["last"]
+    progress = max(run.dispatched_at, last_finished or run.dispatched_at)
+    return timezone.now() - progress >= GENERATION_DISPATCH_TIMEOUT
+
+
+def dispatch_checkin_run(day):
+    """
+    Plans `day`'s run on first call and fans its pending shards out as a
+    group of `generate_checkin_shard` tasks, unless the run is completed or
+    its shards are still in flight.
+    """
+    # The run row lock serialises concurrent firings across workers; the run
+    # and its shards commit together, so a crash never leaves it half-planned.
+    with transaction.atomic():
+        run, _ = CheckInGenerationRun.objects.select_for_update().get_or_create(date=day)
+        if run.status == "completed":
+            return {"date": day.isoformat(), "skipped": "completed"}
+
+        # A duplicate firing while the shards are in flight is a no-op.
+        if run.dispatched_at and not _stalled(run):
+            logger.info("Check-in generation for %s is already running; skipping.", day)
+            return {"date": day.isoformat(), "skipped": "running"}
+
+        if not run.planned:
+            plan_shards(run, settings.CHECKIN_SHARD_SIZE)
+            run.planned = True
+        pending = list(run.shards.filter(status="pending").values_list("id", flat=True))
+        run.dispatched_at = timezone.now()
+        run.save(update_fields=["planned", "dispatched_at"])
+
+    if not pending:
+        finish_checkin_run(run.id)
+        return {"date": day.isoformat(), "shards": 0}
+
+    group(generate_checkin_shard.s(shard_id) for shard_id in pending).apply_async()
+    return {"date": day.isoformat(), "shards": len(pending)}
+
+
+@shared_task
+def generate_checkin_shard(shard_id):
+    """
+    Generates check-ins for one shard's user id range and checkpoints it.
+    The last shard to finish closes the run.
+    """
+    shard = CheckInGenerationShard.objects.select_related("run").get(pk=shard_id)
+    if shard.status == "done":
+        return {"shard": shard.index, "skipped": "done"}
+
+    users = eligible_users().filter(id__range=(shard.first_user_id, shard.last_user_id))
+    report = generate_checkins(shard.run.date, users=users, refresh_sittings=False)
+
+    shard.status = "done"
+    shard.users = report["users"]
+    shard.rows_created = report["rows_created"]
+    shard.seconds = report["seconds"]
+    shard.finished_at = timezone.now()
+    shard.save(update_fields=["status", "users", "rows_created", "seconds", "finished_at"])
+
+    finish_checkin_run(shard.run_id)
+    return {"shard": shard.index, **report}
+
+
+def finish_checkin_run(run_id):
+    """
+    Marks a run completed once none of its shards are pending, aggregating
+    the per-shard counts and refreshing every sitting rollup once.
+    """
+    with transaction.atomic():
+        run = CheckInGenerationRun.objects.select_for_update().get(pk=run_id)
+        if run.status == "completed" or run.shards.filter(status="pending").exists():
+            return
+        totals = run.shards.aggregate(users=Sum("users"), rows_created=Sum("rows_created"))
+        run.users = totals["users"] or 0
+        run.rows_created = totals["rows_created"] or 0
+        run.status = "completed"
+        run.finished_at = timezone.now()
+        run.save(update_fields=["users", "rows_created", "status", "finished_at"])
+
+    refresh_sitting_progress(Sitting.objects.values_list("id", flat=True), run.date)
+    # The shards bulk-insert, which skips the signals that stale the dashboard.
+    invalidate_shared(run.date)
+    logger.info(
+        "Check-in run %s completed: %s rows for %s users in %s",
+        run.date, run.rows_created, run.users, run.finished_at - run.started_at,
+    )
+
+
+# ---------------------------------------------------------------------------- #
+#                      1b. Close Yesterday's Streaks                          #
+# ---------------------------------------------------------------------------- #
+
+@shared_task
+def close_daily_streaks():
+    """
+    Runs just after midnight, once yesterday has closed:
+    - Resets the streak of every user whose run ended before yesterday
+    """
+    return close_streaks()
 
 
 # ---------------------------------------------------------------------------- #
@@ -55,38 +172,110 @@ def create_midnight_checkins():
 def send_missed_checkin_reminders():
     """
     Runs in the morning (e.g., 8AM) to notify users who missed check-ins yesterday.
-    Sends both email and WhatsApp messages.
+    Queues one digest per user listing every missed to-do, by email and WhatsApp.
+    The missed items come from a single grouped query; delivery happens in the
+    notification outbox, which reuses connections and retries failures.
+    In lazy mode, users who never opened the app yesterday have no rows for
+    that day; their digests are built in memory from their todos instead.
     """
+    started = time.monotonic()
     yesterday = timezone.now().date() - timedelta(days=1)
 
-    missed_checkins = DailyCheckIn.objects.filter(
-        date=yesterday,
-        is_completed=False
-    ).select_related('user')
+    digests = (
+        DailyCheckIn.objects
+        .filter(date=yesterday, is_completed=False)
+        .values("user_id", "user__username", "user__email", "user__whatsapp")
+        .annotate(items=ArrayAgg("todo_item", ordering="todo_item"))
+        .order_by("user_id")
+    )
+    digests = digests.iterator(chunk_size=REMINDER_CHUNK_SIZE)
+    if settings.CHECKINS_LAZY_MATERIALIZATION:
+        digests = chain(digests, unmaterialized_digests(yesterday))
 
-    for checkin in missed_checkins:
-        user = checkin.user
+    users = queued = 0
+    batch = []
+    for digest in digests:
+        users += 1
+        missed = "\n".join(f"- {item}" for item in digest["items"])
+        dedup_key = f"missed-checkins:{yesterday.isoformat()}:{digest['user_id']}"
 
         # Email reminder
-        send_mail(
+        batch.append(email_message(
+            digest["user__email"],
             subject="Reminder: You missed your check-in yesterday",
-            message=(
-                f"Assalaam alaykum {user.username},\n\n"
-                f"You missed your to-do: '{checkin.todo_item}' on {yesterday}.\n"
+            body=(
+                f"Assalaam alaykum {digest['user__username']},\n\n"
+                f"You missed these to-dos on {yesterday}:\n{missed}\n\n"
                 "Try not to miss today's check-in 😊."
             ),
-            from_email=settings.EMAIL_HOST_USER,
-            recipient_list=[user.email],
-            fail_silently=True,
-        )
+            dedup_key=f"{dedup_key}:email",
+        ))
 
         # WhatsApp reminder (if number exists)
-        if user.whatsapp:
-            message = (
-                f"Reminder: You missed '{checkin.todo_item}' yesterday.\n"
-                "Don't miss today's. May Allah strengthen you."
-            )
-            send_whatsapp(user.whatsapp, message)
+        if digest["user__whatsapp"]:
+            batch.append(whatsapp_message(
+                digest["user__whatsapp"],
+                body=(
+                    f"Reminder: You missed {len(digest['items'])} to-do(s) yesterday:\n{missed}\n"
+                    "Don't miss today's. May Allah strengthen you."
+                ),
+                dedup_key=f"{dedup_key}:whatsapp",
+            ))
+
+        if len(batch) >= REMINDER_CHUNK_SIZE:
+            enqueue(batch)
+            queued += len(batch)
+            batch = []
+
+    enqueue(batch)
+    queued += len(batch)
+
+    report = {
+        "date": yesterday.isoformat(),
+        "users": users,
+        "messages_queued": queued,
+        "seconds": round(time.monotonic() - started, 3),
+    }
+    logger.info(
+        "Missed check-in reminders for %(date)s: %(messages_queued)s messages queued "
+        "for %(users)s users in %(seconds)ss",
+        report,
+    )
+    return report
+
+
+def unmaterialized_digests(day):
+    """
+    Lazy mode: yields reminder digests for the eligible users with no
+    check-in rows on `day`, in the shape of the grouped query's rows. Every
+    todo they would have had is missed; nothing is written.
+    """
+    users = (
+        eligible_users()
+        .exclude(daily_checkins__date=day)
+        .order_by("id")
+        .values("id", "username", "email", "whatsapp")
+    )
+    defaults = default_titles()
+
+    last_id = 0
+    while True:
+        chunk = list(users.filter(id__gt=last_id)[:REMINDER_CHUNK_SIZE])
+        if not chunk:
+            return
+        items = defaultdict(list)
+        for user_id, title in checkin_items([user["id"] for user in chunk], defaults):
+            items[user_id].append(title)
+        for user in chunk:
+            if items[user["id"]]:
+                yield {
+                    "user_id": user["id"],
+                    "user__username": user["username"],
+                    "user__email": user["email"],
+                    "user__whatsapp": user["whatsapp"],
+                    "items": sorted(items[user["id"]]),
+                }
+        last_id = chunk[-1]["id"]
 
 
 # ---------------------------------------------------------------------------- #
@@ -95,21 +284,7 @@ def send_missed_checkin_reminders():
 
 def send_whatsapp(to, message):
     """
-    Sends a WhatsApp message using Termii API.
-    """
-    try:
-        url = "https://api.ng.termii.com/api/sms/send"
-        payload = {
-            "to": to,
-            "from": settings.TERMII_SENDER_ID,
-            "sms": message,
-            "type": "plain",
-            "channel": "whatsapp",
-            "api_key": settings.TERMII_API_KEY
-        }
-        response = requests.post(url, json=payload)
-        return response.status_code
-    except Exception as e:
-        # Optionally log the error
-        print(f"[Termii Error] WhatsApp to {to} failed: {str(e)}")
-        return None
+    Sends a WhatsApp message using Termii API, through the shared pooled client.
+    Returns the HTTP status code, or None if the request never got a response.
+    """
+    return get_client().send(to, message)
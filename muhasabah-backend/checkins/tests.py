@@ -1,3 +1,414 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+import requests
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from accounts.models import User
+from notification.models import OutboxMessage
+from sittings.models import Sitting, SittingMembership
+from todos.models import DefaultToDo, PersonalToDo
+
+from . import tasks
+from .generation import generate_checkins, materialize_checkins
+from .models import CheckInGenerationRun, DailyCheckIn, DailyProgress, SittingDailyProgress
+from .rollups import rebuild_progress
+from .streaks import close_streaks, rebuild_streaks
+from .whatsapp import UNCONFIRMED, WhatsAppClient
+
+
+def make_user(name, role="student"):
+    return User.objects.create_user(
+        email=f"{name}@example.com", username=name, password="x", role=role
+    )
+
+
+def make_sitting(head, name="Fajr"):
+    return Sitting.objects.create(
+        name=name, location="Hall", sitting_head=head,
+        day_of_week="Monday", max_members=10, status="active",
+    )
+
+
+class RollupTests(TestCase):
+
+    def setUp(self):
+        self.today = date.today()
+        self.yesterday = self.today - timedelta(days=1)
+        self.sitting = make_sitting(make_user("head", role="sitting_head"))
+        self.amina = make_user("amina")
+        self.bilal = make_user("bilal")
+        # Approvals queue an email; keep the outbox dispatcher off the broker.
+        patcher = mock.patch("notification.outbox._kick_dispatcher")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        with self.captureOnCommitCallbacks(execute=True):
+            for student in (self.amina, self.bilal):
+                SittingMembership.objects.create(student=student, sitting=self.sitting, status="approved")
+
+    def checkin(self, user, day, title, completed=False):
+        with self.captureOnCommitCallbacks(execute=True):
+            return DailyCheckIn.objects.create(user=user, date=day, todo_item=title, is_completed=completed)
+
+    def progress(self, user, day):
+        return DailyProgress.objects.filter(user=user, date=day).values_list("total", "completed").first()
+
+    def sitting_progress(self, day):
+        return SittingDailyProgress.objects.values_list("members", "total", "completed", "progress_sum").get(
+            sitting=self.sitting, date=day
+        )
+
+    def test_saves_and_deletes_keep_the_rollups_in_step(self):
+        fajr = self.checkin(self.amina, self.today, "Fajr")
+        tilawah = self.checkin(self.amina, self.today, "Tilawah", completed=True)
+        self.assertEqual(self.progress(self.amina, self.today), (2, 1))
+
+        fajr.is_completed = True
+        with self.captureOnCommitCallbacks(execute=True):
+            fajr.save()
+        self.assertEqual(self.progress(self.amina, self.today), (2, 2))
+        self.assertEqual(self.sitting_progress(self.today), (2, 2, 2, 100.0))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tilawah.delete()
+        self.assertEqual(self.progress(self.amina, self.today), (1, 1))
+        with self.captureOnCommitCallbacks(execute=True):
+            fajr.delete()
+        self.assertIsNone(self.progress(self.amina, self.today))
+        self.assertEqual(self.sitting_progress(self.today), (2, 0, 0, 0.0))
+
+    def test_moving_a_checkin_refreshes_the_old_rollup_too(self):
+        checkin = self.checkin(self.amina, self.yesterday, "Fajr", completed=True)
+        self.checkin(self.bilal, self.yesterday, "Fajr")
+
+        checkin.user, checkin.date = self.bilal, self.today
+        with self.captureOnCommitCallbacks(execute=True):
+            checkin.save()
+
+        self.assertIsNone(self.progress(self.amina, self.yesterday))
+        self.assertEqual(self.progress(self.bilal, self.today), (1, 1))
+        self.assertEqual(self.progress(self.bilal, self.yesterday), (1, 0))
+        self.assertEqual(self.sitting_progress(self.yesterday), (2, 1, 0, 0.0))
+
+    def test_rebuild_in_batches_matches_the_raw_checkins(self):
+        start = self.today - timedelta(days=9)
+        for offset in range(10):
+            DailyCheckIn.objects.create(
+                user=self.amina, date=start + timedelta(days=offset), todo_item="Fajr", is_completed=offset % 2 == 0,
+            )
+        DailyProgress.objects.all().delete()
+        SittingDailyProgress.objects.all().delete()
+        DailyProgress.objects.create(user=self.bilal, date=start, total=5, completed=5)  # stale
+
+        self.assertEqual(rebuild_progress(start, self.today, days=3), (10, 10))
+        self.assertEqual(
+            list(DailyProgress.objects.order_by("date").values_list("date", "completed")),
+            [(start + timedelta(days=offset), int(offset % 2 == 0)) for offset in range(10)],
+        )
+        self.assertEqual(self.sitting_progress(start), (2, 1, 1, 100.0))
+        self.assertEqual(SittingDailyProgress.objects.count(), 10)
+
+
+class StreakTests(TestCase):
+
+    def setUp(self):
+        self.today = date.today()
+        self.user = make_user("amina")
+
+    def day(self, days_ago):
+        return self.today - timedelta(days=days_ago)
+
+    def complete(self, days_ago, completed=True):
+        with self.captureOnCommitCallbacks(execute=True):
+            checkin, _ = DailyCheckIn.objects.update_or_create(
+                user=self.user, date=self.day(days_ago), todo_item="Fajr",
+                defaults={"is_completed": completed},
+            )
+        return checkin
+
+    def streak(self):
+        self.user.refresh_from_db()
+        return self.user.streak, self.user.streak_date
+
+    def test_consecutive_days_extend_the_run(self):
+        self.complete(2)
+        self.complete(1)
+        self.complete(0)
+        self.assertEqual(self.streak(), (3, self.today))
+        self.assertEqual(self.user.current_streak, 3)
+
+    def test_uncompleting_the_last_day_steps_back(self):
+        self.complete(1)
+        self.complete(0)
+        self.complete(0, completed=False)
+        self.assertEqual(self.streak(), (1, self.day(1)))
+        self.complete(1, completed=False)
+        self.assertEqual(self.streak(), (0, None))
+
+    def test_filling_a_gap_joins_the_runs(self):
+        self.complete(3)
+        self.complete(1)
+        self.complete(0)
+        self.assertEqual(self.streak(), (2, self.today))
+        self.complete(2)
+        self.assertEqual(self.streak(), (4, self.today))
+        self.complete(2, completed=False)
+        self.assertEqual(self.streak(), (2, self.today))
+
+    def test_completing_a_day_late_after_the_close(self):
+        self.complete(3)
+        self.complete(2)
+        close_streaks()
+        self.assertEqual(self.streak(), (0, None))  # the run ended before yesterday
+        self.complete(1)
+        self.assertEqual(self.streak(), (3, self.day(1)))
+
+    def test_close_keeps_runs_ending_yesterday(self):
+        self.complete(1)
+        self.assertEqual(close_streaks(), 0)
+        self.assertEqual(self.streak(), (1, self.day(1)))
+
+    def test_rebuild_matches_the_incremental_result(self):
+        for days_ago in (6, 5, 3, 2, 1):
+            self.complete(days_ago)
+        expected = self.streak()
+        User.objects.filter(pk=self.user.pk).update(streak=42, streak_date=self.today)
+        self.assertEqual(rebuild_streaks(), 1)
+        self.assertEqual(self.streak(), expected)
+        self.assertEqual(expected, (3, self.day(1)))
+
+
+class GenerationTests(TestCase):
+
+    def setUp(self):
+        self.day = date.today() + timedelta(days=1)
+        sitting = make_sitting(make_user("head", role="sitting_head"))
+        self.member = make_user("amina")
+        self.inactive_member = make_user("bilal")
+        self.loner = make_user("chioma")
+        self.inactive_loner = make_user("dawud")
+        self.pending = make_user("pending")
+        for student in (self.member, self.inactive_member):
+            SittingMembership.objects.create(student=student, sitting=sitting, status="approved")
+        SittingMembership.objects.create(student=self.pending, sitting=sitting)
+        User.objects.filter(pk__in=[self.inactive_member.pk, self.inactive_loner.pk]).update(is_active=False)
+
+        for order, title in enumerate(["Fajr", "Tilawah"]):
+            DefaultToDo.objects.create(title=title, description="", frequency="daily", order=order, category="solat")
+        for user in (self.member, self.inactive_member, self.loner, self.inactive_loner):
+            PersonalToDo.objects.create(user=user, title="Walk")
+
+    def items(self):
+        rows = DailyCheckIn.objects.filter(date=self.day).values_list("user__username", "todo_item")
+        result = {}
+        for username, title in rows:
+            result.setdefault(username, set()).add(title)
+        return result
+
+    def test_defaults_for_members_and_personal_todos_for_active_users(self):
+        report = generate_checkins(self.day)
+        # Inactive users without an approved membership are not eligible.
+        self.assertEqual((report["users"], report["rows_created"]), (5, 6))
+        self.assertEqual(self.items(), {
+            "amina": {"Fajr", "Tilawah", "Walk"},
+            "bilal": {"Fajr", "Tilawah"},
+            "chioma": {"Walk"},
+        })
+        self.assertEqual(
+            DailyProgress.objects.get(user=self.member, date=self.day).total, 3
+        )
+
+    def test_rerun_only_fills_in_missing_rows(self):
+        generate_checkins(self.day)
+        DailyCheckIn.objects.filter(user=self.member, date=self.day, todo_item="Fajr").update(is_completed=True)
+        DailyCheckIn.objects.filter(user=self.loner, date=self.day).delete()
+
+        report = generate_checkins(self.day, chunk_size=1)
+        self.assertEqual(report["rows_created"], 1)
+        self.assertEqual(DailyCheckIn.objects.filter(date=self.day).count(), 6)
+        self.assertTrue(
+            DailyCheckIn.objects.get(user=self.member, date=self.day, todo_item="Fajr").is_completed
+        )
+
+
+@override_settings(CHECKIN_SHARD_SIZE=2, CHECKINS_LAZY_MATERIALIZATION=False)
+class ShardedGenerationTests(TestCase):
+
+    def setUp(self):
+        for name in ["amina", "bilal", "chioma", "dawud", "ejike"]:
+            PersonalToDo.objects.create(user=make_user(name), title="Walk")
+        patcher = mock.patch.object(tasks, "group")
+        self.group = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def dispatched(self):
+        """Shard ids passed to the last group(...) call."""
+        signatures = list(self.group.call_args.args[0])
+        return [signature.args[0] for signature in signatures]
+
+    def run_shards(self, shard_ids):
+        for shard_id in shard_ids:
+            tasks.generate_checkin_shard(shard_id)
+
+    def test_run_is_planned_once_and_completed_by_its_shards(self):
+        report = tasks.create_midnight_checkins()
+        self.assertEqual(report["shards"], 3)
+        self.assertEqual(tasks.create_midnight_checkins()["skipped"], "running")
+
+        self.run_shards(self.dispatched())
+        run = CheckInGenerationRun.objects.get()
+        self.assertEqual((run.status, run.users, run.rows_created), ("completed", 5, 5))
+        self.assertEqual(tasks.create_midnight_checkins()["skipped"], "completed")
+        self.assertEqual(self.group.call_count, 1)
+
+    def test_stalled_run_is_resumed(self):
+        tasks.create_midnight_checkins()
+        first, *rest = self.dispatched()
+        self.run_shards([first])
+
+        # Progress within the timeout: nothing to resume.
+        self.assertEqual(tasks.resume_checkin_runs()[0]["skipped"], "running")
+
+        # A worker died: no shard has finished for longer than the timeout.
+        stale = timezone.now() - tasks.GENERATION_DISPATCH_TIMEOUT
+        CheckInGenerationRun.objects.update(dispatched_at=stale)
+        CheckInGenerationRun.objects.get().shards.update(finished_at=stale)
+        self.assertEqual(tasks.resume_checkin_runs(), [{"date": date.today().isoformat(), "shards": 2}])
+        self.assertEqual(self.dispatched(), rest)
+
+        self.run_shards(rest)
+        self.assertEqual(CheckInGenerationRun.objects.get().status, "completed")
+        self.assertEqual(tasks.resume_checkin_runs(), [])
+
+
+@override_settings(CHECKINS_LAZY_MATERIALIZATION=True)
+class LazyMaterializationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.today = date.today()
+        self.yesterday = self.today - timedelta(days=1)
+        sitting = make_sitting(make_user("head", role="sitting_head"))
+        DefaultToDo.objects.create(title="Fajr", description="", frequency="daily", order=0, category="solat")
+        self.member = make_user("amina")
+        SittingMembership.objects.create(student=self.member, sitting=sitting, status="approved")
+        DailyCheckIn.objects.filter(user=self.member).delete()  # rows the approval created
+        self.loner = make_user("bilal")
+        PersonalToDo.objects.create(user=self.loner, title="Walk")
+
+    def test_rows_are_created_on_first_read_only(self):
+        self.assertEqual(materialize_checkins([self.member.id, self.loner.id]), 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(materialize_checkins([self.member.id, self.loner.id]), 0)
+        self.assertEqual(DailyProgress.objects.get(user=self.member, date=self.today).total, 1)
+        self.assertEqual(materialize_checkins([self.member.id], self.yesterday), 0)
+
+    def test_midnight_job_only_seeds_the_sitting_rollups(self):
+        self.assertEqual(tasks.create_midnight_checkins()["skipped"], "lazy")
+        self.assertFalse(DailyCheckIn.objects.exists())
+        self.assertEqual(SittingDailyProgress.objects.get().members, 1)
+
+    def test_reminders_cover_users_who_never_opened_the_app(self):
+        DailyCheckIn.objects.create(user=self.loner, date=self.yesterday, todo_item="Walk", is_completed=False)
+        head = User.objects.get(username="head")
+        PersonalToDo.objects.create(user=head, title="Read")
+        DailyCheckIn.objects.create(user=head, date=self.yesterday, todo_item="Read", is_completed=True)
+
+        report = tasks.send_missed_checkin_reminders()
+
+        self.assertEqual(report["users"], 2)
+        self.assertEqual(DailyCheckIn.objects.filter(date=self.yesterday).count(), 2)
+        bodies = dict(OutboxMessage.objects.filter(channel="email").values_list("recipient", "body"))
+        self.assertEqual(set(bodies), {"amina@example.com", "bilal@example.com"})
+        self.assertIn("- Fajr", bodies["amina@example.com"])
+        self.assertIn("- Walk", bodies["bilal@example.com"])
+
+
+@override_settings(CHECKINS_LAZY_MATERIALIZATION=False)
+class ReminderDigestTests(TestCase):
+
+    def setUp(self):
+        self.yesterday = date.today() - timedelta(days=1)
+        self.amina = make_user("amina")
+        User.objects.filter(pk=self.amina.pk).update(whatsapp="2348000000001")
+        self.bilal = make_user("bilal")
+        for user, title, completed in [
+            (self.amina, "Fajr", False), (self.amina, "Tilawah", False), (self.amina, "Dhikr", True),
+            (self.bilal, "Fajr", True),
+        ]:
+            DailyCheckIn.objects.create(user=user, date=self.yesterday, todo_item=title, is_completed=completed)
+
+    def test_one_digest_per_user_with_missed_items(self):
+        report = tasks.send_missed_checkin_reminders()
+        self.assertEqual((report["users"], report["messages_queued"]), (1, 2))
+
+        email = OutboxMessage.objects.get(channel="email")
+        self.assertEqual(email.recipient, "amina@example.com")
+        self.assertIn("- Fajr\n- Tilawah\n", email.body)
+        self.assertNotIn("Dhikr", email.body)
+        whatsapp = OutboxMessage.objects.get(channel="whatsapp")
+        self.assertIn("You missed 2 to-do(s)", whatsapp.body)
+
+    def test_rerun_does_not_queue_duplicates(self):
+        tasks.send_missed_checkin_reminders()
+        tasks.send_missed_checkin_reminders()
+        self.assertEqual(OutboxMessage.objects.count(), 2)
+
+
+class WhatsAppClientTests(TestCase):
+
+    def setUp(self):
+        self.client = WhatsAppClient(
+            base_url="http://termii.test", api_key="key", sender_id="Muhasabah",
+            max_workers=4, rate_per_second=1000, burst=1000, max_retries=2, backoff=0, timeout=1,
+        )
+        self.addCleanup(self.client.close)
+
+    def respond(self, *outcomes):
+        """Makes session.post return (or raise) `outcomes` in turn."""
+        def post(*args, **kwargs):
+            outcome = next(results)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return mock.Mock(status_code=outcome, headers={})
+
+        results = iter(outcomes)
+        patcher = mock.patch.object(self.client.session, "post", side_effect=post)
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def test_rate_limits_and_connection_errors_are_retried(self):
+        post = self.respond(429, requests.ConnectionError("refused"), 200)
+        self.assertEqual(self.client.send("2348000000001", "Salaam"), 200)
+        self.assertEqual(post.call_count, 3)
+        self.assertEqual(post.call_args.kwargs["json"]["channel"], "whatsapp")
+
+    def test_sends_that_may_have_been_accepted_are_not_retried(self):
+        post = self.respond(500)
+        self.assertEqual(self.client.send("2348000000001", "Salaam"), 500)
+        post = self.respond(requests.ReadTimeout("no answer"))
+        self.assertEqual(self.client.send("2348000000001", "Salaam"), UNCONFIRMED)
+        self.assertEqual(post.call_count, 1)
+
+    def test_gives_up_after_max_retries(self):
+        post = self.respond(429, 429, 429, 200)
+        self.assertEqual(self.client.send("2348000000001", "Salaam"), 429)
+        self.assertEqual(post.call_count, 3)
+
+    def test_batch_reports_each_result_in_order(self):
+        statuses = {"1": 200, "2": 500, "3": 201}
+        patcher = mock.patch.object(
+            self.client, "send", side_effect=lambda to, message: statuses[to]
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        results = []
+        report = self.client.send_batch(
+            [(to, "Salaam") for to in statuses], on_result=lambda index, status: results.append((index, status))
+        )
+        self.assertEqual(results, [(0, 200), (1, 500), (2, 201)])
+        self.assertEqual((report["sent"], report["failed"]), (2, 1))
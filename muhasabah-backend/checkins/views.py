@@ -4,9 +4,9 @@ from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
+from .generation import materialize_checkins
 from .models import DailyCheckIn
 from .serializers import DailyCheckInSerializer
-from accounts.permissions import IsRole  # Optional: use if RBAC is active
 
 
 class DailyCheckInViewSet(viewsets.ModelViewSet):
@@ -21,6 +21,11 @@ class DailyCheckInViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return DailyCheckIn.objects.filter(user=self.request.user)
 
+    def list(self, request, *args, **kwargs):
+        # Lazy mode: today's rows are created on first read.
+        materialize_checkins([request.user.id])
+        return super().list(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
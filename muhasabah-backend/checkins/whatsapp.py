@@ -0,0 +1,181 @@
+# checkins/whatsapp.py
+"""
+WhatsApp delivery through the Termii API.
+
+`WhatsAppClient` keeps a pooled `requests.Session`, sends batches from a
+bounded thread pool, paces requests with a token bucket matched to the
+provider quota and retries with exponential backoff. Sends are not
+idempotent, so only failures where Termii cannot have accepted the message
+(429s and connection errors) are retried.
+Point `base_url` at a local stub server to exercise it without Termii.
+"""
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+SEND_PATH = "/api/sms/send"
+RETRY_STATUSES = {429}
+
+# Returned when the request may have reached Termii but no answer came back.
+UNCONFIRMED = -1
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens per second, holding at most
+    `capacity`. `acquire()` blocks until a token is available.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class WhatsAppClient:
+    """
+    Sends WhatsApp messages over a persistent connection pool with bounded
+    concurrency, rate limiting and retries. Defaults come from settings.
+    """
+
+    def __init__(self, base_url=None, api_key=None, sender_id=None, max_workers=None,
+                 rate_per_second=None, burst=None, max_retries=None, backoff=None, timeout=None):
+        self.url = (base_url or settings.TERMII_BASE_URL).rstrip("/") + SEND_PATH
+        self.api_key = api_key or settings.TERMII_API_KEY
+        self.sender_id = sender_id or settings.TERMII_SENDER_ID
+        self.max_workers = max_workers or settings.WHATSAPP_MAX_WORKERS
+        self.max_retries = settings.WHATSAPP_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff = settings.WHATSAPP_RETRY_BACKOFF if backoff is None else backoff
+        self.timeout = timeout or settings.WHATSAPP_TIMEOUT
+        self.bucket = TokenBucket(
+            rate_per_second or settings.WHATSAPP_RATE_PER_SECOND,
+            burst or settings.WHATSAPP_BURST,
+        )
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def close(self):
+        self.session.close()
+
+    def send(self, to, message):
+        """
+        Sends one message, retrying connection errors and 429s. A 5xx or a read
+        timeout may follow an accepted send, so those are returned as-is.
+        Returns the final HTTP status code, None if Termii was never reached,
+        or UNCONFIRMED if the request went out but no response came back.
+        """
+        payload = {
+            "to": str(to),
+            "from": self.sender_id,
+            "sms": message,
+            "type": "plain",
+            "channel": "whatsapp",
+            "api_key": self.api_key,
+        }
+
+        status = None
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            retry_after = None
+            try:
+                response = self.session.post(self.url, json=payload, timeout=self.timeout)
+                status = response.status_code
+                if status not in RETRY_STATUSES:
+                    return status
+                retry_after = response.headers.get("Retry-After")
+            except requests.ConnectionError as e:
+                status = None
+                logger.warning("[Termii Error] WhatsApp to %s failed (attempt %s): %s", to, attempt + 1, e)
+            except requests.RequestException as e:
+                logger.warning("[Termii Error] WhatsApp to %s failed; not retrying: %s", to, e)
+                return UNCONFIRMED
+
+            if attempt < self.max_retries:
+                delay = self.backoff * (2 ** attempt) * (1 + random.random())
+                if retry_after and retry_after.isdigit():
+                    delay = max(delay, int(retry_after))
+                time.sleep(delay)
+
+        return status
+
+    def send_each(self, messages):
+        """
+        Sends (to, message) pairs concurrently, yielding their status codes in
+        order as soon as each is known.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            yield from pool.map(lambda item: self.send(*item), messages)
+
+    def send_batch(self, messages, on_result=None):
+        """
+        Sends (to, message) pairs concurrently, calling `on_result(index,
+        status)` in order as each status is known. Returns a report with sent
+        and failed counts, elapsed seconds and messages per second.
+        """
+        messages = list(messages)
+        started = time.monotonic()
+        sent = 0
+        for index, status in enumerate(self.send_each(messages)):
+            sent += is_success(status)
+            if on_result is not None:
+                on_result(index, status)
+
+        seconds = time.monotonic() - started
+        report = {
+            "sent": sent,
+            "failed": len(messages) - sent,
+            "seconds": round(seconds, 3),
+            "per_second": round(len(messages) / seconds, 1) if seconds else 0,
+        }
+        logger.info(
+            "WhatsApp batch: %(sent)s sent, %(failed)s failed in %(seconds)ss (%(per_second)s msg/s)",
+            report,
+        )
+        return report
+
+
+def is_success(status):
+    return status is not None and 200 <= status < 300
+
+
+def is_retryable(status):
+    """True when a failed send certainly did not deliver, so sending again is safe."""
+    return status is None or status in RETRY_STATUSES
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Process-wide client, so every caller shares one connection pool."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = WhatsAppClient()
+        return _client
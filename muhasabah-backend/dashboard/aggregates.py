@@ -0,0 +1,77 @@
+# dashboard/aggregates.py
+from django.db.models import FilteredRelation, Q, Sum
+from django.db.models.functions import Coalesce
+
+from checkins.models import DailyProgress
+from sittings.models import Sitting, SittingMembership
+
+
+def percent(completed, total):
+    """Return completed/total as a percentage (0 when there is nothing to do)."""
+    return (completed / total * 100) if total else 0
+
+
+def member_progress(day, sitting_ids=None):
+    """
+    Returns one row per approved sitting member with their check-in totals
+    for ``day``, read from the DailyProgress rollup in a single query.
+
+    Members without a rollup row (no check-ins that day) come back with
+    zero totals.
+    """
+    memberships = SittingMembership.objects.filter(status="approved")
+    if sitting_ids is not None:
+        memberships = memberships.filter(sitting_id__in=sitting_ids)
+
+    return (
+        memberships
+        .annotate(
+            day_progress=FilteredRelation(
+                "student__daily_progress",
+                condition=Q(student__daily_progress__date=day),
+            ),
+            total=Coalesce("day_progress__total", 0),
+            completed=Coalesce("day_progress__completed", 0),
+        )
+        .values("sitting_id", "student_id", "student__username", "total", "completed")
+        .order_by("sitting_id", "student__username")
+    )
+
+
+def sitting_progress(day):
+    """
+    Returns (sittings, average_progress) where each sitting carries the mean
+    progress of its approved members for ``day``.
+
+    Reads one SittingDailyProgress row per sitting, so the cost does not
+    depend on how many members or check-ins exist.
+    """
+    rows = (
+        Sitting.objects
+        .annotate(day_progress=FilteredRelation("daily_progress", condition=Q(daily_progress__date=day)))
+        .values("id", "name", "day_progress__members", "day_progress__progress_sum")
+    )
+
+    sittings = []
+    overall_sum = 0
+    overall_members = 0
+    for row in rows:
+        members = row["day_progress__members"] or 0
+        progress_sum = row["day_progress__progress_sum"] or 0
+        sittings.append({
+            "id": row["id"],
+            "name": row["name"],
+            "progress": progress_sum / members if members else 0,
+        })
+        overall_sum += progress_sum
+        overall_members += members
+
+    average = overall_sum / overall_members if overall_members else 0
+    return sittings, average
+
+
+def checkins_since(day):
+    """Total check-in rows dated on or after ``day``, summed from the rollup."""
+    return DailyProgress.objects.filter(date__gte=day).aggregate(
+        total=Coalesce(Sum("total"), 0)
+    )["total"]
@@ -0,0 +1,64 @@
+# dashboard/cache.py
+"""
+Cache for the dashboard summary sections.
+
+Each section is stored twice: the payload itself (kept for a long time) and
+a short-lived "fresh" marker. Invalidation only drops the marker, so when a
+section goes stale a single worker (whoever wins the rebuild lock) recomputes
+it while concurrent requests keep serving the previous payload.
+
+Everything lives in the "shared" cache alias, so an invalidation made in a
+Celery task or another web worker is seen by every process.
+"""
+from django.conf import settings
+from django.core.cache import caches
+
+FRESH_TIMEOUT = getattr(settings, "DASHBOARD_CACHE_TIMEOUT", 300)
+STALE_TIMEOUT = 60 * 60 * 24
+LOCK_TIMEOUT = 30
+
+cache = caches["shared"]
+
+
+def section_key(section, day, user_id=None):
+    """Cache key for a dashboard section; keys roll over with the date."""
+    if user_id is None:
+        return f"dashboard:{section}:{day.isoformat()}"
+    return f"dashboard:{section}:{day.isoformat()}:{user_id}"
+
+
+def cached_section(key, build):
+    """
+    Returns the cached payload under `key`, rebuilding it with `build()` when
+    it is missing or stale. Only the worker holding the rebuild lock calls
+    `build()` for a stale payload; the others return the stale copy.
+    """
+    data_key, fresh_key, lock_key = f"{key}:data", f"{key}:fresh", f"{key}:lock"
+
+    cached = cache.get_many([data_key, fresh_key])
+    payload = cached.get(data_key)
+    if payload is not None and fresh_key in cached:
+        return payload
+
+    locked = cache.add(lock_key, True, LOCK_TIMEOUT)
+    if payload is not None and not locked:
+        return payload
+
+    try:
+        payload = build()
+        cache.set(data_key, payload, STALE_TIMEOUT)
+        cache.set(fresh_key, True, FRESH_TIMEOUT)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return payload
+
+
+def invalidate(keys):
+    """Marks the given section keys stale; their payloads are rebuilt on next read."""
+    cache.delete_many([f"{key}:fresh" for key in keys])
+
+
+def invalidate_shared(day):
+    """Marks the role-wide (overall-head and admin) sections for `day` stale."""
+    invalidate([section_key("overall_head", day), section_key("admin", day)])
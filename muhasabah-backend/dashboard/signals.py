@@ -0,0 +1,86 @@
+# dashboard/signals.py
+from datetime import date
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from accounts.models import User
+from checkins.models import DailyCheckIn
+from comments.models import Comment
+from sittings.models import Sitting, SittingMembership
+from sittings.signals import memberships_decided
+from .cache import invalidate, invalidate_shared, section_key
+
+
+def _invalidate_sittings(sitting_ids, today):
+    """Stale the sections that aggregate over members of `sitting_ids`."""
+    head_ids = Sitting.objects.filter(id__in=sitting_ids).values_list("sitting_head_id", flat=True)
+    invalidate([section_key("sitting_head", today, head_id) for head_id in head_ids])
+    invalidate_shared(today)
+
+
+@receiver([post_save, post_delete], sender=DailyCheckIn)
+def invalidate_for_checkin(sender, instance, **kwargs):
+    user_id = instance.user_id
+
+    def run():
+        today = date.today()
+        invalidate([section_key("member", today, user_id)])
+        sitting_ids = SittingMembership.objects.filter(
+            student_id=user_id, status="approved"
+        ).values_list("sitting_id", flat=True)
+        _invalidate_sittings(sitting_ids, today)
+
+    transaction.on_commit(run)
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def invalidate_for_comment(sender, instance, **kwargs):
+    recipient_id = instance.recipient_id
+    transaction.on_commit(lambda: invalidate([section_key("member", date.today(), recipient_id)]))
+
+
+@receiver([post_save, post_delete], sender=SittingMembership)
+def invalidate_for_membership(sender, instance, **kwargs):
+    sitting_id = instance.sitting_id
+    transaction.on_commit(lambda: _invalidate_sittings([sitting_id], date.today()))
+
+
+@receiver(pre_save, sender=Sitting)
+def remember_sitting_head(sender, instance, **kwargs):
+    """Keeps the previous head so a reassignment stales both heads' sections."""
+    instance._previous_head_id = (
+        Sitting.objects.filter(pk=instance.pk).values_list("sitting_head_id", flat=True).first()
+        if instance.pk else None
+    )
+
+
+@receiver([post_save, post_delete], sender=Sitting)
+def invalidate_for_sitting(sender, instance, **kwargs):
+    head_ids = {instance.sitting_head_id, getattr(instance, "_previous_head_id", None)} - {None}
+
+    def run():
+        today = date.today()
+        invalidate([section_key("sitting_head", today, head_id) for head_id in head_ids])
+        invalidate_shared(today)
+
+    transaction.on_commit(run)
+
+
+@receiver(post_save, sender=User)
+def invalidate_for_new_user(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: invalidate_shared(date.today()))
+
+
+@receiver(post_delete, sender=User)
+def invalidate_for_deleted_user(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate_shared(date.today()))
+
+
+@receiver(memberships_decided)
+def invalidate_for_decisions(sender, sitting_ids, student_ids, **kwargs):
+    today = date.today()
+    invalidate([section_key("member", today, student_id) for student_id in student_ids])
+    _invalidate_sittings(sitting_ids, today)
@@ -1,3 +1,170 @@
+from datetime import date
+from unittest import mock
+
+from django.core.cache import caches
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from checkins.models import DailyCheckIn
+from sittings.models import Sitting, SittingMembership
+
+from .aggregates import member_progress, sitting_progress
+from .cache import cache, cached_section, invalidate, section_key
+
+
+def make_user(name, role="student"):
+    return User.objects.create_user(
+        email=f"{name}@example.com", username=name, password="x", role=role
+    )
+
+
+class DashboardAggregateTests(TestCase):
+
+    def setUp(self):
+        for alias in ("default", "shared"):
+            caches[alias].clear()
+        # Approvals queue an email; keep the outbox dispatcher off the broker.
+        patcher = mock.patch("notification.outbox._kick_dispatcher")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.today = date.today()
+        self.head = make_user("head", role="sitting_head")
+        self.fajr = self.make_sitting("Fajr")
+        self.isha = self.make_sitting("Isha")
+        # amina 2/2, bilal 1/2, chioma no check-ins, dawud 1/1; pending is not counted.
+        self.add_member(self.fajr, "amina", [True, True])
+        self.add_member(self.fajr, "bilal", [True, False])
+        self.add_member(self.fajr, "chioma", [])
+        self.add_member(self.isha, "dawud", [True])
+        pending = make_user("pending")
+        SittingMembership.objects.create(student=pending, sitting=self.fajr)
+        with self.captureOnCommitCallbacks(execute=True):
+            DailyCheckIn.objects.create(user=pending, date=self.today, todo_item="Fajr", is_completed=True)
+
+    def make_sitting(self, name):
+        return Sitting.objects.create(
+            name=name, location="Hall", sitting_head=self.head,
+            day_of_week="Monday", max_members=10, status="active",
+        )
+
+    def add_member(self, sitting, name, done):
+        student = make_user(name)
+        with self.captureOnCommitCallbacks(execute=True):
+            SittingMembership.objects.create(student=student, sitting=sitting, status="approved")
+            for index, completed in enumerate(done):
+                DailyCheckIn.objects.create(
+                    user=student, date=self.today, todo_item=f"Todo {index}", is_completed=completed,
+                )
+        return student
+
+    def test_member_progress_counts_approved_members_only(self):
+        with self.assertNumQueries(1):
+            rows = {
+                row["student__username"]: (row["total"], row["completed"])
+                for row in member_progress(self.today, sitting_ids=[self.fajr.id])
+            }
+        self.assertEqual(rows, {"amina": (2, 2), "bilal": (2, 1), "chioma": (0, 0)})
+
+    def test_sitting_progress_averages_members(self):
+        with self.assertNumQueries(1):
+            sittings, average = sitting_progress(self.today)
+        progress = {s["name"]: s["progress"] for s in sittings}
+        self.assertEqual(progress, {"Fajr": 50.0, "Isha": 100.0})
+        self.assertEqual(average, 62.5)
+
+    def test_summary_for_overall_head(self):
+        client = APIClient()
+        client.force_authenticate(make_user("overall", role="overall_head"))
+        data = client.get("/api/dashboard/summary/").json()
+
+        overall = data["overall_head_data"]
+        self.assertEqual(overall["total_sittings"], 2)
+        self.assertEqual(overall["average_progress"], 62.5)
+        self.assertEqual([s["name"] for s in overall["top_sittings"]], ["Isha", "Fajr"])
+        self.assertEqual(data["member_data"]["progress_percent"], 0)
+
+    def test_sitting_head_sees_member_progress(self):
+        client = APIClient()
+        client.force_authenticate(self.head)
+        data = client.get("/api/dashboard/summary/").json()
+        progress = {m["member"]: m["progress_percent"] for m in data["sitting_head_data"]["member_progress"]}
+        self.assertEqual(progress, {"amina": 100.0, "bilal": 50.0, "chioma": 0, "dawud": 100.0})
+
+
+class DashboardCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.today = date.today()
+        self.builds = 0
+        patcher = mock.patch("notification.outbox._kick_dispatcher")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def build(self):
+        self.builds += 1
+        return {"build": self.builds}
+
+    def test_payload_is_reused_until_invalidated(self):
+        key = section_key("member", self.today, 1)
+        self.assertEqual(cached_section(key, self.build), {"build": 1})
+        self.assertEqual(cached_section(key, self.build), {"build": 1})
+        invalidate([key])
+        self.assertEqual(cached_section(key, self.build), {"build": 2})
+
+    def test_stale_payload_is_served_while_another_worker_rebuilds(self):
+        key = section_key("overall_head", self.today)
+        cached_section(key, self.build)
+        invalidate([key])
+        cache.add(f"{key}:lock", True)
+        self.assertEqual(cached_section(key, self.build), {"build": 1})
+        self.assertEqual(self.builds, 1)
+
+    def fresh(self, key):
+        return cache.get(f"{key}:fresh") is not None
+
+    def test_writes_stale_the_affected_sections(self):
+        head = make_user("head", role="sitting_head")
+        other_head = make_user("other", role="sitting_head")
+        student = make_user("amina")
+        sitting = Sitting.objects.create(
+            name="Fajr", location="Hall", sitting_head=head,
+            day_of_week="Monday", max_members=10, status="active",
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            SittingMembership.objects.create(student=student, sitting=sitting, status="approved")
+
+        keys = {
+            "member": section_key("member", self.today, student.id),
+            "head": section_key("sitting_head", self.today, head.id),
+            "other_head": section_key("sitting_head", self.today, other_head.id),
+            "overall": section_key("overall_head", self.today),
+            "admin": section_key("admin", self.today),
+        }
+
+        def fill():
+            for key in keys.values():
+                cached_section(key, self.build)
+
+        fill()
+        with self.captureOnCommitCallbacks(execute=True):
+            DailyCheckIn.objects.create(user=student, date=self.today, todo_item="Fajr")
+        self.assertEqual(
+            {name for name, key in keys.items() if not self.fresh(key)},
+            {"member", "head", "overall", "admin"},
+        )
+
+        fill()
+        sitting.sitting_head = other_head
+        with self.captureOnCommitCallbacks(execute=True):
+            sitting.save()
+        self.assertEqual(
+            {name for name, key in keys.items() if not self.fresh(key)},
+            {"head", "other_head", "overall", "admin"},
+        )
 
-# Create your tests here.
+        fill()
+        with self.captureOnCommitCallbacks(execute=True):
+            make_user("newcomer")
+        self.assertEqual({name for name, key in keys.items() if not self.fresh(key)}, {"overall", "admin"})
@@ -0,0 +1,51 @@
+# muhasabah_backend/bootstrap.py
+"""
+Session bootstrap: everything the frontend needs after login in one request.
+
+Each section reuses the logic behind its standalone endpoint and is served
+from the same caches (role bundle, unread counter, dashboard sections), so
+the request costs one authentication plus a handful of cache reads.
+"""
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from accounts.views import me_data
+from dashboard.views import dashboard_summary
+from navigation.cache import role_bundle
+from notification.counters import unread_count
+
+SECTIONS = {
+    "me": lambda user, bundle: me_data(user),
+    "permissions": lambda user, bundle: bundle["permissions"],
+    "menu": lambda user, bundle: bundle["menu"],
+    "unread_count": lambda user, bundle: unread_count(user.id),
+    "dashboard": lambda user, bundle: dashboard_summary(user),
+}
+
+
+class BootstrapView(APIView):
+    """
+    GET /api/bootstrap/?sections=me,menu
+    Returns the requested sections (all of them by default):
+    me, permissions, menu, unread_count, dashboard.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        requested = request.query_params.get("sections")
+        if requested:
+            names = [name.strip() for name in requested.split(",") if name.strip()]
+            unknown = sorted(set(names) - SECTIONS.keys())
+            if unknown:
+                raise ValidationError({"sections": f"Unknown sections: {', '.join(unknown)}."})
+        else:
+            names = list(SECTIONS)
+
+        user = request.user
+        bundle = None
+        if "permissions" in names or "menu" in names:
+            _, bundle = role_bundle(user.role)
+
+        return Response({name: SECTIONS[name](user, bundle) for name in names})
@@ -52,6 +52,7 @@ LOCAL_APPS = [
     "navigation",
     "notification",
     "comments",
+    "dashboard",
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
@@ -94,6 +95,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "muhasabah_backend.wsgi.application"
+ASGI_APPLICATION = "muhasabah_backend.asgi.application"
 
 # ----------------------------------------------------------------------------- #
 #                                DATABASE                                        #
@@ -110,6 +112,80 @@ DATABASES = {
     }
 }
 
+# ----------------------------------------------------------------------------- #
+#                                  CACHE                                        #
+# ----------------------------------------------------------------------------- #
+
+# Local memory by default; set CACHE_REDIS_URL to share the cache between workers.
+CACHE_REDIS_URL = config("CACHE_REDIS_URL", default="")
+
+# Entries every web worker and Celery process must agree on (dashboard
+# payloads, navigation version stamps and their invalidations). Uses Redis when CACHE_REDIS_URL is set,
+# otherwise a database table: run `python manage.py createcachetable`.
+SHARED_CACHE_TABLE = "shared_cache"
+
+# Cached users behind JWT authentication. Without CACHE_REDIS_URL each process
+# keeps its own copy, so a deactivation or token revocation made elsewhere
+# takes up to AUTH_USER_CACHE_TIMEOUT seconds to reach it.
+
+# Auth throttle counters stay per-process unless THROTTLE_REDIS_URL is set;
+# production needs it, or every worker enforces its own copy of the limits.
+THROTTLE_REDIS_URL = config("THROTTLE_REDIS_URL", default="")
+
+# The local-memory fallback culls least recently used keys once it holds this
+# many. Windows last at most an hour, so expired ones go first and a live
+# window is only dropped if more than this many are live at once.
+THROTTLE_CACHE_MAX_ENTRIES = config("THROTTLE_CACHE_MAX_ENTRIES", default=1_000_000, cast=int)
+
+CACHES = {
+    "default": (
+        {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": CACHE_REDIS_URL}
+        if CACHE_REDIS_URL
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    ),
+    "shared": (
+        {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": CACHE_REDIS_URL}
+        if CACHE_REDIS_URL
+        else {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": SHARED_CACHE_TABLE}
+    ),
+    "auth": (
+        {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": CACHE_REDIS_URL}
+        if CACHE_REDIS_URL
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "auth"}
+    ),
+    "throttle": (
+        {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": THROTTLE_REDIS_URL}
+        if THROTTLE_REDIS_URL
+        else {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "throttle",
+            "OPTIONS": {"MAX_ENTRIES": THROTTLE_CACHE_MAX_ENTRIES},
+        }
+    ),
+}
+
+DASHBOARD_CACHE_TIMEOUT = config("DASHBOARD_CACHE_TIMEOUT", default=300, cast=int)
+
+# Seconds a process trusts its in-memory menu/permission bundle before
+# re-checking the shared version stamp.
+NAVIGATION_LOCAL_TTL = config("NAVIGATION_LOCAL_TTL", default=5, cast=int)
+
+# ----------------------------------------------------------------------------- #
+#                          CHANNELS (REAL-TIME PUSH)                            #
+# ----------------------------------------------------------------------------- #
+
+# In-process fan-out by default; set CHANNEL_REDIS_URL when running several
+# ASGI workers so events reach clients connected to any of them.
+CHANNEL_REDIS_URL = config("CHANNEL_REDIS_URL", default="")
+
+CHANNEL_LAYERS = {
+    "default": (
+        {"BACKEND": "channels_redis.core.RedisChannelLayer", "CONFIG": {"hosts": [CHANNEL_REDIS_URL]}}
+        if CHANNEL_REDIS_URL
+        else {"BACKEND": "channels.layers.InMemoryChannelLayer"}
+    ),
+}
+
 # ----------------------------------------------------------------------------- #
 #                         AUTH & USER MODEL                                     #
 # ----------------------------------------------------------------------------- #
@@ -132,10 +208,25 @@ REST_USE_JWT = True
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.authentication.CachedJWTAuthentication",
     ),
 }
 
+# Seconds an authenticated User is served from the "auth" cache (dropped on save).
+AUTH_USER_CACHE_TIMEOUT = config("AUTH_USER_CACHE_TIMEOUT", default=60, cast=int)
+
+# Rows per batch when accounts.tasks.purge_expired_tokens clears the JWT blacklist tables.
+TOKEN_PURGE_BATCH_SIZE = config("TOKEN_PURGE_BATCH_SIZE", default=5000, cast=int)
+
+# Budgets for the auth endpoints ("<count>/<period>", fixed windows).
+# "hash" covers password-hashing endpoints, "email" the ones that send mail.
+AUTH_THROTTLE_RATES = {
+    "hash_ip": config("THROTTLE_HASH_IP", default="30/min"),
+    "hash_account": config("THROTTLE_HASH_ACCOUNT", default="10/min"),
+    "email_ip": config("THROTTLE_EMAIL_IP", default="10/hour"),
+    "email_account": config("THROTTLE_EMAIL_ACCOUNT", default="3/hour"),
+}
+
 # ----------------------------------------------------------------------------- #
 #                             STATIC & MEDIA FILES                              #
 # ----------------------------------------------------------------------------- #
@@ -173,6 +264,14 @@ EMAIL_USE_TLS = config("EMAIL_USE_TLS", cast=bool)
 EMAIL_HOST_USER = config("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = config("EMAIL_HOST_PASSWORD")
 
+# Outbox dispatcher: messages per batch, delivery attempts before
+# dead-lettering, base retry delay in seconds (doubles per attempt), and
+# seconds before a batch claimed by a crashed worker is claimed again.
+OUTBOX_BATCH_SIZE = config("OUTBOX_BATCH_SIZE", default=100, cast=int)
+OUTBOX_MAX_ATTEMPTS = config("OUTBOX_MAX_ATTEMPTS", default=5, cast=int)
+OUTBOX_RETRY_BACKOFF = config("OUTBOX_RETRY_BACKOFF", default=60, cast=int)
+OUTBOX_CLAIM_TIMEOUT = config("OUTBOX_CLAIM_TIMEOUT", default=600, cast=int)
+
 # ----------------------------------------------------------------------------- #
 #                          CELERY CONFIGURATION                                 #
 # ----------------------------------------------------------------------------- #
@@ -180,12 +279,35 @@ EMAIL_HOST_PASSWORD = config("EMAIL_HOST_PASSWORD")
 CELERY_BROKER_URL = "redis://localhost:6379"
 CELERY_TIMEZONE = "Africa/Lagos"
 
+# Users per shard when fanning out the midnight check-in generation.
+CHECKIN_SHARD_SIZE = config("CHECKIN_SHARD_SIZE", default=5000, cast=int)
+
+# Create each user's check-ins on first read instead of at midnight.
+CHECKINS_LAZY_MATERIALIZATION = config("CHECKINS_LAZY_MATERIALIZATION", default=False, cast=bool)
+
+# Notification retention, enforced nightly by notification.tasks.prune_notifications.
+# Only read notifications are pruned: those older than the retention window,
+# then anything past each user's newest MAX_READ_PER_USER. Deletes run in
+# batches of PRUNE_BATCH_SIZE rows. Unread notifications are kept forever.
+NOTIFICATION_RETENTION_DAYS = config("NOTIFICATION_RETENTION_DAYS", default=90, cast=int)
+NOTIFICATION_MAX_READ_PER_USER = config("NOTIFICATION_MAX_READ_PER_USER", default=200, cast=int)
+NOTIFICATION_PRUNE_BATCH_SIZE = config("NOTIFICATION_PRUNE_BATCH_SIZE", default=5000, cast=int)
+
 # ----------------------------------------------------------------------------- #
 #                            WHATSAPP (TERMII)                                  #
 # ----------------------------------------------------------------------------- #
 
 TERMII_API_KEY = config("TERMII_API_KEY")
 TERMII_SENDER_ID = config("TERMII_SENDER_ID")
+TERMII_BASE_URL = config("TERMII_BASE_URL", default="https://api.ng.termii.com")
+
+# Delivery client: pool size / concurrency, provider quota and retry policy.
+WHATSAPP_MAX_WORKERS = config("WHATSAPP_MAX_WORKERS", default=8, cast=int)
+WHATSAPP_RATE_PER_SECOND = config("WHATSAPP_RATE_PER_SECOND", default=10, cast=float)
+WHATSAPP_BURST = config("WHATSAPP_BURST", default=10, cast=int)
+WHATSAPP_MAX_RETRIES = config("WHATSAPP_MAX_RETRIES", default=3, cast=int)
+WHATSAPP_RETRY_BACKOFF = config("WHATSAPP_RETRY_BACKOFF", default=0.5, cast=float)
+WHATSAPP_TIMEOUT = config("WHATSAPP_TIMEOUT", default=10, cast=float)
 
 # ----------------------------------------------------------------------------- #
 #                           SOCIAL PROVIDERS                                    #
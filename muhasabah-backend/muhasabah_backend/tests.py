@@ -0,0 +1,53 @@
+from django.core.cache import caches
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from navigation import cache
+from navigation.models import MenuItem
+from notification.models import Notification
+
+
+def make_user(name, role="student"):
+    return User.objects.create_user(
+        email=f"{name}@example.com", username=name, password="x", role=role
+    )
+
+
+class BootstrapTests(TestCase):
+
+    def setUp(self):
+        for alias in ("default", "shared"):
+            caches[alias].clear()
+        cache._local.clear()
+        self.user = make_user("amina")
+        MenuItem.objects.create(title="Dashboard", path="/dashboard", role="student")
+        Notification.objects.create(user=self.user, message="Welcome")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_returns_every_section_by_default(self):
+        response = self.client.get("/api/bootstrap/")
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(set(body), {"me", "permissions", "menu", "unread_count", "dashboard"})
+        self.assertEqual(body["me"]["username"], "amina")
+        self.assertEqual([item["title"] for item in body["menu"]], ["Dashboard"])
+        self.assertEqual(body["permissions"], ["dashboard.view", "checkins.submit", "todos.view"])
+        self.assertEqual(body["unread_count"], 1)
+        self.assertIn("member_data", body["dashboard"])
+
+    def test_sections_can_be_picked(self):
+        response = self.client.get("/api/bootstrap/", {"sections": "me, unread_count"})
+        self.assertEqual(set(response.json()), {"me", "unread_count"})
+
+        with self.assertNumQueries(1):
+            self.client.get("/api/bootstrap/", {"sections": "unread_count"})
+
+    def test_unknown_sections_are_rejected(self):
+        response = self.client.get("/api/bootstrap/", {"sections": "me,inbox,zakat"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"sections": "Unknown sections: inbox, zakat."})
+
+    def test_requires_authentication(self):
+        self.assertEqual(APIClient().get("/api/bootstrap/").status_code, 401)
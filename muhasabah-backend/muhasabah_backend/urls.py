@@ -5,6 +5,8 @@ from django.urls import path, include
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 
+from .bootstrap import BootstrapView
+
 schema_view = get_schema_view(
     openapi.Info(title="Muhasabah API", default_version='v1'),
     public=True,
@@ -24,6 +26,7 @@ urlpatterns = [
     path('api/notification/', include('notification.urls')),
     path('api/dashboard/', include('dashboard.urls')),
     path('api/comments/', include('comments.urls')),
+    path('api/bootstrap/', BootstrapView.as_view(), name='bootstrap'),
 
 
     # 🌐 Social Auth via Google (Allauth)
@@ -0,0 +1,102 @@
+# navigation/cache.py
+"""
+Per-role cache of the navigation menu and permission bundle.
+
+Bundles are built once per role and version, kept in the "shared" cache
+alias (Redis, or the database table when Redis is not configured) and also
+held in-process for NAVIGATION_LOCAL_TTL seconds so most requests skip
+the network round trip entirely. Any MenuItem change bumps the version,
+which every process picks up on its next check. The version doubles as the
+ETag clients send back in If-None-Match.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+
+from accounts.permissions import ROLE_PERMISSIONS
+from .models import MenuItem
+from .serializers import MenuItemSerializer
+
+VERSION_KEY = "navigation:version"
+BUNDLE_TIMEOUT = 60 * 60 * 24
+
+# An expired stamp is simply replaced by a new one; clients refetch once.
+VERSION_TIMEOUT = BUNDLE_TIMEOUT
+
+cache = caches["shared"]
+
+_local = {}
+_local_lock = threading.Lock()
+
+
+def current_version():
+    """
+    The shared version stamp. It is time-based so a flushed cache never
+    hands out a stamp that earlier (different) content was served under.
+    """
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = f"{time.time_ns():x}"
+        if not cache.add(VERSION_KEY, version, VERSION_TIMEOUT):
+            version = cache.get(VERSION_KEY, version)
+    return version
+
+
+def build_bundle(role):
+    items = MenuItem.objects.filter(role=role, visible=True).order_by("order")
+    return {
+        "role": role,
+        "menu": MenuItemSerializer(items, many=True).data,
+        "permissions": ROLE_PERMISSIONS.get(role, []),
+    }
+
+
+def role_bundle(role):
+    """
+    Returns (version, bundle) for `role`: {"role", "menu", "permissions"}.
+    """
+    now = time.monotonic()
+    with _local_lock:
+        entry = _local.get(role)
+    if entry and now - entry[0] < settings.NAVIGATION_LOCAL_TTL:
+        return entry[1], entry[2]
+
+    version = current_version()
+    if entry and entry[1] == version:
+        bundle = entry[2]
+    else:
+        key = f"navigation:bundle:{version}:{role}"
+        bundle = cache.get(key)
+        if bundle is None:
+            bundle = build_bundle(role)
+            cache.set(key, bundle, BUNDLE_TIMEOUT)
+
+    with _local_lock:
+        _local[role] = (now, version, bundle)
+    return version, bundle
+
+
+def invalidate():
+    """Bumps the shared version and drops this process's copies."""
+    cache.set(VERSION_KEY, f"{time.time_ns():x}", VERSION_TIMEOUT)
+    with _local_lock:
+        _local.clear()
+
+
+def etag_response(request, version, role, data):
+    """
+    Responds with `data` tagged by the bundle version, or 304 when the
+    client's If-None-Match already carries it.
+    """
+    etag = f'"{version}-{role}"'
+    if etag in request.headers.get("If-None-Match", ""):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(data)
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
@@ -0,0 +1,12 @@
+# navigation/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate
+from .models import MenuItem
+
+
+@receiver([post_save, post_delete], sender=MenuItem)
+def invalidate_menu_cache(sender, instance, **kwargs):
+    transaction.on_commit(invalidate)
@@ -1,3 +1,75 @@
+from django.core.cache import caches
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from accounts.models import User
+
+from . import cache
+from .models import MenuItem
+
+
+def make_user(name, role="student"):
+    return User.objects.create_user(
+        email=f"{name}@example.com", username=name, password="x", role=role
+    )
+
+
+class MenuCacheTests(TestCase):
+
+    def setUp(self):
+        caches["shared"].clear()
+        cache._local.clear()
+        MenuItem.objects.create(title="Sittings", path="/sittings", role="student", order=2)
+        MenuItem.objects.create(title="Dashboard", path="/dashboard", role="student", order=1)
+        MenuItem.objects.create(title="Hidden", path="/hidden", role="student", visible=False)
+        MenuItem.objects.create(title="Members", path="/members", role="sitting_head")
+        self.client = APIClient()
+        self.client.force_authenticate(make_user("amina"))
+
+    def menu(self, **headers):
+        return self.client.get("/api/navigation/menu/", headers=headers)
+
+    def test_menu_is_the_roles_visible_items_in_order(self):
+        response = self.menu()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item["title"] for item in response.json()], ["Dashboard", "Sittings"])
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+
+    def test_bundle_is_built_once_per_version(self):
+        self.menu()
+        with self.assertNumQueries(0):
+            self.menu()
+
+        # Another process only reads the shared copy.
+        cache._local.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/accounts/permissions/")
+        self.assertFalse([q["sql"] for q in queries if "navigation_menuitem" in q["sql"]])
+
+    def test_matching_etag_gets_304(self):
+        etag = self.menu()["ETag"]
+        response = self.menu(if_none_match=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+        permissions = self.client.get("/api/accounts/permissions/", headers={"if-none-match": etag})
+        self.assertEqual(permissions.status_code, 304)
+
+    def test_menu_changes_bump_the_version(self):
+        etag = self.menu()["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            MenuItem.objects.filter(title="Hidden").get().delete()
+            MenuItem.objects.create(title="Todos", path="/todos", role="student", order=3)
+
+        response = self.menu(if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual([item["title"] for item in response.json()], ["Dashboard", "Sittings", "Todos"])
+
+    def test_permissions_come_from_the_same_bundle(self):
+        response = self.client.get("/api/accounts/permissions/")
+        self.assertEqual(response.json(), {
+            "role": "student", "permissions": ["dashboard.view", "checkins.submit", "todos.view"],
+        })
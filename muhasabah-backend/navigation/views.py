@@ -2,24 +2,18 @@
 
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
-from rest_framework.response import Response
-from .models import MenuItem
-from .serializers import MenuItemSerializer
+from .cache import etag_response, role_bundle
 
 
 class MenuListView(APIView):
     """
     Returns a list of menu items for the currently authenticated user's role.
     Menu items are filtered by `visible=True` and ordered by `order`.
+    Served from the per-role cache; supports If-None-Match.
     """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         role = getattr(request.user, "role", None)
-
-        # Retrieve menu items for the user's role
-        items = MenuItem.objects.filter(role=role, visible=True).order_by("order")
-
-        # Serialize results
-        serializer = MenuItemSerializer(items, many=True)
-        return Response(serializer.data)
+        version, bundle = role_bundle(role)
+        return etag_response(request, version, role, bundle["menu"])
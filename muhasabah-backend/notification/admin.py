@@ -3,10 +3,17 @@ from django.contrib import admin
 # Register your models here.
 # notifications/admin.py
 from django.contrib import admin
-from .models import Notification
+from .models import Notification, OutboxMessage
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
     list_display = ('user','message','is_read','created_at')
     list_filter = ('is_read',)
     search_fields = ('user__email','message')
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ('channel','recipient','subject','status','attempts','next_attempt_at','sent_at')
+    list_filter = ('channel','status')
+    search_fields = ('recipient','subject','dedup_key')
@@ -0,0 +1,43 @@
+# notifications/consumers.py
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .counters import unread_count
+from .push import user_group
+
+
+class NotificationConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Pushes new notifications and unread-count deltas to the authenticated
+    user. The current unread count is sent once on connect; after that the
+    client applies deltas instead of polling the list endpoint.
+    """
+
+    async def connect(self):
+        user = self.scope.get("user")
+        if user is None or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+
+        self.group = user_group(user.id)
+        await self.channel_layer.group_add(self.group, self.channel_name)
+        await self.accept()
+        await self.send_json({"type": "unread_count", "unread_count": await self.unread_count(user)})
+
+    async def disconnect(self, code):
+        if hasattr(self, "group"):
+            await self.channel_layer.group_discard(self.group, self.channel_name)
+
+    async def notification_created(self, event):
+        await self.send_json({
+            "type": "notification",
+            "notification": event["notification"],
+            "unread_delta": event["unread_delta"],
+        })
+
+    async def notification_unread(self, event):
+        await self.send_json({"type": "unread_delta", "unread_delta": event["unread_delta"]})
+
+    @database_sync_to_async
+    def unread_count(self, user):
+        return unread_count(user.id)
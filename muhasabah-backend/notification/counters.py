@@ -0,0 +1,61 @@
+# notifications/counters.py
+"""
+Maintenance of the per-user UnreadCounter.
+
+Adjustments are a single conditional UPDATE and run inside the caller's
+transaction. A missing counter is initialised from a COUNT the first time
+it is needed, which also backfills users created before the counter existed.
+Model signals follow saves and deletes; code that creates or marks
+notifications in bulk must call `adjust_unread` itself, and the nightly
+`recount_unread` task corrects whatever slips past both.
+"""
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Notification, UnreadCounter
+
+
+def adjust_unread(user_id, delta, create=True):
+    """
+    Adds `delta` to the user's counter. With create=False a missing counter
+    is left missing (its first read counts from scratch anyway), which is
+    what deletes need while the user row itself may be going away.
+    """
+    if not delta:
+        return
+    updated = UnreadCounter.objects.filter(user_id=user_id).update(
+        unread=Greatest(F("unread") + delta, 0)
+    )
+    if not updated and create:
+        # The initial COUNT already reflects this transaction's change.
+        _, created = UnreadCounter.objects.get_or_create(
+            user_id=user_id, defaults={"unread": _count_unread(user_id)}
+        )
+        if not created:
+            adjust_unread(user_id, delta)
+
+
+def unread_count(user_id):
+    unread = UnreadCounter.objects.filter(user_id=user_id).values_list("unread", flat=True).first()
+    if unread is None:
+        counter, _ = UnreadCounter.objects.get_or_create(
+            user_id=user_id, defaults={"unread": _count_unread(user_id)}
+        )
+        unread = counter.unread
+    return unread
+
+
+def recount_unread():
+    """Resets every counter to its true COUNT in one UPDATE; returns rows updated."""
+    actual = (
+        Notification.objects
+        .filter(user_id=OuterRef("user_id"))
+        .values("user_id")
+        .annotate(n=Count("id", filter=Q(is_read=False)))
+        .values("n")
+    )
+    return UnreadCounter.objects.update(unread=Coalesce(Subquery(actual), 0))
+
+
+def _count_unread(user_id):
+    return Notification.objects.filter(user_id=user_id, is_read=False).count()
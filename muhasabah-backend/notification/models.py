@@ -2,6 +2,7 @@
 
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 
 class Notification(models.Model):
@@ -28,9 +29,81 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["user", "-created_at", "-id"], name="notification_user_feed_idx"),
+        ]
         verbose_name = "Notification"
         verbose_name_plural = "Notifications"
 
     def __str__(self):
         title_part = f"{self.title} - " if self.title else ""
         return f"Notification to {self.user.email}: {title_part}{self.message[:40]}"
+
+
+class UnreadCounter(models.Model):
+    """
+    Denormalized count of a user's unread notifications, updated in the same
+    transaction as the notification change so reading it is a single row hit.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="unread_counter"
+    )
+    unread = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Unread Counter"
+        verbose_name_plural = "Unread Counters"
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread} unread"
+
+
+class OutboxMessage(models.Model):
+    """
+    An outgoing email or WhatsApp message. Rows are written in the same
+    transaction as the change that caused them and delivered later by the
+    `dispatch_outbox` task, which claims them (`sending`) before delivery,
+    retries failures with backoff and marks messages dead once they run out
+    of attempts.
+    """
+
+    class Channel(models.TextChoices):
+        EMAIL = "email", "Email"
+        WHATSAPP = "whatsapp", "WhatsApp"
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        SENDING = "sending", "Sending"
+        SENT = "sent", "Sent"
+        DEAD = "dead", "Dead"
+
+    channel = models.CharField(max_length=10, choices=Channel.choices)
+    recipient = models.CharField(max_length=254)
+    subject = models.CharField(max_length=255, blank=True)
+    body = models.TextField()
+    dedup_key = models.CharField(
+        max_length=200,
+        unique=True,
+        null=True,
+        blank=True,
+        help_text="Messages sharing a dedup key are only enqueued once."
+    )
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+        verbose_name = "Outbox Message"
+        verbose_name_plural = "Outbox Messages"
+
+    def __str__(self):
+        return f"{self.channel} to {self.recipient} ({self.status})"
@@ -0,0 +1,58 @@
+# notifications/outbox.py
+"""
+Enqueue helpers for the notification outbox.
+
+Call these inside the transaction that causes the message; the rows commit
+(or roll back) with it, and `dispatch_outbox` is kicked once it commits.
+Request handlers never talk to SMTP or Termii directly.
+"""
+from django.db import transaction
+
+from .models import OutboxMessage
+
+BATCH_SIZE = 500
+
+
+def enqueue(messages):
+    """
+    Saves unsaved OutboxMessage rows in bulk, skipping any whose dedup key
+    is already queued, and schedules a dispatch after commit.
+    """
+    messages = list(messages)
+    if not messages:
+        return
+    OutboxMessage.objects.bulk_create(messages, batch_size=BATCH_SIZE, ignore_conflicts=True)
+    transaction.on_commit(_kick_dispatcher)
+
+
+def email_message(recipient, subject, body, dedup_key=None):
+    return OutboxMessage(
+        channel=OutboxMessage.Channel.EMAIL,
+        recipient=recipient,
+        subject=subject,
+        body=body,
+        dedup_key=dedup_key,
+    )
+
+
+def whatsapp_message(recipient, body, dedup_key=None):
+    return OutboxMessage(
+        channel=OutboxMessage.Channel.WHATSAPP,
+        recipient=str(recipient),
+        body=body,
+        dedup_key=dedup_key,
+    )
+
+
+def enqueue_email(recipient, subject, body, dedup_key=None):
+    enqueue([email_message(recipient, subject, body, dedup_key)])
+
+
+def enqueue_whatsapp(recipient, body, dedup_key=None):
+    enqueue([whatsapp_message(recipient, body, dedup_key)])
+
+
+def _kick_dispatcher():
+    from .tasks import dispatch_outbox
+
+    dispatch_outbox.delay()
@@ -0,0 +1,37 @@
+# notifications/push.py
+"""
+Publishes notification events to a user's connected WebSocket clients.
+
+Events go through the Channels layer configured in CHANNEL_LAYERS: the
+in-memory layer fans out within one process, the Redis layer across all
+ASGI workers. Publishing never touches the database.
+"""
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+
+def user_group(user_id):
+    return f"notifications.user.{user_id}"
+
+
+def push_to_user(user_id, event):
+    layer = get_channel_layer()
+    if layer is not None:
+        async_to_sync(layer.group_send)(user_group(user_id), event)
+
+
+def push_notification(notification):
+    """Sends a new notification and a +1 unread delta (if it is unread)."""
+    from .serializers import NotificationSerializer
+
+    push_to_user(notification.user_id, {
+        "type": "notification.created",
+        "notification": NotificationSerializer(notification).data,
+        "unread_delta": 0 if notification.is_read else 1,
+    })
+
+
+def push_unread_delta(user_id, delta):
+    """Tells the user's clients their unread count changed by `delta`."""
+    if delta:
+        push_to_user(user_id, {"type": "notification.unread", "unread_delta": delta})
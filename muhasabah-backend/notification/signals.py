@@ -0,0 +1,36 @@
+# notifications/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .counters import adjust_unread
+from .models import Notification
+from .push import push_notification
+
+
+@receiver(pre_save, sender=Notification)
+def remember_read_state(sender, instance, **kwargs):
+    """Keeps the stored `is_read` so edits (e.g. in the admin) move the counter."""
+    instance._was_read = (
+        Notification.objects.filter(pk=instance.pk).values_list("is_read", flat=True).first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Notification)
+def track_new_notification(sender, instance, created, **kwargs):
+    if created:
+        if not instance.is_read:
+            adjust_unread(instance.user_id, 1)
+        transaction.on_commit(lambda: push_notification(instance))
+        return
+
+    was_read = getattr(instance, "_was_read", None)
+    if was_read is not None and was_read != instance.is_read:
+        adjust_unread(instance.user_id, -1 if instance.is_read else 1)
+
+
+@receiver(post_delete, sender=Notification)
+def track_deleted_notification(sender, instance, **kwargs):
+    if not instance.is_read:
+        adjust_unread(instance.user_id, -1, create=False)
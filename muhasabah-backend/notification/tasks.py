@@ -0,0 +1,225 @@
+# notifications/tasks.py
+import logging
+import time
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F, Max, Min, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from checkins.whatsapp import get_client, is_retryable, is_success
+from .counters import recount_unread
+from .models import Notification, OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCHES_PER_RUN = 50
+
+
+@shared_task
+def dispatch_outbox():
+    """
+    Drains due outbox messages in batches. Each batch is claimed in a short
+    transaction (SELECT ... FOR UPDATE SKIP LOCKED, then marked `sending`),
+    so concurrent dispatchers never pick the same row and no locks are held
+    while talking to SMTP or Termii. Every message is marked sent, retried
+    or dead on its own as soon as its delivery finishes, so a failure
+    partway through a batch never re-sends what already went out.
+    Failures are retried with exponential backoff until OUTBOX_MAX_ATTEMPTS,
+    then dead-lettered. WhatsApp failures Termii may already have delivered
+    (5xx, no response) are dead-lettered at once rather than sent twice.
+    Rows left `sending` by a crashed worker are claimed again after
+    OUTBOX_CLAIM_TIMEOUT. Schedule it every minute as well, so retries are
+    picked up.
+    """
+    started = time.monotonic()
+    report = {"sent": 0, "retried": 0, "dead": 0, "whatsapp": {"sent": 0, "failed": 0, "seconds": 0}}
+
+    for _ in range(MAX_BATCHES_PER_RUN):
+        batch = _claim_batch()
+        if not batch:
+            break
+        _deliver(batch, report)
+
+    report["seconds"] = round(time.monotonic() - started, 3)
+    report["whatsapp"]["seconds"] = round(report["whatsapp"]["seconds"], 3)
+    if report["sent"] or report["retried"] or report["dead"]:
+        logger.info(
+            "Outbox dispatch: %(sent)s sent, %(retried)s to retry, %(dead)s dead in %(seconds)ss",
+            report,
+        )
+    return report
+
+
+def _claim_batch():
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.OUTBOX_CLAIM_TIMEOUT)
+    with transaction.atomic():
+        batch = list(
+            OutboxMessage.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                Q(status=OutboxMessage.Status.PENDING, next_attempt_at__lte=now)
+                | Q(status=OutboxMessage.Status.SENDING, claimed_at__lt=stale)
+            )
+            .order_by("id")[:settings.OUTBOX_BATCH_SIZE]
+        )
+        OutboxMessage.objects.filter(id__in=[m.pk for m in batch]).update(
+            status=OutboxMessage.Status.SENDING, claimed_at=now
+        )
+    return batch
+
+
+def _deliver(batch, report):
+    emails = [m for m in batch if m.channel == OutboxMessage.Channel.EMAIL]
+    if emails:
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception as e:
+            for message in emails:
+                _record(message, str(e), report)
+        else:
+            try:
+                for message in emails:
+                    try:
+                        EmailMessage(
+                            subject=message.subject,
+                            body=message.body,
+                            from_email=settings.EMAIL_HOST_USER,
+                            to=[message.recipient],
+                            connection=connection,
+                        ).send()
+                    except Exception as e:
+                        _record(message, str(e), report)
+                    else:
+                        _record(message, None, report)
+            finally:
+                connection.close()
+
+    whatsapps = [m for m in batch if m.channel == OutboxMessage.Channel.WHATSAPP]
+    if whatsapps:
+        def record(index, status):
+            message = whatsapps[index]
+            if is_success(status):
+                _record(message, None, report)
+            else:
+                _record(message, f"Termii responded {status}", report, final=not is_retryable(status))
+
+        # send_batch logs each batch's throughput; the run's totals go in the report.
+        batch_report = get_client().send_batch([(m.recipient, m.body) for m in whatsapps], on_result=record)
+        for key in ("sent", "failed", "seconds"):
+            report["whatsapp"][key] += batch_report[key]
+
+
+def _record(message, error, report, final=False):
+    """Marks one claimed message sent (no `error`), due for a retry, or dead."""
+    now = timezone.now()
+    message.attempts += 1
+    if error is None:
+        message.status = OutboxMessage.Status.SENT
+        message.sent_at = now
+        message.last_error = ""
+        report["sent"] += 1
+    elif final or message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        message.status = OutboxMessage.Status.DEAD
+        message.last_error = error
+        report["dead"] += 1
+    else:
+        delay = settings.OUTBOX_RETRY_BACKOFF * (2 ** (message.attempts - 1))
+        message.status = OutboxMessage.Status.PENDING
+        message.next_attempt_at = now + timedelta(seconds=delay)
+        message.last_error = error
+        report["retried"] += 1
+
+    message.save(update_fields=["status", "attempts", "next_attempt_at", "last_error", "sent_at"])
+
+
+@shared_task
+def recount_unread_counters():
+    """
+    Nightly safety net for the denormalized unread counters: recomputes all
+    of them from Notification, fixing drift from writes that bypass the
+    model signals (queryset updates, raw SQL).
+    """
+    started = time.monotonic()
+    counters = recount_unread()
+    logger.info("Recounted %s unread counters in %ss", counters, round(time.monotonic() - started, 3))
+    return counters
+
+
+@shared_task
+def prune_notifications():
+    """
+    Enforces the notification retention policy (run nightly):
+    - read notifications older than NOTIFICATION_RETENTION_DAYS are deleted
+    - each user keeps at most NOTIFICATION_MAX_READ_PER_USER read notifications
+    Unread notifications are never pruned. Deletes run in bounded batches,
+    each its own short statement, so no long locks are held.
+    """
+    started = time.monotonic()
+    batch_size = settings.NOTIFICATION_PRUNE_BATCH_SIZE
+    cutoff = timezone.now() - timedelta(days=settings.NOTIFICATION_RETENTION_DAYS)
+
+    # 1. Expired read notifications, walked in id ranges.
+    expired = 0
+    bounds = Notification.objects.filter(is_read=True, created_at__lt=cutoff).aggregate(
+        first=Min("id"), last=Max("id")
+    )
+    if bounds["first"] is not None:
+        start = bounds["first"]
+        while start <= bounds["last"]:
+            expired += _delete_read(Notification.objects.filter(
+                id__gte=start, id__lt=start + batch_size, created_at__lt=cutoff
+            ))
+            start += batch_size
+
+    # 2. Read notifications beyond each user's cap, newest kept.
+    overflow = 0
+    excess_ids = (
+        Notification.objects
+        .filter(is_read=True)
+        .annotate(rank=Window(
+            RowNumber(),
+            partition_by=[F("user_id")],
+            order_by=[F("created_at").desc(), F("id").desc()],
+        ))
+        .filter(rank__gt=settings.NOTIFICATION_MAX_READ_PER_USER)
+        .values_list("id", flat=True)
+    )
+    batch = []
+    for notification_id in excess_ids.iterator(chunk_size=batch_size):
+        batch.append(notification_id)
+        if len(batch) >= batch_size:
+            overflow += _delete_read(Notification.objects.filter(id__in=batch))
+            batch = []
+    if batch:
+        overflow += _delete_read(Notification.objects.filter(id__in=batch))
+
+    report = {
+        "expired": expired,
+        "over_cap": overflow,
+        "seconds": round(time.monotonic() - started, 3),
+    }
+    logger.info(
+        "Pruned notifications: %(expired)s expired, %(over_cap)s over the per-user cap in %(seconds)ss",
+        report,
+    )
+    return report
+
+
+def _delete_read(queryset):
+    """
+    Deletes the read rows of `queryset` in one DELETE statement.
+
+    QuerySet.delete() would load every row to send post_delete, but the
+    only receiver adjusts unread counters and these rows are all read, so
+    the counters are already right. Nothing references Notification, so
+    there is no cascade to collect either.
+    """
+    queryset = queryset.filter(is_read=True)
+    return queryset._raw_delete(queryset.db)
@@ -1,3 +1,225 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.core import mail
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from accounts.serializers import CustomTokenObtainPairSerializer
+from checkins.whatsapp import UNCONFIRMED, WhatsAppClient
+from muhasabah_backend.asgi import application
+from . import tasks
+from .counters import recount_unread, unread_count
+from .models import Notification, OutboxMessage, UnreadCounter
+from .outbox import email_message, enqueue, enqueue_email, whatsapp_message
+
+
+def make_user(name, role="student"):
+    return User.objects.create_user(
+        email=f"{name}@example.com", username=name, password="x", role=role
+    )
+
+
+class NotificationPushTests(TransactionTestCase):
+    # Autocommit, so the on-commit push runs as soon as a row is created.
+
+    def setUp(self):
+        self.user = make_user("amina")
+        Notification.objects.create(user=self.user, message="Welcome")
+        self.token = str(CustomTokenObtainPairSerializer.get_token(self.user).access_token)
+
+    async def test_connect_sends_the_count_then_new_notifications(self):
+        communicator = WebsocketCommunicator(application, f"/ws/notifications/?token={self.token}")
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        self.assertEqual(await communicator.receive_json_from(), {"type": "unread_count", "unread_count": 1})
+
+        await sync_to_async(Notification.objects.create)(user=self.user, message="Your sitting starts soon")
+        event = await communicator.receive_json_from()
+        self.assertEqual((event["type"], event["unread_delta"]), ("notification", 1))
+        self.assertEqual(event["notification"]["message"], "Your sitting starts soon")
+        await communicator.disconnect()
+
+    async def test_connections_without_a_valid_token_are_refused(self):
+        for path in ["/ws/notifications/", "/ws/notifications/?token=garbage"]:
+            communicator = WebsocketCommunicator(application, path)
+            connected, code = await communicator.connect()
+            self.assertEqual((connected, code), (False, 4401))
+
+
+class UnreadCounterTests(TestCase):
+
+    def setUp(self):
+        self.user = make_user("amina")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def notify(self, n=1, **fields):
+        return [Notification.objects.create(user=self.user, message=f"Note {i}", **fields) for i in range(n)]
+
+    def stored(self):
+        return UnreadCounter.objects.get(user=self.user).unread
+
+    def test_signals_follow_creates_reads_and_deletes(self):
+        first, second, third = self.notify(3)
+        self.notify(is_read=True)
+        self.assertEqual(self.stored(), 3)
+
+        first.is_read = True
+        first.save()
+        second.delete()
+        first.delete()
+        self.assertEqual(self.stored(), 1)
+
+        third.is_read = False
+        third.message = "Edited"
+        third.save()
+        self.assertEqual(self.stored(), 1)
+
+    def test_mark_read_endpoints_adjust_the_counter_once(self):
+        first, *rest = self.notify(3)
+        for _ in range(2):
+            self.assertEqual(self.client.post(f"/api/notification/{first.pk}/read/").status_code, 200)
+        self.assertEqual(self.stored(), 2)
+
+        response = self.client.post("/api/notification/read/", {"ids": [n.pk for n in rest] + [first.pk]}, format="json")
+        self.assertEqual(response.json()["updated"], 2)
+        self.assertEqual(self.stored(), 0)
+        self.assertEqual(self.client.post("/api/notification/read/", {"ids": "all"}, format="json").status_code, 400)
+
+    def test_missing_and_drifted_counters_are_recounted(self):
+        self.notify(2)
+        UnreadCounter.objects.all().delete()
+        self.assertEqual(unread_count(self.user.id), 2)
+
+        UnreadCounter.objects.update(unread=40)
+        self.assertEqual(recount_unread(), 1)
+        self.assertEqual(self.stored(), 2)
+
+    def test_feed_pages_by_cursor_without_repeats(self):
+        self.notify(5)
+        seen, cursor = [], None
+        while True:
+            params = {"page_size": 2, **({"cursor": cursor} if cursor else {})}
+            body = self.client.get("/api/notification/", params).json()
+            self.assertEqual(body["unread_count"], 5)
+            seen += [n["id"] for n in body["notifications"]]
+            cursor = body["next_cursor"]
+            if cursor is None:
+                break
+        self.assertEqual(seen, sorted(seen, reverse=True))
+        self.assertEqual(len(set(seen)), 5)
+        self.assertEqual(self.client.get("/api/notification/", {"cursor": "junk"}).status_code, 404)
+
+
+@override_settings(NOTIFICATION_RETENTION_DAYS=30, NOTIFICATION_MAX_READ_PER_USER=2, NOTIFICATION_PRUNE_BATCH_SIZE=2)
+class PruneNotificationsTests(TestCase):
+
+    def setUp(self):
+        self.user = make_user("amina")
+
+    def notify(self, days_ago, is_read=True):
+        notification = Notification.objects.create(user=self.user, message=f"{days_ago} days", is_read=is_read)
+        Notification.objects.filter(pk=notification.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+        return notification.pk
+
+    def test_prunes_expired_and_over_cap_read_notifications_without_loading_them(self):
+        unread = [self.notify(90, is_read=False), self.notify(1, is_read=False)]
+        expired = [self.notify(60), self.notify(45), self.notify(31)]
+        kept = [self.notify(1), self.notify(2)]
+        over_cap = [self.notify(3), self.notify(4)]
+
+        with CaptureQueriesContext(connection) as queries:
+            report = tasks.prune_notifications()
+
+        self.assertEqual((report["expired"], report["over_cap"]), (len(expired), len(over_cap)))
+        self.assertCountEqual(Notification.objects.values_list("id", flat=True), unread + kept)
+        self.assertFalse([q["sql"] for q in queries if '"message"' in q["sql"]])
+        self.assertEqual(unread_count(self.user.id), 2)
+
+
+class OutboxWhatsAppTests(TestCase):
+
+    def setUp(self):
+        self.client = WhatsAppClient(
+            base_url="http://termii.test", api_key="key", sender_id="Muhasabah",
+            max_workers=2, rate_per_second=1000, burst=1000, max_retries=0, backoff=0,
+        )
+        self.addCleanup(self.client.close)
+        for patcher in (
+            mock.patch.object(tasks, "get_client", return_value=self.client),
+            mock.patch("notification.outbox._kick_dispatcher"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_failures_termii_may_have_delivered_are_not_resent(self):
+        statuses = {"1": 200, "2": 500, "3": UNCONFIRMED, "4": None, "5": 429}
+        enqueue(whatsapp_message(to, "Salaam") for to in statuses)
+
+        with mock.patch.object(self.client, "send", side_effect=lambda to, message: statuses[to]):
+            report = tasks.dispatch_outbox()
+
+        self.assertEqual(
+            dict(OutboxMessage.objects.values_list("recipient", "status")),
+            {"1": "sent", "2": "dead", "3": "dead", "4": "pending", "5": "pending"},
+        )
+        self.assertEqual((report["sent"], report["retried"], report["dead"]), (1, 2, 2))
+        self.assertEqual((report["whatsapp"]["sent"], report["whatsapp"]["failed"]), (1, 4))
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    OUTBOX_MAX_ATTEMPTS=2, OUTBOX_RETRY_BACKOFF=60, OUTBOX_CLAIM_TIMEOUT=600,
+)
+class OutboxTests(TestCase):
+
+    def setUp(self):
+        patcher = mock.patch("notification.outbox._kick_dispatcher")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_dedup_key_queues_a_message_once(self):
+        enqueue_email("amina@example.com", "Salaam", "Body", dedup_key="welcome:1")
+        enqueue_email("amina@example.com", "Salaam", "Body", dedup_key="welcome:1")
+        enqueue_email("amina@example.com", "Salaam", "Body")
+        self.assertEqual(OutboxMessage.objects.count(), 2)
+
+    def test_emails_are_sent_and_marked(self):
+        enqueue([email_message(f"user{i}@example.com", "Salaam", "Body") for i in range(3)])
+        report = tasks.dispatch_outbox()
+        self.assertEqual(report["sent"], 3)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(OutboxMessage.objects.exclude(status="sent").exists())
+        self.assertEqual(tasks.dispatch_outbox()["sent"], 0)
+
+    def test_failures_back_off_then_dead_letter(self):
+        enqueue_email("amina@example.com", "Salaam", "Body")
+        with mock.patch("notification.tasks.EmailMessage.send", side_effect=OSError("SMTP down")):
+            self.assertEqual(tasks.dispatch_outbox()["retried"], 1)
+            message = OutboxMessage.objects.get()
+            self.assertEqual((message.status, message.attempts), ("pending", 1))
+            self.assertGreater(message.next_attempt_at, timezone.now() + timedelta(seconds=50))
+
+            # Not due yet.
+            self.assertEqual(tasks.dispatch_outbox()["retried"], 0)
+
+            OutboxMessage.objects.update(next_attempt_at=timezone.now())
+            self.assertEqual(tasks.dispatch_outbox()["dead"], 1)
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.last_error), ("dead", "SMTP down"))
+
+    def test_only_stale_claims_are_taken_over(self):
+        enqueue_email("amina@example.com", "Salaam", "Body")
+        OutboxMessage.objects.update(status="sending", claimed_at=timezone.now())
+        self.assertEqual(tasks.dispatch_outbox()["sent"], 0)
+
+        OutboxMessage.objects.update(claimed_at=timezone.now() - timedelta(seconds=601))
+        self.assertEqual(tasks.dispatch_outbox()["sent"], 1)
+        self.assertEqual(OutboxMessage.objects.get().status, "sent")
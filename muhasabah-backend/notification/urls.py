@@ -1,11 +1,12 @@
 # notifications/urls.py
 
 from django.urls import path
-from .views import NotificationListView, MarkNotificationReadView
+from .views import NotificationListView, MarkNotificationReadView, MarkNotificationsReadView
 
 app_name = "notifications"
 
 urlpatterns = [
     path("", NotificationListView.as_view(), name="list"),
+    path("read/", MarkNotificationsReadView.as_view(), name="mark_many_read"),
     path("<int:pk>/read/", MarkNotificationReadView.as_view(), name="mark_read"),
 ]
@@ -1,29 +1,42 @@
 # notifications/views.py
+from django.db import transaction
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from muhasabah_backend.pagination import KeysetPagination
+from .counters import adjust_unread, unread_count
 from .models import Notification
+from .push import push_unread_delta
 from .serializers import NotificationSerializer
 
 
+class NotificationPagination(KeysetPagination):
+    ordering_field = "created_at"
+
+
 class NotificationListView(APIView):
     """
-    Returns a list of notifications for the authenticated user
-    along with the unread count.
+    Returns a page of notifications for the authenticated user, newest first,
+    along with the unread count. Pass the returned `next_cursor` as
+    `?cursor=` to fetch the following page.
     """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        queryset = Notification.objects.filter(user=request.user).order_by("-created_at")
-        unread_count = queryset.filter(is_read=False).count()
-        serializer = NotificationSerializer(queryset, many=True)
+        paginator = NotificationPagination()
+        page = paginator.paginate_queryset(
+            Notification.objects.filter(user=request.user), request, view=self
+        )
+        serializer = NotificationSerializer(page, many=True)
 
         return Response(
             {
-                "unread_count": unread_count,
-                "notifications": serializer.data
+                "unread_count": unread_count(request.user.id),
+                "notifications": serializer.data,
+                "next_cursor": paginator.next_cursor,
+                "next": paginator.get_next_link(),
             },
             status=status.HTTP_200_OK
         )
@@ -36,19 +49,54 @@ class MarkNotificationReadView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, pk):
-        try:
-            notification = Notification.objects.get(pk=pk, user=request.user)
-        except Notification.DoesNotExist:
+        with transaction.atomic():
+            updated = Notification.objects.filter(
+                pk=pk, user=request.user, is_read=False
+            ).update(is_read=True)
+            if not updated and not Notification.objects.filter(pk=pk, user=request.user).exists():
+                return Response(
+                    {"detail": "Notification not found."},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            adjust_unread(request.user.id, -updated)
+
+        push_unread_delta(request.user.id, -updated)
+        return Response(
+            {"detail": "Notification marked as read."},
+            status=status.HTTP_200_OK
+        )
+
+
+class MarkNotificationsReadView(APIView):
+    """
+    Marks several notifications as read in one UPDATE.
+    Send {"ids": [...]} to mark those, or an empty body to mark all.
+    Ids that belong to someone else or are already read are skipped rather
+    than rejected, so retries are harmless; `updated` is the number of
+    notifications this call actually flipped.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        ids = request.data.get("ids")
+        if ids is not None and (
+            not isinstance(ids, list) or not all(isinstance(i, int) for i in ids)
+        ):
             return Response(
-                {"detail": "Notification not found."},
-                status=status.HTTP_404_NOT_FOUND
+                {"detail": "`ids` must be a list of notification ids."},
+                status=status.HTTP_400_BAD_REQUEST
             )
 
-        if not notification.is_read:
-            notification.is_read = True
-            notification.save(update_fields=["is_read"])
+        queryset = Notification.objects.filter(user=request.user, is_read=False)
+        if ids is not None:
+            queryset = queryset.filter(pk__in=ids)
 
+        with transaction.atomic():
+            updated = queryset.update(is_read=True)
+            adjust_unread(request.user.id, -updated)
+
+        push_unread_delta(request.user.id, -updated)
         return Response(
-            {"detail": "Notification marked as read."},
+            {"detail": "Notifications marked as read.", "updated": updated},
             status=status.HTTP_200_OK
         )
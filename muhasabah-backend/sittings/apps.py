@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SittingsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'sittings'
+
+    def ready(self):
+        from . import signals  # noqa: F401
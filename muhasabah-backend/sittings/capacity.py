@@ -0,0 +1,65 @@
+# sittings/capacity.py
+"""
+Atomic maintenance of `Sitting.approved_count`.
+
+Seats are claimed with a single conditional UPDATE, so the capacity check
+and the increment happen in one statement and parallel approvals can never
+push a sitting past `max_members`.
+"""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+
+def _sittings():
+    from .models import Sitting
+
+    return Sitting.objects
+
+
+def reserve_seats(sitting_id, seats=1):
+    """Claims `seats` seats if they are all free; returns whether it did."""
+    return bool(
+        _sittings()
+        .filter(id=sitting_id, approved_count__lte=F("max_members") - seats)
+        .update(approved_count=F("approved_count") + seats)
+    )
+
+
+def reserve_up_to(sitting_id, wanted):
+    """
+    Claims as many of `wanted` seats as are free and returns that number.
+    A compare-and-set on the count retries if another approval got in first.
+    """
+    while wanted > 0:
+        row = _sittings().filter(id=sitting_id).values("approved_count", "max_members").first()
+        if row is None:
+            return 0
+        seats = min(wanted, max(row["max_members"] - row["approved_count"], 0))
+        if seats == 0:
+            return 0
+        if _sittings().filter(id=sitting_id, approved_count=row["approved_count"]).update(
+            approved_count=F("approved_count") + seats
+        ):
+            return seats
+    return 0
+
+
+def release_seats(sitting_id, seats=1):
+    _sittings().filter(id=sitting_id).update(approved_count=Greatest(F("approved_count") - seats, 0))
+
+
+def recount_seats(sitting_ids=None):
+    """Recomputes approved_count from the memberships (repair/backfill)."""
+    from .models import SittingMembership
+
+    approved = (
+        SittingMembership.objects
+        .filter(sitting=OuterRef("pk"), status="approved")
+        .values("sitting")
+        .annotate(n=Count("id"))
+        .values("n")
+    )
+    sittings = _sittings()
+    if sitting_ids is not None:
+        sittings = sittings.filter(id__in=sitting_ids)
+    return sittings.update(approved_count=Coalesce(Subquery(approved), 0))
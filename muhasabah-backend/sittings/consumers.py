@@ -0,0 +1,40 @@
+# sittings/consumers.py
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .messages import chat_group, is_participant
+from .models import Sitting
+
+
+class SittingChatConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Streams new messages of one sitting's chat to its head and approved
+    members. Clients fetch history over REST and then only listen here.
+    """
+
+    async def connect(self):
+        user = self.scope.get("user")
+        if user is None or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+
+        sitting_id = self.scope["url_route"]["kwargs"]["sitting_id"]
+        if not await self.can_join(user, sitting_id):
+            await self.close(code=4403)
+            return
+
+        self.group = chat_group(sitting_id)
+        await self.channel_layer.group_add(self.group, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if hasattr(self, "group"):
+            await self.channel_layer.group_discard(self.group, self.channel_name)
+
+    async def message_created(self, event):
+        await self.send_json({"type": "message", "message": event["message"]})
+
+    @database_sync_to_async
+    def can_join(self, user, sitting_id):
+        sitting = Sitting.objects.filter(pk=sitting_id).first()
+        return sitting is not None and is_participant(user, sitting)
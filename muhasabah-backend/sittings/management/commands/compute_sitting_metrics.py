@@ -0,0 +1,23 @@
+# sittings/management/commands/compute_sitting_metrics.py
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+
+from sittings.metrics import compute_weekly_metrics, week_bounds
+
+
+class Command(BaseCommand):
+    help = "Computes weekly per-sitting metrics (default: last week) and pre-fills evaluations."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--week", type=date.fromisoformat, help="Any day of the week to compute (YYYY-MM-DD).")
+        parser.add_argument("--weeks", type=int, default=1, help="Also compute the N-1 weeks before it (backfill).")
+
+    def handle(self, *args, **options):
+        start = week_bounds(options["week"] or date.today() - timedelta(days=7))[0]
+        for offset in range(options["weeks"]):
+            report = compute_weekly_metrics(start - timedelta(weeks=offset))
+            self.stdout.write(self.style.SUCCESS(
+                f"Week of {report['week_start']}: {report['sittings']} sittings, "
+                f"{report['evaluations_prefilled']} evaluations pre-filled."
+            ))
@@ -0,0 +1,16 @@
+# sittings/management/commands/recount_sitting_seats.py
+from django.core.management.base import BaseCommand
+
+from sittings.capacity import recount_seats
+
+
+class Command(BaseCommand):
+    help = "Recomputes Sitting.approved_count from the approved memberships (repair/backfill)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sitting", dest="sitting_ids", type=int, action="append",
+                            help="Only this sitting id (repeatable; default: all sittings).")
+
+    def handle(self, *args, **options):
+        updated = recount_seats(options["sitting_ids"])
+        self.stdout.write(self.style.SUCCESS(f"Recounted seats for {updated} sittings."))
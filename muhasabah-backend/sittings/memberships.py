@@ -0,0 +1,102 @@
+# sittings/memberships.py
+"""
+Set-based approval and rejection of sitting memberships.
+
+`SittingMembership.save` enforces the one-approved-sitting rule and sets up
+check-ins one row at a time; `decide_memberships` applies the same rules to
+a whole intake with a fixed number of queries in one transaction.
+"""
+from collections import defaultdict
+from datetime import date
+
+from django.db import transaction
+from django.utils import timezone
+
+from checkins.generation import insert_checkins
+from checkins.rollups import refresh_sitting_progress
+from .capacity import reserve_up_to
+from .models import SittingMembership
+from .signals import memberships_decided
+from .tasks import notify_membership_decisions
+
+
+def decide_memberships(head, membership_ids, approve):
+    """
+    Approves (or rejects) the pending memberships in `membership_ids` that
+    belong to sittings headed by `head`. A student already approved in a
+    sitting, or a sitting already at `max_members`, leaves the membership
+    pending. Raises IntegrityError if a student is approved concurrently.
+    Returns {"approved" | "rejected": [ids], "skipped": [{id, reason}]}.
+    """
+    membership_ids = list(dict.fromkeys(membership_ids))
+    status = "approved" if approve else "rejected"
+    skipped = []
+
+    with transaction.atomic():
+        pending = list(
+            SittingMembership.objects
+            .select_for_update()
+            .filter(id__in=membership_ids, sitting__sitting_head=head, status="pending")
+            .order_by("id")
+            .values("id", "student_id", "sitting_id")
+        )
+        found = {row["id"] for row in pending}
+        skipped += [
+            {"id": membership_id, "reason": "Not a pending membership of your sittings."}
+            for membership_id in membership_ids if membership_id not in found
+        ]
+
+        if approve:
+            pending, refused = _admissible(pending)
+            skipped += refused
+
+        decided = [row["id"] for row in pending]
+        if not decided:
+            return {status: [], "skipped": skipped}
+
+        SittingMembership.objects.filter(id__in=decided).update(status=status)
+
+        sitting_ids = {row["sitting_id"] for row in pending}
+        student_ids = [row["student_id"] for row in pending]
+        if approve:
+            today = date.today()
+            insert_checkins(student_ids, today)
+            refresh_sitting_progress(sitting_ids, today)
+
+        decided_at = int(timezone.now().timestamp())
+        transaction.on_commit(lambda: notify_membership_decisions.delay(decided, approve, decided_at))
+        transaction.on_commit(lambda: memberships_decided.send(
+            sender=SittingMembership, sitting_ids=sitting_ids, student_ids=student_ids
+        ))
+
+    return {status: decided, "skipped": skipped}
+
+
+def _admissible(pending):
+    """
+    Splits `pending` rows into those that may be approved and refusals,
+    claiming the admitted rows' seats with conditional UPDATEs. A student
+    approved concurrently elsewhere still trips the database constraint.
+    """
+    student_ids = {row["student_id"] for row in pending}
+    taken = set(
+        SittingMembership.objects
+        .filter(student_id__in=student_ids, status="approved")
+        .values_list("student_id", flat=True)
+    )
+
+    refused = []
+    by_sitting = defaultdict(list)
+    for row in pending:
+        if row["student_id"] in taken:
+            refused.append({"id": row["id"], "reason": "Student is already approved in a sitting."})
+        else:
+            taken.add(row["student_id"])
+            by_sitting[row["sitting_id"]].append(row)
+
+    admitted = []
+    for sitting_id, rows in by_sitting.items():
+        seats = reserve_up_to(sitting_id, len(rows))
+        admitted += rows[:seats]
+        refused += [{"id": row["id"], "reason": "Sitting is full."} for row in rows[seats:]]
+    return admitted, refused
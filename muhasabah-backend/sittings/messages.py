@@ -0,0 +1,85 @@
+# sittings/messages.py
+"""
+Sitting group chat: posting, read markers and live fan-out.
+
+Each message takes the next number in its sitting's feed (`seq`) from
+`Sitting.message_count`, so a member's unread count is the difference
+between that counter and their read marker: two integers, no row counting.
+New messages are pushed to the sitting's Channels group once committed.
+"""
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .models import Message, MessageReadMarker, Sitting, SittingMembership
+
+
+def chat_group(sitting_id):
+    return f"sittings.chat.{sitting_id}"
+
+
+def is_participant(user, sitting):
+    """The sitting head and approved members can read and post."""
+    return sitting.sitting_head_id == user.id or SittingMembership.objects.filter(
+        sitting=sitting, student=user, status="approved"
+    ).exists()
+
+
+@transaction.atomic
+def post_message(sitting, sender, content):
+    # The UPDATE row-locks the sitting until commit, so sequence numbers are gap-free.
+    Sitting.objects.filter(pk=sitting.pk).update(message_count=F("message_count") + 1)
+    seq = Sitting.objects.values_list("message_count", flat=True).get(pk=sitting.pk)
+    message = Message.objects.create(sitting=sitting, sender=sender, content=content, seq=seq)
+    mark_sent(sender, sitting, seq)
+    transaction.on_commit(lambda: push_message(message))
+    return message
+
+
+def mark_read(user, sitting, seq):
+    """Moves the user's read marker forward to `seq` (never backwards)."""
+    updated = MessageReadMarker.objects.filter(user=user, sitting=sitting).update(
+        last_read_seq=Greatest(F("last_read_seq"), seq)
+    )
+    if not updated:
+        MessageReadMarker.objects.get_or_create(
+            user=user, sitting=sitting, defaults={"last_read_seq": seq}
+        )
+
+
+def mark_sent(user, sitting, seq):
+    """
+    The sender has read their own message #`seq`. The marker only moves if
+    they had read everything before it, so sending never hides messages
+    they have not seen yet.
+    """
+    updated = MessageReadMarker.objects.filter(
+        user=user, sitting=sitting, last_read_seq=seq - 1
+    ).update(last_read_seq=seq)
+    if not updated and seq == 1:
+        MessageReadMarker.objects.get_or_create(
+            user=user, sitting=sitting, defaults={"last_read_seq": seq}
+        )
+
+
+def unread_count(user, sitting):
+    last_read = (
+        MessageReadMarker.objects
+        .filter(user=user, sitting=sitting)
+        .values_list("last_read_seq", flat=True)
+        .first()
+    ) or 0
+    return max(sitting.message_count - last_read, 0)
+
+
+def push_message(message):
+    from .serializers import MessageSerializer
+
+    layer = get_channel_layer()
+    if layer is not None:
+        async_to_sync(layer.group_send)(chat_group(message.sitting_id), {
+            "type": "message.created",
+            "message": MessageSerializer(message).data,
+        })
@@ -0,0 +1,186 @@
+# sittings/metrics.py
+"""
+Weekly per-sitting metrics from the week's check-ins.
+
+One grouped query over approved memberships joined to that week's
+DailyCheckIn rows yields, per sitting: member and active-member counts,
+check-in totals and the distribution of members' streak lengths at week end.
+Results are upserted into SittingWeeklyMetrics and used to pre-fill a
+SittingEvaluation for heads who have not written one for that week.
+"""
+import logging
+import time
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Count, DateField, ExpressionWrapper, F, FilteredRelation, Q
+
+from .models import Sitting, SittingEvaluation, SittingMembership, SittingWeeklyMetrics
+
+logger = logging.getLogger(__name__)
+
+# Streak buckets: label -> (min, max) inclusive; None means unbounded.
+STREAK_BUCKETS = {"0": (0, 0), "1-2": (1, 2), "3-6": (3, 6), "7+": (7, None)}
+
+
+def week_bounds(day):
+    """Returns (monday, sunday) of the week containing `day`."""
+    start = day - timedelta(days=day.weekday())
+    return start, start + timedelta(days=6)
+
+
+def score_for(completion_rate, active_ratio):
+    """0-100 score: completion weighs 70%, participation 30%."""
+    return round(0.7 * completion_rate + 0.3 * active_ratio)
+
+
+def _streak_filter(low, high, week_end):
+    """
+    Members whose streak at `week_end` was between `low` and `high` days.
+    A run ending on `streak_date` with length `streak` started the day after
+    `streak_date - streak`, so its length at week end follows from that
+    anchor as long as the run was still going on `week_end`.
+    """
+    condition = Q(student__streak_date__gte=week_end, streak_anchor__lte=week_end - timedelta(days=low))
+    if high is not None:
+        condition &= Q(streak_anchor__gte=week_end - timedelta(days=high))
+    return condition
+
+
+def compute_weekly_metrics(week_start=None):
+    """
+    Computes and stores metrics for the week starting on `week_start`
+    (default: last week). Returns a report dict.
+    """
+    started = time.monotonic()
+    if week_start is None:
+        week_start = week_bounds(date.today())[0] - timedelta(days=7)
+    week_start, week_end = week_bounds(week_start)
+    week = week_start.isocalendar().week
+
+    streak_counts = {
+        f"streak_{index}": Count(
+            "student", distinct=True, filter=_streak_filter(low, high, week_end)
+        )
+        for index, (low, high) in enumerate(STREAK_BUCKETS.values())
+        if low
+    }
+    grouped = {
+        row["sitting_id"]: row
+        for row in (
+            SittingMembership.objects
+            .filter(status="approved")
+            .annotate(
+                week_checkins=FilteredRelation(
+                    "student__daily_checkins",
+                    condition=Q(student__daily_checkins__date__range=(week_start, week_end)),
+                ),
+                streak_anchor=ExpressionWrapper(
+                    F("student__streak_date") - F("student__streak"), output_field=DateField()
+                ),
+            )
+            .values("sitting_id")
+            .annotate(
+                members=Count("student", distinct=True),
+                active_members=Count("student", distinct=True, filter=Q(week_checkins__is_completed=True)),
+                checkins_total=Count("week_checkins"),
+                checkins_completed=Count("week_checkins", filter=Q(week_checkins__is_completed=True)),
+                **streak_counts,
+            )
+            .order_by()
+        )
+    }
+
+    sittings = list(Sitting.objects.values("id", "name", "sitting_head_id"))
+    rows = []
+    for sitting in sittings:
+        row = grouped.get(sitting["id"], {})
+        members = row.get("members", 0)
+        total = row.get("checkins_total", 0)
+        completed = row.get("checkins_completed", 0)
+        active = row.get("active_members", 0)
+        completion_rate = round(completed / total * 100, 1) if total else 0
+        active_ratio = round(active / members * 100, 1) if members else 0
+        streaks = {
+            label: row.get(f"streak_{index}", 0)
+            for index, label in enumerate(STREAK_BUCKETS)
+            if label != "0"
+        }
+        streaks = {"0": members - sum(streaks.values()), **streaks}
+        rows.append(SittingWeeklyMetrics(
+            sitting_id=sitting["id"],
+            week_start=week_start,
+            week=week,
+            members=members,
+            active_members=active,
+            checkins_total=total,
+            checkins_completed=completed,
+            completion_rate=completion_rate,
+            active_ratio=active_ratio,
+            streaks=streaks,
+            score=score_for(completion_rate, active_ratio),
+        ))
+
+    with transaction.atomic():
+        SittingWeeklyMetrics.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["sitting", "week_start"],
+            update_fields=[
+                "week", "members", "active_members", "checkins_total", "checkins_completed",
+                "completion_rate", "active_ratio", "streaks", "score", "computed_at",
+            ],
+        )
+        evaluations = prefill_evaluations(sittings, rows, week_start)
+
+    report = {
+        "week_start": week_start.isoformat(),
+        "sittings": len(rows),
+        "evaluations_prefilled": evaluations,
+        "seconds": round(time.monotonic() - started, 3),
+    }
+    logger.info(
+        "Weekly sitting metrics for %(week_start)s: %(sittings)s sittings, "
+        "%(evaluations_prefilled)s evaluations pre-filled in %(seconds)ss",
+        report,
+    )
+    return report
+
+
+def prefill_evaluations(sittings, metrics, week_start):
+    """
+    Creates a SittingEvaluation with the computed score for each sitting with
+    members that has none for the week starting `week_start` yet. Heads'
+    evaluations only carry an ISO week number, which recurs every year, so
+    one counts for the occurrence of that number nearest its submission.
+    """
+    week = week_start.isocalendar().week
+    nearest = (week_start - timedelta(weeks=26), week_start + timedelta(weeks=26))
+    evaluated = set(
+        SittingEvaluation.objects
+        .filter(
+            Q(week_start=week_start)
+            | Q(week_start__isnull=True, week=week, submitted_at__date__range=nearest)
+        )
+        .values_list("sitting_id", flat=True)
+    )
+    heads = {sitting["id"]: sitting["sitting_head_id"] for sitting in sittings}
+    evaluations = [
+        SittingEvaluation(
+            sitting_id=m.sitting_id,
+            head_id=heads[m.sitting_id],
+            week=week,
+            week_start=week_start,
+            score=m.score,
+            summary=(
+                f"Auto-generated: {m.completion_rate}% of check-ins completed, "
+                f"{m.active_members}/{m.members} members active."
+            ),
+        )
+        for m in metrics
+        if m.members and m.sitting_id not in evaluated
+    ]
+    # A concurrent run may have pre-filled some already; the constraint keeps one.
+    before = SittingEvaluation.objects.filter(week_start=week_start).count()
+    SittingEvaluation.objects.bulk_create(evaluations, ignore_conflicts=True)
+    return SittingEvaluation.objects.filter(week_start=week_start).count() - before
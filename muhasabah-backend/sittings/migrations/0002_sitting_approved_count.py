@@ -0,0 +1,65 @@
+# Generated by Django 5.2 on 2026-10-18 08:52
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def demote_duplicate_approvals(apps, schema_editor):
+    """
+    Students approved in several sittings keep their earliest approved
+    membership; the others go back to pending for a head to decide again.
+    """
+    SittingMembership = apps.get_model('sittings', 'SittingMembership')
+    kept = list(
+        SittingMembership.objects
+        .filter(status='approved')
+        .values('student')
+        .annotate(first_id=Min('id'), n=Count('id'))
+        .filter(n__gt=1)
+        .values_list('first_id', flat=True)
+    )
+    if kept:
+        students = SittingMembership.objects.filter(id__in=kept).values('student')
+        (
+            SittingMembership.objects
+            .filter(status='approved', student__in=students)
+            .exclude(id__in=kept)
+            .update(status='pending')
+        )
+
+
+def count_approved(apps, schema_editor):
+    Sitting = apps.get_model('sittings', 'Sitting')
+    SittingMembership = apps.get_model('sittings', 'SittingMembership')
+    approved = (
+        SittingMembership.objects
+        .filter(sitting=OuterRef('pk'), status='approved')
+        .values('sitting')
+        .annotate(n=Count('id'))
+        .values('n')
+    )
+    Sitting.objects.update(approved_count=Coalesce(Subquery(approved), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sittings', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sitting',
+            name='approved_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(demote_duplicate_approvals, migrations.RunPython.noop),
+        migrations.RunPython(count_approved, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='sittingmembership',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'approved')), fields=('student',), name='one_approved_membership_per_student'),
+        ),
+    ]
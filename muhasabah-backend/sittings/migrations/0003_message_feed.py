@@ -0,0 +1,63 @@
+# Generated by Django 5.2 on 2026-10-18 08:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def number_messages(apps, schema_editor):
+    Message = apps.get_model('sittings', 'Message')
+    Sitting = apps.get_model('sittings', 'Sitting')
+    for sitting_id in Message.objects.values_list('sitting_id', flat=True).distinct():
+        ids = Message.objects.filter(sitting_id=sitting_id).order_by('timestamp', 'id').values_list('id', flat=True)
+        for seq, message_id in enumerate(ids, start=1):
+            Message.objects.filter(id=message_id).update(seq=seq)
+        Sitting.objects.filter(id=sitting_id).update(message_count=len(ids))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sittings', '0002_sitting_approved_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageReadMarker',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_read_seq', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='seq',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='sitting',
+            name='message_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['sitting', 'timestamp', 'id'], name='sittings_message_feed_idx'),
+        ),
+        migrations.AddField(
+            model_name='messagereadmarker',
+            name='sitting',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='read_markers', to='sittings.sitting'),
+        ),
+        migrations.AddField(
+            model_name='messagereadmarker',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='message_read_markers', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterUniqueTogether(
+            name='messagereadmarker',
+            unique_together={('user', 'sitting')},
+        ),
+        migrations.RunPython(number_messages, migrations.RunPython.noop),
+    ]
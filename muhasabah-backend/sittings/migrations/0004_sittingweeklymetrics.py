@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-18 08:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sittings', '0003_message_feed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SittingWeeklyMetrics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week_start', models.DateField()),
+                ('week', models.PositiveIntegerField()),
+                ('members', models.PositiveIntegerField(default=0)),
+                ('active_members', models.PositiveIntegerField(default=0)),
+                ('checkins_total', models.PositiveIntegerField(default=0)),
+                ('checkins_completed', models.PositiveIntegerField(default=0)),
+                ('completion_rate', models.FloatField(default=0)),
+                ('active_ratio', models.FloatField(default=0)),
+                ('streaks', models.JSONField(default=dict)),
+                ('score', models.PositiveIntegerField(default=0)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('sitting', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='weekly_metrics', to='sittings.sitting')),
+            ],
+            options={
+                'ordering': ['-week_start'],
+                'unique_together': {('sitting', 'week_start')},
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2 on 2026-10-18 09:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def date_prefilled(apps, schema_editor):
+    """
+    Gives pre-filled evaluations the week_start of the metrics row they were
+    written from (same sitting and week number, latest week not after the
+    evaluation), then drops duplicates so the constraint can be added.
+    """
+    SittingEvaluation = apps.get_model('sittings', 'SittingEvaluation')
+    SittingWeeklyMetrics = apps.get_model('sittings', 'SittingWeeklyMetrics')
+
+    seen = set()
+    duplicates = []
+    prefilled = SittingEvaluation.objects.filter(summary__startswith='Auto-generated:').order_by('id')
+    for evaluation in prefilled.iterator():
+        week_start = (
+            SittingWeeklyMetrics.objects
+            .filter(
+                sitting_id=evaluation.sitting_id,
+                week=evaluation.week,
+                week_start__lte=evaluation.submitted_at.date(),
+            )
+            .order_by('-week_start')
+            .values_list('week_start', flat=True)
+            .first()
+        )
+        if week_start is None:
+            continue
+        if (evaluation.sitting_id, week_start) in seen:
+            duplicates.append(evaluation.id)
+            continue
+        seen.add((evaluation.sitting_id, week_start))
+        SittingEvaluation.objects.filter(id=evaluation.id).update(week_start=week_start)
+    SittingEvaluation.objects.filter(id__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sittings', '0004_sittingweeklymetrics'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sittingevaluation',
+            name='week_start',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.RunPython(date_prefilled, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='sittingevaluation',
+            constraint=models.UniqueConstraint(fields=('sitting', 'week_start'), name='one_evaluation_per_sitting_week'),
+        ),
+    ]
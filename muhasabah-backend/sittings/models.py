@@ -1,9 +1,12 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
 from datetime import date
 from accounts.models import User
 from todos.models import DefaultToDo
 from checkins.models import DailyCheckIn
-from .tasks import send_approval_email_task
+from notification.outbox import enqueue_email
+from .capacity import release_seats, reserve_seats
+from .tasks import approval_email
 
 # ──────────────────────────────────────────────────────────────
 #                          Sitting Model
@@ -19,6 +22,8 @@ class Sitting(models.Model):
     day_of_week = models.CharField(max_length=10)
     max_members = models.PositiveIntegerField()
     status = models.CharField(max_length=20)  # e.g., 'active', 'archived'
+    approved_count = models.PositiveIntegerField(default=0, editable=False)  # maintained by sittings.capacity
+    message_count = models.PositiveIntegerField(default=0, editable=False)  # last Message.seq, see sittings.messages
 
     def __str__(self):
         return self.name
@@ -39,24 +44,43 @@ class SittingMembership(models.Model):
 
     class Meta:
         unique_together = ('student', 'sitting')
+        constraints = [
+            # One approved sitting per student, enforced by the database.
+            models.UniqueConstraint(
+                fields=['student'],
+                condition=models.Q(status='approved'),
+                name='one_approved_membership_per_student',
+            ),
+        ]
 
     def save(self, *args, **kwargs):
-        creating = self._state.adding
-        previous = None
-
-        if not creating:
-            previous = SittingMembership.objects.get(pk=self.pk)
-
-        # Restrict one approved sitting per student
-        if (creating or previous.status != 'approved') and self.status == 'approved':
-            if SittingMembership.objects.filter(
-                student=self.student, status='approved'
-            ).exclude(pk=self.pk).exists():
-                raise ValueError("This student is already approved in another sitting.")
-
-        super().save(*args, **kwargs)
-
-        if (creating or (previous and previous.status != 'approved')) and self.status == 'approved':
+        with transaction.atomic():
+            previous_status = None
+            if not self._state.adding:
+                # Lock the row, so a concurrent save of the same membership
+                # waits and then sees this one's status.
+                previous_status = (
+                    SittingMembership.objects.select_for_update()
+                    .values_list('status', flat=True).get(pk=self.pk)
+                )
+
+            approving = previous_status != 'approved' and self.status == 'approved'
+            leaving = previous_status == 'approved' and self.status != 'approved'
+
+            # Claim a seat with a conditional UPDATE; the unique constraint
+            # rejects a second approved sitting for the same student.
+            if approving and not reserve_seats(self.sitting_id):
+                raise ValueError("This sitting is full.")
+            if leaving:
+                release_seats(self.sitting_id)
+            try:
+                super().save(*args, **kwargs)
+            except IntegrityError as e:
+                if 'one_approved_membership_per_student' in str(e):
+                    raise ValueError("This student is already approved in another sitting.") from e
+                raise
+
+        if approving:
             self.assign_default_todos()
             self.send_approval_email()
 
@@ -77,13 +101,19 @@ class SittingMembership(models.Model):
 
     def send_approval_email(self):
         """
-        Sends email notification to user after approval using Celery task.
+        Queues the approval email in the notification outbox; it is sent
+        once this save commits.
         """
-        send_approval_email_task.delay(
-            self.student.email,
+        subject, message = approval_email(
             self.student.username,
             self.sitting.name
         )
+        # Keyed by approval time, so a later re-approval is announced too.
+        approved_at = int(timezone.now().timestamp())
+        enqueue_email(
+            self.student.email, subject, message,
+            dedup_key=f"sitting-approval:{self.pk}:{approved_at}",
+        )
 
 # ──────────────────────────────────────────────────────────────
 #                 Sitting Evaluation Model
@@ -99,10 +129,46 @@ class SittingEvaluation(models.Model):
     summary = models.TextField()
     score = models.PositiveIntegerField()
     submitted_at = models.DateTimeField(auto_now_add=True)
+    week_start = models.DateField(null=True, blank=True)  # set on evaluations pre-filled by sittings.metrics
+
+    class Meta:
+        constraints = [
+            # At most one pre-filled evaluation per sitting and week.
+            models.UniqueConstraint(fields=['sitting', 'week_start'], name='one_evaluation_per_sitting_week'),
+        ]
 
     def __str__(self):
         return f"Week {self.week} - {self.sitting.name}"
 
+# ──────────────────────────────────────────────────────────────
+#                  Sitting Weekly Metrics Model
+# ──────────────────────────────────────────────────────────────
+
+class SittingWeeklyMetrics(models.Model):
+    """
+    Check-in metrics for one sitting over one week (Monday to Sunday),
+    computed by sittings.metrics.compute_weekly_metrics.
+    """
+    sitting = models.ForeignKey(Sitting, on_delete=models.CASCADE, related_name='weekly_metrics')
+    week_start = models.DateField()
+    week = models.PositiveIntegerField()  # ISO week number, as in SittingEvaluation.week
+    members = models.PositiveIntegerField(default=0)
+    active_members = models.PositiveIntegerField(default=0)  # completed at least one check-in
+    checkins_total = models.PositiveIntegerField(default=0)
+    checkins_completed = models.PositiveIntegerField(default=0)
+    completion_rate = models.FloatField(default=0)  # percent
+    active_ratio = models.FloatField(default=0)  # percent
+    streaks = models.JSONField(default=dict)  # members per streak bucket at week end
+    score = models.PositiveIntegerField(default=0)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('sitting', 'week_start')
+        ordering = ['-week_start']
+
+    def __str__(self):
+        return f"{self.sitting.name} week of {self.week_start}"
+
 # ──────────────────────────────────────────────────────────────
 #                       Message Model
 # ──────────────────────────────────────────────────────────────
@@ -115,6 +181,29 @@ class Message(models.Model):
     sitting = models.ForeignKey(Sitting, on_delete=models.CASCADE)
     content = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
+    seq = models.PositiveIntegerField(default=0, editable=False)  # position in the sitting's feed
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['sitting', 'timestamp', 'id'], name='sittings_message_feed_idx'),
+        ]
 
     def __str__(self):
         return f"{self.sender.username} in {self.sitting.name}"
+
+
+class MessageReadMarker(models.Model):
+    """
+    How far a user has read a sitting's feed. Unread count is
+    `sitting.message_count - last_read_seq`, so it never counts rows.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='message_read_markers')
+    sitting = models.ForeignKey(Sitting, on_delete=models.CASCADE, related_name='read_markers')
+    last_read_seq = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('user', 'sitting')
+
+    def __str__(self):
+        return f"{self.user.username} read {self.sitting.name} up to #{self.last_read_seq}"
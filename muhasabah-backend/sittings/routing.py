@@ -0,0 +1,8 @@
+# sittings/routing.py
+from django.urls import path
+
+from .consumers import SittingChatConsumer
+
+websocket_urlpatterns = [
+    path("ws/sittings/<int:sitting_id>/chat/", SittingChatConsumer.as_asgi()),
+]
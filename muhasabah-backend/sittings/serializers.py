@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Sitting, SittingMembership, SittingEvaluation
+from .models import Message, Sitting, SittingMembership, SittingEvaluation
 
 
 # ──────────────────────────────────────────────────────────────
@@ -12,7 +12,7 @@ class SittingSerializer(serializers.ModelSerializer):
     class Meta:
         model = Sitting
         fields = '__all__'
-        read_only_fields = ['id']
+        read_only_fields = ['id', 'approved_count']
 
 
 # ──────────────────────────────────────────────────────────────
@@ -28,9 +28,42 @@ class SittingMembershipSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ['id', 'joined_at', 'status']  # Optional: let API control status update
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Only present when the view annotated today's rollup (?include=progress).
+        if self.context.get("include_progress"):
+            total, completed = instance.today_total, instance.today_completed
+            data["today_progress"] = {
+                "total": total,
+                "completed": completed,
+                "percent": round(completed / total * 100, 1) if total else 0,
+            }
+        return data
+
+
+class BulkDecisionSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=1000)
+    decision = serializers.ChoiceField(choices=["approve", "reject"])
 
 
 class SittingEvaluationSerializer(serializers.ModelSerializer):
     class Meta:
         model = SittingEvaluation
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+
+# ──────────────────────────────────────────────────────────────
+#                         Message Serializer
+# ──────────────────────────────────────────────────────────────
+
+class MessageSerializer(serializers.ModelSerializer):
+    sender_username = serializers.CharField(source='sender.username', read_only=True)
+
+    class Meta:
+        model = Message
+        fields = ['id', 'sitting', 'sender', 'sender_username', 'content', 'timestamp', 'seq']
+        read_only_fields = ['id', 'sitting', 'sender', 'timestamp', 'seq']
+
+
+class MarkReadSerializer(serializers.Serializer):
+    seq = serializers.IntegerField(min_value=0, required=False)
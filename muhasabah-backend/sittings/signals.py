@@ -0,0 +1,16 @@
+# sittings/signals.py
+from django.db.models.signals import post_delete
+from django.dispatch import Signal, receiver
+
+from .capacity import release_seats
+from .models import SittingMembership
+
+# Sent after a bulk approve/reject commits (queryset updates fire no model
+# signals). Arguments: sitting_ids, student_ids.
+memberships_decided = Signal()
+
+
+@receiver(post_delete, sender=SittingMembership)
+def release_seat(sender, instance, **kwargs):
+    if instance.status == "approved":
+        release_seats(instance.sitting_id)
@@ -1,10 +1,11 @@
 # sittings/tasks.py
 from celery import shared_task
-from django.core.mail import send_mail
-from django.conf import settings
 
-@shared_task
-def send_approval_email_task(email, username, sitting_name):
+from notification.outbox import email_message, enqueue, enqueue_email
+
+
+def approval_email(username, sitting_name):
+    """Returns (subject, body) for the membership approval email."""
     subject = "Your Sitting Membership Has Been Approved!"
     message = (
         f"Assalaam alaykum {username},\n\n"
@@ -12,11 +13,63 @@ def send_approval_email_task(email, username, sitting_name):
         "You're now eligible to check in and participate.\n\n"
         "Jazaakum Allahu khayran."
     )
+    return subject, message
+
 
-    send_mail(
-        subject=subject,
-        message=message,
-        from_email=settings.EMAIL_HOST_USER,
-        recipient_list=[email],
-        fail_silently=True,
+def rejection_email(username, sitting_name):
+    """Returns (subject, body) for the membership rejection email."""
+    subject = "Update on Your Sitting Membership Request"
+    message = (
+        f"Assalaam alaykum {username},\n\n"
+        f"Your request to join the sitting '{sitting_name}' was not approved.\n"
+        "You're welcome to request another sitting.\n\n"
+        "Jazaakum Allahu khayran."
     )
+    return subject, message
+
+
+@shared_task
+def send_approval_email_task(email, username, sitting_name):
+    """
+    Queues the approval email in the notification outbox.
+    Kept for tasks already on the broker; new code enqueues directly.
+    """
+    subject, message = approval_email(username, sitting_name)
+    enqueue_email(email, subject, message)
+
+
+@shared_task
+def notify_membership_decisions(membership_ids, approved, decided_at=None):
+    """
+    Queues the approval (or rejection) emails for a bulk decision in one
+    outbox insert. `decided_at` (a timestamp) goes into the dedup keys, so a
+    retried task is absorbed while a later decision on the same membership
+    is still announced. Returns the number of emails queued.
+    """
+    from .models import SittingMembership
+
+    build, prefix = (approval_email, "sitting-approval") if approved else (rejection_email, "sitting-rejection")
+    suffix = f":{decided_at}" if decided_at else ""
+    rows = (
+        SittingMembership.objects
+        .filter(id__in=membership_ids)
+        .values("id", "student__email", "student__username", "sitting__name")
+    )
+    messages = [
+        email_message(row["student__email"], *build(row["student__username"], row["sitting__name"]),
+                      dedup_key=f"{prefix}:{row['id']}{suffix}")
+        for row in rows
+    ]
+    enqueue(messages)
+    return len(messages)
+
+
+@shared_task
+def compute_weekly_sitting_metrics():
+    """
+    Stores last week's per-sitting metrics and pre-fills evaluations.
+    Schedule it early on Mondays.
+    """
+    from .metrics import compute_weekly_metrics
+
+    return compute_weekly_metrics()
@@ -1,3 +1,424 @@
+from datetime import date, datetime, timedelta, timezone
+from unittest import mock
+
+from django.core.management import call_command
+from django.db.models import F
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from checkins.models import DailyCheckIn, DailyProgress
+from notification.models import OutboxMessage
+
+from . import capacity
+from .capacity import reserve_seats, reserve_up_to
+from .memberships import decide_memberships
+from .metrics import compute_weekly_metrics
+from .models import Sitting, SittingEvaluation, SittingMembership, SittingWeeklyMetrics
+
+
+def make_user(name, role="student"):
+    return User.objects.create_user(
+        email=f"{name}@example.com", username=name, password="x", role=role
+    )
+
+
+class CapacityTests(TestCase):
+
+    def setUp(self):
+        self.head = make_user("head", role="sitting_head")
+        self.sitting = Sitting.objects.create(
+            name="Fajr", location="Hall", sitting_head=self.head,
+            day_of_week="Monday", max_members=3, status="active",
+        )
+
+    def set_count(self, n):
+        Sitting.objects.filter(pk=self.sitting.pk).update(approved_count=n)
+
+    def count(self):
+        return Sitting.objects.values_list("approved_count", flat=True).get(pk=self.sitting.pk)
+
+    def test_reserve_seats_refuses_when_full(self):
+        self.set_count(2)
+        self.assertFalse(reserve_seats(self.sitting.pk, seats=2))
+        self.assertEqual(self.count(), 2)
+        self.assertTrue(reserve_seats(self.sitting.pk))
+        self.assertFalse(reserve_seats(self.sitting.pk))
+        self.assertEqual(self.count(), 3)
+
+    def test_reserve_up_to_claims_what_is_free(self):
+        self.set_count(1)
+        self.assertEqual(reserve_up_to(self.sitting.pk, 5), 2)
+        self.assertEqual(self.count(), 3)
+        self.assertEqual(reserve_up_to(self.sitting.pk, 1), 0)
+        self.assertEqual(self.count(), 3)
+
+    def test_reserve_up_to_retries_after_a_concurrent_claim(self):
+        self.set_count(1)
+        original = capacity._sittings
+        calls = []
+
+        def racing():
+            # The second call is the compare-and-set: another approval takes
+            # a seat between the read and the write.
+            if len(calls) == 1:
+                original().filter(pk=self.sitting.pk).update(approved_count=F("approved_count") + 1)
+            calls.append(1)
+            return original()
+
+        with mock.patch.object(capacity, "_sittings", racing):
+            self.assertEqual(reserve_up_to(self.sitting.pk, 5), 1)
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(self.count(), 3)
+
+    def test_reserve_up_to_unknown_sitting(self):
+        self.assertEqual(reserve_up_to(self.sitting.pk + 1000, 2), 0)
+
+    def test_approving_into_a_full_sitting_raises(self):
+        self.set_count(3)
+        membership = SittingMembership.objects.create(student=make_user("amina"), sitting=self.sitting)
+        membership.status = "approved"
+        with self.assertRaisesMessage(ValueError, "This sitting is full."):
+            membership.save()
+        self.assertEqual(SittingMembership.objects.get(pk=membership.pk).status, "pending")
+        self.assertEqual(self.count(), 3)
+
+    def test_second_approved_sitting_is_rejected(self):
+        other = Sitting.objects.create(
+            name="Isha", location="Hall", sitting_head=self.head,
+            day_of_week="Friday", max_members=3, status="active",
+        )
+        student = make_user("bilal")
+        SittingMembership.objects.create(student=student, sitting=self.sitting, status="approved")
+        second = SittingMembership.objects.create(student=student, sitting=other)
+        second.status = "approved"
+        with self.assertRaisesMessage(ValueError, "already approved in another sitting"):
+            second.save()
+        self.assertEqual(self.count(), 1)
+        self.assertEqual(Sitting.objects.get(pk=other.pk).approved_count, 0)
+
+    def test_stale_copies_of_one_membership_claim_one_seat(self):
+        membership = SittingMembership.objects.create(student=make_user("amina"), sitting=self.sitting)
+        first, second = (SittingMembership.objects.get(pk=membership.pk) for _ in range(2))
+        for copy in (first, second):
+            copy.status = "approved"
+            copy.save()
+        self.assertEqual(self.count(), 1)
+
+    def test_recount_command_repairs_drift(self):
+        SittingMembership.objects.create(student=make_user("amina"), sitting=self.sitting, status="approved")
+        self.set_count(3)
+        call_command("recount_sitting_seats", "--sitting", str(self.sitting.pk), stdout=mock.Mock())
+        self.assertEqual(self.count(), 1)
+
+    def test_decide_memberships_refuses_beyond_capacity(self):
+        self.set_count(1)
+        pending = [
+            SittingMembership.objects.create(student=make_user(f"student{i}"), sitting=self.sitting)
+            for i in range(4)
+        ]
+        result = decide_memberships(self.head, [m.pk for m in pending], approve=True)
+        self.assertEqual(result["approved"], [m.pk for m in pending[:2]])
+        self.assertEqual([r["reason"] for r in result["skipped"]], ["Sitting is full."] * 2)
+        self.assertEqual(self.count(), 3)
+        self.assertEqual(SittingMembership.objects.filter(status="approved").count(), 2)
+
+
+class WeeklyMetricsTests(TestCase):
+    # ISO week 1 of 2026 starts in December 2025.
+    week_start = date(2025, 12, 29)
+    week_end = date(2026, 1, 4)
+
+    def setUp(self):
+        self.head = make_user("head", role="sitting_head")
+        self.sitting = Sitting.objects.create(
+            name="Fajr", location="Hall", sitting_head=self.head,
+            day_of_week="Monday", max_members=10, status="active",
+        )
+        self.empty = Sitting.objects.create(
+            name="Isha", location="Hall", sitting_head=self.head,
+            day_of_week="Friday", max_members=10, status="active",
+        )
+        # name: (streak, streak_date, [(day offset, completed), ...])
+        members = {
+            "amina": (10, date(2026, 1, 10), [(0, True), (1, True), (2, False)]),  # 4 days at week end
+            "bilal": (2, self.week_end, [(3, False)]),                              # 2 days
+            "chioma": (5, date(2026, 1, 2), []),                                    # broken before week end
+            "dawud": (30, self.week_end, [(6, True), (7, True)]),                  # 30 days; day 7 is next week
+        }
+        for name, (streak, streak_date, checkins) in members.items():
+            student = make_user(name)
+            User.objects.filter(pk=student.pk).update(streak=streak, streak_date=streak_date)
+            SittingMembership.objects.create(student=student, sitting=self.sitting, status="approved")
+            for offset, completed in checkins:
+                DailyCheckIn.objects.create(
+                    user=student, date=self.week_start + timedelta(days=offset),
+                    todo_item=f"Fajr {offset}", is_completed=completed,
+                )
+        SittingMembership.objects.create(student=make_user("pending"), sitting=self.sitting)
+
+    def metrics(self, sitting):
+        return SittingWeeklyMetrics.objects.get(sitting=sitting, week_start=self.week_start)
+
+    def test_grouped_counts(self):
+        report = compute_weekly_metrics(self.week_start)
+        self.assertEqual(report["sittings"], 2)
+
+        m = self.metrics(self.sitting)
+        self.assertEqual(m.week, 1)
+        self.assertEqual((m.members, m.active_members), (4, 2))
+        self.assertEqual((m.checkins_total, m.checkins_completed), (5, 3))
+        self.assertEqual((m.completion_rate, m.active_ratio, m.score), (60.0, 50.0, 57))
+
+        empty = self.metrics(self.empty)
+        self.assertEqual((empty.members, empty.checkins_total, empty.score), (0, 0, 0))
+
+    def test_streak_buckets(self):
+        compute_weekly_metrics(self.week_start)
+        self.assertEqual(self.metrics(self.sitting).streaks, {"0": 1, "1-2": 1, "3-6": 1, "7+": 1})
+        self.assertEqual(self.metrics(self.empty).streaks, {"0": 0, "1-2": 0, "3-6": 0, "7+": 0})
+
+    def test_rerun_updates_in_place(self):
+        compute_weekly_metrics(self.week_start)
+        DailyCheckIn.objects.filter(user__username="bilal").update(is_completed=True)
+        report = compute_weekly_metrics(self.week_start)
+
+        self.assertEqual(report["evaluations_prefilled"], 0)
+        self.assertEqual(SittingWeeklyMetrics.objects.count(), 2)
+        self.assertEqual(SittingEvaluation.objects.count(), 1)
+        m = self.metrics(self.sitting)
+        self.assertEqual((m.active_members, m.checkins_completed), (3, 4))
+
+    def test_prefill_skips_sittings_without_members(self):
+        report = compute_weekly_metrics(self.week_start)
+        self.assertEqual(report["evaluations_prefilled"], 1)
+        evaluation = SittingEvaluation.objects.get()
+        self.assertEqual((evaluation.sitting, evaluation.week, evaluation.week_start), (self.sitting, 1, self.week_start))
+        self.assertEqual(evaluation.score, 57)
+
+    def write_evaluation(self, submitted_at):
+        evaluation = SittingEvaluation.objects.create(
+            sitting=self.sitting, head=self.head, week=1, summary="Written by the head", score=80,
+        )
+        SittingEvaluation.objects.filter(pk=evaluation.pk).update(submitted_at=submitted_at)
+
+    def test_prefill_ignores_the_same_week_number_a_year_earlier(self):
+        self.write_evaluation(datetime(2025, 1, 6, tzinfo=timezone.utc))
+        self.assertEqual(compute_weekly_metrics(self.week_start)["evaluations_prefilled"], 1)
+
+    def test_prefill_keeps_the_heads_evaluation(self):
+        self.write_evaluation(datetime(2026, 1, 5, tzinfo=timezone.utc))
+        self.assertEqual(compute_weekly_metrics(self.week_start)["evaluations_prefilled"], 0)
+        self.assertEqual(SittingEvaluation.objects.get().summary, "Written by the head")
+
+
+class TrendsTests(TestCase):
+
+    def test_score_change_only_between_consecutive_weeks(self):
+        head = make_user("head", role="sitting_head")
+        sitting = Sitting.objects.create(
+            name="Fajr", location="Hall", sitting_head=head,
+            day_of_week="Monday", max_members=10, status="active",
+        )
+        monday = date.today() - timedelta(days=date.today().weekday())
+        for weeks_ago, score in [(5, 40), (4, 50), (2, 70)]:
+            SittingWeeklyMetrics.objects.create(
+                sitting=sitting, week_start=monday - timedelta(weeks=weeks_ago), week=1, score=score,
+            )
+
+        client = APIClient()
+        client.force_authenticate(make_user("overall", role="overall_head"))
+        response = client.get("/api/sittings/trends/")
+
+        self.assertEqual(response.status_code, 200)
+        series = response.json()["sittings"][0]["series"]
+        self.assertEqual([point["score_change"] for point in series], [None, 10, None])
+
+
+class BulkDecisionTests(TestCase):
+
+    def setUp(self):
+        patcher = mock.patch("notification.outbox._kick_dispatcher")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.head = make_user("head", role="sitting_head")
+        self.sitting = Sitting.objects.create(
+            name="Fajr", location="Hall", sitting_head=self.head,
+            day_of_week="Monday", max_members=10, status="active",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.head)
+
+    def pending(self, name, sitting=None):
+        return SittingMembership.objects.create(student=make_user(name), sitting=sitting or self.sitting)
+
+    def decide(self, ids, decision):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                "/api/sittings/memberships/bulk-decide/", {"ids": ids, "decision": decision}, format="json"
+            )
+
+    def test_approve_skips_what_it_may_not_decide(self):
+        other_head = make_user("other", role="sitting_head")
+        elsewhere = Sitting.objects.create(
+            name="Isha", location="Hall", sitting_head=other_head,
+            day_of_week="Friday", max_members=10, status="active",
+        )
+        amina, bilal = self.pending("amina"), self.pending("bilal")
+        foreign = self.pending("chioma", sitting=elsewhere)
+        SittingMembership.objects.filter(pk=bilal.pk).update(status="approved")
+        duplicate = SittingMembership.objects.create(student=amina.student, sitting=elsewhere)
+
+        response = self.decide([amina.pk, amina.pk, bilal.pk, foreign.pk, duplicate.pk], "approve")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["approved"], [amina.pk])
+        self.assertEqual(
+            [row["id"] for row in response.json()["skipped"]], [bilal.pk, foreign.pk, duplicate.pk]
+        )
+        self.assertEqual(Sitting.objects.get(pk=self.sitting.pk).approved_count, 1)
+        self.assertEqual(
+            list(OutboxMessage.objects.values_list("recipient", flat=True)), ["amina@example.com"]
+        )
+        self.assertTrue(OutboxMessage.objects.get().dedup_key.startswith(f"sitting-approval:{amina.pk}:"))
+
+    def test_reject_queues_rejection_emails(self):
+        memberships = [self.pending(f"student{i}") for i in range(3)]
+        response = self.decide([m.pk for m in memberships], "reject")
+
+        self.assertEqual(response.json(), {"rejected": [m.pk for m in memberships], "skipped": []})
+        self.assertEqual(SittingMembership.objects.filter(status="rejected").count(), 3)
+        self.assertEqual(OutboxMessage.objects.filter(dedup_key__startswith="sitting-rejection:").count(), 3)
+        self.assertEqual(Sitting.objects.get(pk=self.sitting.pk).approved_count, 0)
+
+    def test_request_validation(self):
+        self.assertEqual(self.decide([], "approve").status_code, 400)
+        self.assertEqual(self.decide([1], "maybe").status_code, 400)
+        self.client.force_authenticate(make_user("amina"))
+        self.assertEqual(self.decide([1], "approve").status_code, 403)
+
+
+class ListPaginationTests(TestCase):
+
+    def setUp(self):
+        self.head = make_user("head", role="sitting_head")
+        self.sittings = [
+            Sitting.objects.create(
+                name=f"Sitting {i}", location="Hall", sitting_head=make_user(f"head{i}", role="sitting_head"),
+                day_of_week="Monday", max_members=10, status="active",
+            )
+            for i in range(5)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.head)
+
+    def walk(self, url, params):
+        ids, pages = [], 0
+        while url:
+            body = self.client.get(url, params).json()
+            params = None  # the next link carries them
+            ids += [row["id"] for row in body["results"]]
+            url = body["next"]
+            pages += 1
+        return ids, pages
+
+    def test_sitting_pages_follow_next_links(self):
+        ids, pages = self.walk("/api/sittings/sittings/", {"page_size": 2})
+        self.assertEqual(ids, [s.pk for s in self.sittings])
+        self.assertEqual(pages, 3)
+
+    def test_a_page_is_one_query_whatever_its_size(self):
+        for size in (1, 5):
+            with self.assertNumQueries(1):
+                response = self.client.get("/api/sittings/sittings/", {"page_size": size})
+            self.assertEqual(len(response.json()["results"]), size)
+        self.assertEqual(response.json()["results"][0]["sitting_head"], "head0@example.com")
+
+    def test_roster_embeds_todays_progress_in_the_same_query(self):
+        sitting = self.sittings[0]
+        for i in range(3):
+            member = make_user(f"student{i}")
+            SittingMembership.objects.create(student=member, sitting=sitting, status="approved")
+            if i:
+                DailyProgress.objects.create(user=member, date=date.today(), total=4, completed=i)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                "/api/sittings/memberships/", {"sitting": sitting.pk, "include": "progress"}
+            )
+        progress = [row["today_progress"] for row in response.json()["results"]]
+        self.assertEqual([p["percent"] for p in progress], [0, 25.0, 50.0])
+        self.assertEqual(progress[0], {"total": 0, "completed": 0, "percent": 0})
+
+    def test_bad_id_filters_are_rejected(self):
+        self.assertEqual(self.client.get("/api/sittings/memberships/", {"sitting": "x"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/sittings/sittings/", {"sitting_head": "1;"}).status_code, 400)
+
+
+class ChatTests(TestCase):
+
+    def setUp(self):
+        self.head = make_user("head", role="sitting_head")
+        self.sitting = Sitting.objects.create(
+            name="Fajr", location="Hall", sitting_head=self.head,
+            day_of_week="Monday", max_members=10, status="active",
+        )
+        self.amina, self.bilal = make_user("amina"), make_user("bilal")
+        for student in (self.amina, self.bilal):
+            SittingMembership.objects.create(student=student, sitting=self.sitting, status="approved")
+        self.url = f"/api/sittings/sittings/{self.sitting.pk}/messages/"
+
+    def as_user(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def post(self, user, content):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.as_user(user).post(self.url, {"content": content}, format="json")
+
+    def unread(self, user):
+        return self.as_user(user).get(self.url).json()["unread_count"]
+
+    def test_messages_are_numbered_and_senders_have_read_their_own(self):
+        self.assertEqual([self.post(self.amina, f"Salaam {i}").json()["seq"] for i in range(2)], [1, 2])
+        self.assertEqual(self.post(self.bilal, "Wa alaykum").json()["seq"], 3)
+        self.assertEqual((self.unread(self.amina), self.unread(self.head)), (1, 3))
+
+    def test_posting_does_not_hide_unseen_messages(self):
+        self.post(self.amina, "First")
+        self.post(self.bilal, "Reply without reading")
+        # The marker stays put, so "First" is still unread (and so is the reply).
+        self.assertEqual(self.unread(self.bilal), 2)
+
+    def test_read_markers_only_move_forward(self):
+        for i in range(3):
+            self.post(self.amina, f"Message {i}")
+        client = self.as_user(self.bilal)
+        read = f"{self.url}read/"
+
+        self.assertEqual(client.post(read, {"seq": 2}, format="json").json(), {"unread_count": 1})
+        self.assertEqual(client.post(read, {"seq": 1}, format="json").json(), {"unread_count": 1})
+        self.assertEqual(client.post(read, {"seq": -1}, format="json").status_code, 400)
+        self.assertEqual(client.post(read, {"seq": 99}, format="json").json(), {"unread_count": 0})
+        self.post(self.amina, "Later")
+        self.assertEqual(client.post(read, {}, format="json").json(), {"unread_count": 0})
+
+    def test_feed_pages_newest_first(self):
+        for i in range(5):
+            self.post(self.amina, f"Message {i}")
+        client = self.as_user(self.bilal)
+        seqs, cursor = [], None
+        while True:
+            body = client.get(self.url, {"page_size": 2, **({"cursor": cursor} if cursor else {})}).json()
+            seqs += [m["seq"] for m in body["messages"]]
+            cursor = body["next_cursor"]
+            if cursor is None:
+                break
+        self.assertEqual(seqs, [5, 4, 3, 2, 1])
 
-# Create your tests here.
+    def test_only_participants_can_chat(self):
+        pending = make_user("pending")
+        SittingMembership.objects.create(student=pending, sitting=self.sitting)
+        self.assertEqual(self.as_user(pending).get(self.url).status_code, 403)
+        self.assertEqual(self.post(make_user("outsider"), "Hi").status_code, 403)
@@ -4,6 +4,7 @@ from .views import (
     SittingViewSet,
     SittingMembershipViewSet,
     SittingEvaluationViewSet,
+    SittingTrendsView,
 )
 
 # ─────────────── Router Registration ─────────────── #
@@ -14,5 +15,6 @@ router.register(r'evaluations', SittingEvaluationViewSet, basename='sitting-eval
 
 # ─────────────── URL Patterns ─────────────── #
 urlpatterns = [
+    path('trends/', SittingTrendsView.as_view(), name='sitting-trends'),
     path('', include(router.urls)),
 ]
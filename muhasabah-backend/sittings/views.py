@@ -1,30 +1,173 @@
-from django.shortcuts import render
+from datetime import date, timedelta
+
+from django.db.models import FilteredRelation, Q
+from django.db.models.functions import Coalesce
+from django.shortcuts import get_object_or_404
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.pagination import CursorPagination
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from muhasabah_backend.pagination import KeysetPagination
+from .messages import is_participant, mark_read, post_message, unread_count
+from .models import Message, Sitting, SittingMembership, SittingWeeklyMetrics
+from .serializers import MarkReadSerializer, MessageSerializer, SittingSerializer, SittingMembershipSerializer, SittingEvaluationSerializer, SittingEvaluation
+
+
+def id_param(params, name):
+    value = params.get(name)
+    if value and not value.isdigit():
+        raise ValidationError({name: "Must be an integer id."})
+    return value
+
+
+class MessagePagination(KeysetPagination):
+    ordering_field = "timestamp"
+
+
+class SittingPagination(CursorPagination):
+    ordering = "id"
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
 
-# Create your views here.
-from rest_framework import viewsets
-from .models import Sitting, SittingMembership
-from .serializers import SittingSerializer, SittingMembershipSerializer, SittingEvaluationSerializer, SittingEvaluation
 
 class SittingViewSet(viewsets.ModelViewSet):
-    queryset = Sitting.objects.all()
+    """
+    Sittings, cursor-paginated. Filters: ?status=, ?sitting_head=<id>.
+    """
+    queryset = Sitting.objects.select_related("sitting_head")
     serializer_class = SittingSerializer
+    pagination_class = SittingPagination
 
-class SittingMembershipViewSet(viewsets.ModelViewSet):
-    queryset = SittingMembership.objects.all()
-    serializer_class = SittingMembershipSerializer
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        params = self.request.query_params
+        if params.get("status"):
+            queryset = queryset.filter(status=params["status"])
+        if id_param(params, "sitting_head"):
+            queryset = queryset.filter(sitting_head_id=params["sitting_head"])
+        return queryset
+
+    # ── Group chat ── #
+
+    def chat_sitting(self, request, pk):
+        sitting = get_object_or_404(Sitting, pk=pk)
+        if not is_participant(request.user, sitting):
+            raise PermissionDenied("Only the sitting head and approved members can use this chat.")
+        return sitting
+
+    @action(detail=True, methods=["get", "post"], permission_classes=[IsAuthenticated])
+    def messages(self, request, pk=None):
+        """
+        GET: the feed, newest first (keyset-paginated via `?cursor=`), with
+        the caller's unread count. POST {"content": "..."}: send a message.
+        """
+        sitting = self.chat_sitting(request, pk)
+
+        if request.method == "POST":
+            serializer = MessageSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            message = post_message(sitting, request.user, serializer.validated_data["content"])
+            return Response(MessageSerializer(message).data, status=status.HTTP_201_CREATED)
+
+        paginator = MessagePagination()
+        page = paginator.paginate_queryset(
+            Message.objects.filter(sitting=sitting).select_related("sender"), request, view=self
+        )
+        return Response({
+            "unread_count": unread_count(request.user, sitting),
+            "messages": MessageSerializer(page, many=True).data,
+            "next_cursor": paginator.next_cursor,
+            "next": paginator.get_next_link(),
+        })
+
+    @action(detail=True, methods=["post"], url_path="messages/read", permission_classes=[IsAuthenticated])
+    def messages_read(self, request, pk=None):
+        """
+        POST {"seq": n} marks the feed read up to message #n;
+        an empty body marks everything read.
+        """
+        sitting = self.chat_sitting(request, pk)
+        serializer = MarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        seq = serializer.validated_data.get("seq", sitting.message_count)
+        mark_read(request.user, sitting, min(seq, sitting.message_count))
+        return Response({"unread_count": unread_count(request.user, sitting)})
 # sittings/views.py
 
-from rest_framework import viewsets
+from django.db import IntegrityError
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .memberships import decide_memberships
+from .metrics import week_bounds
 from .models import SittingMembership
-from .serializers import SittingMembershipSerializer
+from .serializers import BulkDecisionSerializer, SittingMembershipSerializer
 from accounts.permissions import IsRole
 
 class SittingMembershipViewSet(viewsets.ModelViewSet):
-    queryset = SittingMembership.objects.all()
+    """
+    Memberships, cursor-paginated. Filters: ?sitting=<id>, ?status=.
+    ?include=progress embeds each member's check-in progress for today,
+    joined from the DailyProgress rollup in the same query.
+    """
+    queryset = SittingMembership.objects.select_related("student", "sitting")
     serializer_class = SittingMembershipSerializer
+    pagination_class = SittingPagination
     permission_classes = [IsRole]
     allowed_roles = ['sitting_head']
 
+    def include_progress(self):
+        return "progress" in self.request.query_params.get("include", "").split(",")
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        params = self.request.query_params
+        if id_param(params, "sitting"):
+            queryset = queryset.filter(sitting_id=params["sitting"])
+        if params.get("status"):
+            queryset = queryset.filter(status=params["status"])
+        if self.action == "list" and self.include_progress():
+            queryset = queryset.annotate(
+                today_progress=FilteredRelation(
+                    "student__daily_progress",
+                    condition=Q(student__daily_progress__date=date.today()),
+                ),
+                today_total=Coalesce("today_progress__total", 0),
+                today_completed=Coalesce("today_progress__completed", 0),
+            )
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["include_progress"] = self.action == "list" and self.include_progress()
+        return context
+
+    @action(detail=False, methods=["post"], url_path="bulk-decide")
+    def bulk_decide(self, request):
+        """
+        POST {"ids": [...], "decision": "approve" | "reject"}
+        Decides many pending memberships of the head's sittings at once.
+        """
+        serializer = BulkDecisionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            result = decide_memberships(
+                request.user,
+                serializer.validated_data["ids"],
+                approve=serializer.validated_data["decision"] == "approve",
+            )
+        except IntegrityError:
+            return Response(
+                {"detail": "A student was approved elsewhere meanwhile; please retry."},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response(result)
+
 # sittings/views.py (continued)
 
 class SittingEvaluationViewSet(viewsets.ModelViewSet):
@@ -32,3 +175,46 @@ class SittingEvaluationViewSet(viewsets.ModelViewSet):
     serializer_class = SittingEvaluationSerializer
     permission_classes = [IsRole]
     allowed_roles = ['overall_head']
+
+
+class SittingTrendsView(APIView):
+    """
+    Week-over-week metrics for every sitting, read from SittingWeeklyMetrics.
+    ?weeks=N (default 8, max 52) limits how far back the series go.
+    """
+    permission_classes = [IsRole]
+    allowed_roles = ['overall_head']
+
+    def get(self, request):
+        try:
+            weeks = max(1, min(int(request.query_params.get("weeks", 8)), 52))
+        except ValueError:
+            raise ValidationError({"weeks": "Must be an integer."})
+        since = week_bounds(date.today())[0] - timedelta(weeks=weeks)
+
+        sittings = {}
+        metrics = (
+            SittingWeeklyMetrics.objects
+            .filter(week_start__gte=since)
+            .select_related("sitting")
+            .order_by("sitting_id", "week_start")
+        )
+        for m in metrics:
+            entry = sittings.setdefault(m.sitting_id, {"id": m.sitting_id, "name": m.sitting.name, "series": []})
+            previous = entry["series"][-1] if entry["series"] else None
+            # No change across a week with no metrics row.
+            if previous and previous["week_start"] != m.week_start - timedelta(days=7):
+                previous = None
+            entry["series"].append({
+                "week_start": m.week_start,
+                "week": m.week,
+                "members": m.members,
+                "active_members": m.active_members,
+                "completion_rate": m.completion_rate,
+                "active_ratio": m.active_ratio,
+                "streaks": m.streaks,
+                "score": m.score,
+                "score_change": m.score - previous["score"] if previous else None,
+            })
+
+        return Response({"since": since, "sittings": list(sittings.values())})
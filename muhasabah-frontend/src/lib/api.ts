@@ -12,6 +12,7 @@ import { Todo, TodoPayload } from "@/types/todo";
 import { Profile, Notifications } from "@/types/user";
 import { MenuItem } from "@/types/sidebar";
 import { Checkin, CheckinPayload } from "@/types/checkin";
+import { Sitting as SittingRecord } from "@/types/sitting";
 // ====================
 // AXIOS CLIENT
 // ====================
@@ -209,9 +210,23 @@ export const getNotifications = async (): Promise<Notifications> => {
 // ====================
 const SITTINGS_BASE = "/sittings/sittings/";
 
+// List endpoints are cursor-paginated: { next, previous, results }.
+export interface CursorPage<T> {
+  next: string | null;
+  previous: string | null;
+  results: T[];
+}
+
+// Follows the `next` links and returns every sitting.
 export const getSittings = async () => {
-  const res = await apiClient.get(SITTINGS_BASE);
-  return res.data;
+  const sittings: SittingRecord[] = [];
+  let url: string | null = SITTINGS_BASE;
+  while (url) {
+    const res: { data: CursorPage<SittingRecord> } = await apiClient.get(url);
+    sittings.push(...res.data.results);
+    url = res.data.next;
+  }
+  return sittings;
 };
 
 export const getSitting = async (id: number) => {